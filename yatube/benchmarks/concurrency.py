@@ -0,0 +1,168 @@
+"""Сравнение путей WSGI и ASGI под одновременной нагрузкой.
+
+concurrency клиентов одновременно запрашивают главную, группу, профиль
+и страницу поста, каждый следующий запрос – после ответа на
+предыдущий. WSGI-путь – сервер с очередью и фиксированным числом
+рабочих потоков (как gunicorn --threads), ASGI-путь –
+core.asgi.ASGIHandler. Время ответа включает ожидание в очереди.
+Запросы к базе можно замедлить на db_latency секунд, чтобы
+имитировать базу по сети.
+"""
+import asyncio
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models import Count
+from django.urls import reverse
+
+from core.asgi import ASGIHandler, build_environ
+from posts.models import Group, Post, User
+
+from .runner import _percentile, without_rate_limits
+
+
+def urls():
+    """Страницы самой большой группы, самого популярного автора и
+    самого обсуждаемого поста."""
+    group = Group.objects.annotate(
+        total=Count('posts')
+    ).order_by('-total', 'pk').first()
+    author = User.objects.annotate(
+        total=Count('posts')
+    ).order_by('-total', 'pk').first()
+    post = Post.objects.order_by('-comment_count', '-pk').first()
+    return [
+        reverse('posts:index'),
+        reverse('posts:group_list', args=[group.slug]),
+        reverse('posts:profile', args=[author.username]),
+        reverse('posts:post_detail', args=[post.pk]),
+    ]
+
+
+def http_scope(path):
+    return {
+        'type': 'http',
+        'method': 'GET',
+        'path': path,
+        'query_string': b'',
+        'headers': [(b'host', b'testserver')],
+        'server': ('testserver', 80),
+        'client': ('127.0.0.1', 0),
+        'http_version': '1.1',
+        'scheme': 'http',
+    }
+
+
+def wsgi_request(application, path):
+    status = []
+    environ = build_environ(http_scope(path), io.BytesIO())
+    result = application(environ, lambda line, headers: status.append(line))
+    try:
+        b''.join(result)
+    finally:
+        result.close()
+    return int(status[0].split(' ', 1)[0])
+
+
+async def asgi_request(application, path):
+    status = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await application(http_scope(path), receive, send)
+    return status[0]
+
+
+async def _drive(handle, paths, requests, concurrency):
+    timings = []
+    errors = 0
+    numbers = iter(range(requests))
+
+    async def client():
+        nonlocal errors
+        for number in numbers:
+            started = time.perf_counter()
+            status = await handle(paths[number % len(paths)])
+            timings.append(time.perf_counter() - started)
+            errors += status != 200
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        'rps': round(len(timings) / elapsed, 1),
+        'p50_ms': _percentile(timings, 50),
+        'p95_ms': _percentile(timings, 95),
+        'p99_ms': _percentile(timings, 99),
+        'errors': errors,
+    }
+
+
+def run_wsgi(paths, requests, concurrency, threads):
+    application = WSGIHandler()
+    executor = ThreadPoolExecutor(max_workers=threads)
+
+    async def handle(path):
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, wsgi_request, application, path
+        )
+
+    try:
+        return asyncio.run(_drive(handle, paths, requests, concurrency))
+    finally:
+        executor.shutdown()
+
+
+def run_asgi(paths, requests, concurrency, threads):
+    application = ASGIHandler(WSGIHandler(), threads)
+
+    async def handle(path):
+        return await asgi_request(application, path)
+
+    try:
+        return asyncio.run(_drive(handle, paths, requests, concurrency))
+    finally:
+        application.executor.shutdown()
+
+
+def run(requests, concurrency, wsgi_threads, asgi_threads, db_latency=0):
+    """Прогоняет оба пути и возвращает их показатели."""
+    paths = urls()
+    slow = threading.Event()
+
+    def wrapper(execute, sql, params, many, context):
+        if slow.is_set():
+            time.sleep(db_latency)
+        return execute(sql, params, many, context)
+
+    def add_wrapper(sender, connection, **kwargs):
+        # В начало списка: обертки, которые ставит execute_wrapper()
+        # (например, MetricsMiddleware), снимаются с конца.
+        connection.execute_wrappers.insert(0, wrapper)
+
+    # Соединения создаются и в потоках пулов, поэтому задержка
+    # добавляется к каждому новому соединению до конца прогона.
+    if db_latency:
+        slow.set()
+        connection_created.connect(add_wrapper)
+        for connection in connections.all():
+            add_wrapper(None, connection)
+    try:
+        with without_rate_limits():
+            return {
+                'wsgi': run_wsgi(paths, requests, concurrency, wsgi_threads),
+                'asgi': run_asgi(paths, requests, concurrency, asgi_threads),
+            }
+    finally:
+        slow.clear()
+        connection_created.disconnect(add_wrapper)
@@ -0,0 +1,106 @@
+from dataclasses import asdict
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from benchmarks import runner
+from benchmarks.seed import seed
+
+from .seed_data import add_seed_arguments, seed_options
+
+BASELINES_DIR = Path(__file__).resolve().parents[2] / 'baselines'
+
+
+class Command(BaseCommand):
+    help = ('Замеряет основные страницы на синтетических данных во '
+            'временной базе и сравнивает с базовой линией')
+
+    def add_arguments(self, parser):
+        add_seed_arguments(parser)
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument(
+            '--warm', action='store_true',
+            help='Не очищать кэш перед запросами',
+        )
+        parser.add_argument(
+            '--only', nargs='+', metavar='SCENARIO',
+            help='Прогнать только эти сценарии',
+        )
+        parser.add_argument(
+            '--baseline', default='default',
+            help='Имя базовой линии в benchmarks/baselines/',
+        )
+        parser.add_argument(
+            '--save', action='store_true',
+            help='Сохранить результат как базовую линию',
+        )
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Завершиться с ошибкой при регрессии',
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help='Допустимый рост p95, доля (по умолчанию 0.25)',
+        )
+
+    def handle(self, *args, **options):
+        dataset = asdict(seed_options(options))
+        setup_test_environment(debug=False)
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            dataset['counts'] = seed(seed_options(options))
+            results = runner.run(
+                options['iterations'], options['warm'], options['only']
+            )
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'dataset': dataset,
+            'environment': runner.environment(),
+            'iterations': options['iterations'],
+            'warm': options['warm'],
+            'results': results,
+        }
+        self.print_results(results)
+
+        path = BASELINES_DIR / f'{options["baseline"]}.json'
+        if options['save']:
+            runner.save(path, report)
+            self.stdout.write(self.style.SUCCESS(f'Сохранено в {path}'))
+            return
+        if not path.exists():
+            return
+        baseline = runner.load(path)
+        if (baseline['dataset'] != dataset
+                or baseline['warm'] != options['warm']):
+            self.stdout.write(self.style.WARNING(
+                'Данные или режим кэша отличаются от базовой линии, '
+                'сравнение пропущено'
+            ))
+            return
+        regressions = runner.compare(
+            results, baseline['results'], options['tolerance']
+        )
+        for line in regressions:
+            self.stdout.write(self.style.ERROR(line))
+        if regressions and options['check']:
+            raise CommandError('Есть регрессии относительно базовой линии')
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS('Регрессий нет'))
+
+    def print_results(self, results):
+        header = ('сценарий', 'p50 мс', 'p95 мс', 'p99 мс', 'SQL', 'КБ')
+        self.stdout.write('{:<14}{:>9}{:>9}{:>9}{:>6}{:>9}'.format(*header))
+        for name, row in results.items():
+            self.stdout.write('{:<14}{:>9}{:>9}{:>9}{:>6}{:>9}'.format(
+                name, row['p50_ms'], row['p95_ms'], row['p99_ms'],
+                row['queries'], row['peak_memory_kb'],
+            ))
@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import (
+    override_settings,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from benchmarks import concurrency
+from benchmarks.seed import seed
+
+from .seed_data import add_seed_arguments, seed_options
+
+DUMMY_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает запросы в секунду и хвосты задержек путей WSGI '
+            'и ASGI при множестве одновременных клиентов')
+
+    def add_arguments(self, parser):
+        add_seed_arguments(parser)
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument(
+            '--concurrency', type=int, default=64,
+            help='Число одновременных клиентов',
+        )
+        parser.add_argument(
+            '--wsgi-threads', type=int, default=8,
+            help='Рабочих потоков WSGI-сервера',
+        )
+        parser.add_argument(
+            '--asgi-threads', type=int, default=settings.ASGI_THREADS,
+            help='Потоков пула ASGI-обработчика',
+        )
+        parser.add_argument(
+            '--db-latency', type=float, default=0,
+            help='Задержка каждого SQL-запроса, мс',
+        )
+        parser.add_argument(
+            '--warm', action='store_true',
+            help='Не отключать кэш лент',
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment(debug=False)
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            seed(seed_options(options))
+            caches = {} if options['warm'] else {'CACHES': DUMMY_CACHE}
+            with override_settings(**caches):
+                results = concurrency.run(
+                    options['requests'],
+                    options['concurrency'],
+                    options['wsgi_threads'],
+                    options['asgi_threads'],
+                    options['db_latency'] / 1000,
+                )
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        header = ('путь', 'RPS', 'p50 мс', 'p95 мс', 'p99 мс', 'ошибок')
+        self.stdout.write('{:<6}{:>9}{:>9}{:>9}{:>9}{:>8}'.format(*header))
+        for name, row in results.items():
+            self.stdout.write('{:<6}{:>9}{:>9}{:>9}{:>9}{:>8}'.format(
+                name, row['rps'], row['p50_ms'], row['p95_ms'],
+                row['p99_ms'], row['errors'],
+            ))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from benchmarks import sessions
+from benchmarks.seed import seed
+
+from .seed_data import add_seed_arguments, seed_options
+
+
+class Command(BaseCommand):
+    help = ('Считает чтения и записи таблицы сессий на просмотр '
+            'страницы авторизованным пользователем по хранилищам сессий')
+
+    def add_arguments(self, parser):
+        add_seed_arguments(parser)
+        parser.add_argument(
+            '--rounds', type=int, default=20,
+            help='Сколько раз открыть каждую страницу',
+        )
+        parser.add_argument(
+            '--save-every-request', action='store_true',
+            help='Сохранять сессию на каждый запрос '
+                 '(SESSION_SAVE_EVERY_REQUEST)',
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment(debug=False)
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            seed(seed_options(options))
+            results = sessions.run(
+                options['rounds'], options['save_every_request'],
+            )
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        header = ('хранилище', 'чтений', 'записей')
+        self.stdout.write('{:<22}{:>9}{:>9}'.format(*header))
+        for name, row in results.items():
+            self.stdout.write('{:<22}{:>9}{:>9}'.format(
+                name, row['reads'], row['writes'],
+            ))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from benchmarks import rendering
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время рендеринга страниц из 10, 50 и 100 '
+            'карточек постов до и после кэширующего загрузчика и '
+            'тега post_cards')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=rendering.SIZES,
+            help='Число карточек на странице',
+        )
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        results = rendering.run(options['sizes'], options['repeat'])
+        header = ('карточек', 'before мс', 'cached мс', 'cards мс')
+        self.stdout.write('{:<10}{:>11}{:>11}{:>11}'.format(*header))
+        for size, row in results.items():
+            self.stdout.write('{:<10}{:>11}{:>11}{:>11}'.format(
+                size, row['before'], row['cached'], row['cards'],
+            ))
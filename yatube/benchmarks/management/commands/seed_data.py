@@ -0,0 +1,36 @@
+from dataclasses import fields
+
+from django.core.management.base import BaseCommand
+
+from benchmarks.seed import SeedOptions, seed
+
+
+def add_seed_arguments(parser):
+    """Параметры генератора данных, общие для seed_data и benchmark."""
+    for field in fields(SeedOptions):
+        parser.add_argument(
+            '--' + field.name.replace('_', '-'),
+            type=field.type,
+            default=field.default,
+            dest=field.name,
+        )
+
+
+def seed_options(options):
+    return SeedOptions(**{
+        field.name: options[field.name] for field in fields(SeedOptions)
+    })
+
+
+class Command(BaseCommand):
+    help = ('Наполняет базу синтетическими пользователями, подписками '
+            'по степенному закону, группами, постами и комментариями')
+
+    def add_arguments(self, parser):
+        add_seed_arguments(parser)
+
+    def handle(self, *args, **options):
+        counts = seed(seed_options(options))
+        self.stdout.write(self.style.SUCCESS(
+            'Создано: ' + ', '.join(f'{k} – {v}' for k, v in counts.items())
+        ))
@@ -0,0 +1,86 @@
+"""Микрозамер рендеринга страницы карточек постов.
+
+Сравниваются три варианта на страницах из 10, 50 и 100 карточек:
+before – {% include %} карточки в цикле с {% url %} и {% static %},
+шаблоны читаются с диска (как при DEBUG); cached – то же с
+кэширующим загрузчиком; cards – тег post_cards с кэширующим
+загрузчиком. Посты строятся в памяти без базы и без картинок, поэтому
+замер показывает только работу шаблонов.
+"""
+import time
+
+from django.conf import settings
+from django.template import Context, Engine
+from django.template.backends.django import get_installed_libraries
+from django.test import RequestFactory
+from django.urls import resolve
+from django.utils import timezone
+
+from posts.models import Group, Post, User
+
+from .runner import _percentile
+
+SIZES = (10, 50, 100)
+BEFORE = ('{% for post in page_obj %}'
+          '{% include "benchmarks/legacy_post.html" %}'
+          '{% endfor %}')
+CARDS = '{% load post_cards %}{% post_cards page_obj %}'
+
+
+def engine(cached):
+    # Без debug Engine сам оборачивает загрузчики в cached.Loader.
+    return Engine(
+        dirs=[settings.TEMPLATES_DIR],
+        app_dirs=True,
+        debug=not cached,
+        libraries=get_installed_libraries(),
+    )
+
+
+def posts(count):
+    author = User(pk=1, username='author', first_name='Лев',
+                  last_name='Толстой')
+    group = Group(pk=1, slug='group', title='Группа')
+    now = timezone.now()
+    result = []
+    for number in range(count):
+        post = Post(
+            pk=number + 1,
+            author=author,
+            group=group if number % 2 else None,
+            text=f'Текст поста {number} ' * 40,
+            pub_date=now,
+        )
+        post.summarize()
+        result.append(post)
+    return result
+
+
+def measure(template, page, repeat):
+    request = RequestFactory().get('/')
+    request.resolver_match = resolve('/')
+    timings = []
+    for _ in range(repeat):
+        context = Context({'page_obj': page, 'request': request})
+        started = time.perf_counter()
+        template.render(context)
+        timings.append(time.perf_counter() - started)
+    return _percentile(timings, 50)
+
+
+def run(sizes=SIZES, repeat=50):
+    """Медиана времени рендеринга страницы, мс, по размерам и
+    вариантам."""
+    plain, cached = engine(cached=False), engine(cached=True)
+    variants = {
+        'before': plain.from_string(BEFORE),
+        'cached': cached.from_string(BEFORE),
+        'cards': cached.from_string(CARDS),
+    }
+    return {
+        size: {
+            name: measure(template, posts(size), repeat)
+            for name, template in variants.items()
+        }
+        for size in sizes
+    }
@@ -0,0 +1,180 @@
+"""Прогон сценариев через тестовый клиент и сравнение с базовой линией.
+
+Каждый сценарий – один запрос к представлению. Для него считаются
+перцентили времени ответа, число SQL-запросов и пик выделенной памяти
+(tracemalloc, отдельным коротким прогоном, чтобы трассировка не
+искажала время). Ограничение частоты записей на время замера
+отключается: иначе повторы add_comment упираются в 429.
+"""
+import json
+import math
+import platform
+import time
+import tracemalloc
+
+import django
+from django.core.cache import cache
+from django.db import connection, reset_queries
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+MEMORY_RUNS = 5
+
+
+def without_rate_limits():
+    """Отключает core.ratelimit: замеры повторяют один запрос от
+    одного пользователя чаще, чем позволяют ведра."""
+    return override_settings(RATE_LIMITS={})
+
+
+class Scenarios:
+    """Запросы к основным страницам от лица типичных пользователей:
+    самого активного читателя, самого популярного автора, самой
+    большой группы и самого обсуждаемого поста."""
+
+    def __init__(self):
+        self.reader = User.objects.annotate(
+            follows=Count('follower')
+        ).order_by('-follows', 'pk').first()
+        self.author = User.objects.annotate(
+            followers=Count('following')
+        ).order_by('-followers', 'pk').first()
+        self.group = Group.objects.annotate(
+            total=Count('posts')
+        ).order_by('-total', 'pk').first()
+        self.post = Post.objects.order_by('-comment_count', '-pk').first()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def index(self):
+        return self.client.get(reverse('posts:index'))
+
+    def group_posts(self):
+        return self.client.get(
+            reverse('posts:group_list', args=[self.group.slug])
+        )
+
+    def profile(self):
+        return self.client.get(
+            reverse('posts:profile', args=[self.author.username])
+        )
+
+    def post_detail(self):
+        return self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+
+    def follow_index(self):
+        return self.client.get(reverse('posts:follow_index'))
+
+    def add_comment(self):
+        return self.client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Комментарий из замера'},
+        )
+
+    def names(self):
+        return [
+            'index', 'group_posts', 'profile', 'post_detail',
+            'follow_index', 'add_comment',
+        ]
+
+
+def _percentile(values, p):
+    """Перцентиль p по методу ближайшего ранга, в миллисекундах."""
+    values = sorted(values)
+    rank = max(math.ceil(p / 100 * len(values)), 1)
+    return round(values[rank - 1] * 1000, 2)
+
+
+def measure(request, iterations, warm=False):
+    """Замер одного сценария. Без warm кэш очищается перед каждым
+    запросом, и замер показывает работу самого представления."""
+    timings = []
+    queries = 0
+    for _ in range(iterations):
+        if not warm:
+            cache.clear()
+        reset_queries()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = request()
+            timings.append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            raise RuntimeError(f'Ответ {response.status_code}')
+        queries = max(queries, len(captured))
+
+    peak = 0
+    for _ in range(MEMORY_RUNS):
+        if not warm:
+            cache.clear()
+        tracemalloc.start()
+        try:
+            request()
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+
+    return {
+        'p50_ms': _percentile(timings, 50),
+        'p95_ms': _percentile(timings, 95),
+        'p99_ms': _percentile(timings, 99),
+        'queries': queries,
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def run(iterations, warm=False, only=None):
+    scenarios = Scenarios()
+    with without_rate_limits():
+        return {
+            name: measure(getattr(scenarios, name), iterations, warm)
+            for name in scenarios.names()
+            if not only or name in only
+        }
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'machine': platform.machine(),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Регрессии относительно базовой линии: рост p95 больше чем на
+    tolerance (доля) и любой рост числа SQL-запросов."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current['queries'] > previous['queries']:
+            regressions.append(
+                f'{name}: SQL-запросов {previous["queries"]} → '
+                f'{current["queries"]}'
+            )
+        limit = previous['p95_ms'] * (1 + tolerance)
+        if current['p95_ms'] > limit:
+            regressions.append(
+                f'{name}: p95 {previous["p95_ms"]} → '
+                f'{current["p95_ms"]} мс'
+            )
+    return regressions
+
+
+def load(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save(path, report):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2, sort_keys=True)
+        file.write('\n')
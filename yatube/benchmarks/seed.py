@@ -0,0 +1,131 @@
+"""Генератор синтетических данных для замеров.
+
+Популярность авторов распределена по закону Ципфа: немногие авторы
+пишут большую часть постов и собирают большую часть подписчиков, как
+в настоящих соцсетях. Данные пишутся пачками в обход сигналов, после
+чего счетчики, ленты подписок и поисковый индекс строятся заново.
+"""
+import random
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from posts import counters, timeline
+from posts.models import Comment, Follow, Group, Post, User
+from search import index
+
+WORDS = (
+    'кот собака прогулка парк утро вечер город море книга музыка кофе '
+    'работа отпуск дождь солнце друзья фильм поезд лес горы дом сад '
+    'программирование python django база запрос кэш лента подписка'
+).split()
+
+
+@dataclass
+class SeedOptions:
+    users: int = 200
+    posts: int = 2000
+    groups: int = 10
+    comments_per_post: float = 3.0
+    follows_per_user: float = 15.0
+    zipf_exponent: float = 1.1
+    days: int = 365
+    seed: int = 0
+
+
+def _zipf_weights(count, exponent):
+    return [1 / (rank ** exponent) for rank in range(1, count + 1)]
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+@transaction.atomic
+def seed(options):
+    """Наполняет базу и возвращает словарь с числом созданных записей."""
+    rng = random.Random(options.seed)
+    now = timezone.now()
+    password = make_password(None)
+
+    first_user = User.objects.count()
+    User.objects.bulk_create(
+        [User(username=f'bench_{first_user + i}', password=password)
+         for i in range(options.users)],
+    )
+    users = list(
+        User.objects.filter(username__startswith='bench_')
+        .order_by('pk').values_list('pk', flat=True)
+    )[-options.users:]
+    weights = _zipf_weights(len(users), options.zipf_exponent)
+
+    Group.objects.bulk_create(
+        Group(title=f'Группа {i}', slug=f'bench-{first_user}-{i}',
+              description=_text(rng, 12))
+        for i in range(options.groups)
+    )
+    groups = list(
+        Group.objects.filter(slug__startswith=f'bench-{first_user}-')
+        .values_list('pk', flat=True)
+    )
+
+    authors = rng.choices(users, weights, k=options.posts)
+    new_posts = [
+        Post(author_id=author, text=_text(rng, rng.randint(5, 60)),
+             group_id=rng.choice(groups) if rng.random() < 0.6 else None)
+        for author in authors
+    ]
+    for post in new_posts:
+        post.summarize()
+    Post.objects.bulk_create(new_posts)
+    posts = list(
+        Post.objects.filter(author_id__in=users).values_list('pk', flat=True)
+    )
+    # pub_date заполняется при создании текущим временем; разносим
+    # посты по последним options.days дням.
+    dates = sorted(
+        now - timedelta(seconds=rng.randint(0, options.days * 86400))
+        for _ in posts
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            'UPDATE posts_post SET pub_date = %s WHERE id = %s',
+            list(zip(dates, posts)),
+        )
+
+    comments = int(len(posts) * options.comments_per_post)
+    commented = rng.choices(posts, _zipf_weights(len(posts), 0.8),
+                            k=comments)
+    Comment.objects.bulk_create(
+        [Comment(post_id=post, author_id=rng.choice(users),
+                 text=_text(rng, rng.randint(2, 20)))
+         for post in commented],
+    )
+
+    follows = set()
+    for user in users:
+        wanted = min(
+            int(rng.expovariate(1 / options.follows_per_user)) + 1,
+            len(users) - 1,
+        )
+        for author in rng.choices(users, weights, k=wanted):
+            if author != user:
+                follows.add((user, author))
+    Follow.objects.bulk_create(
+        [Follow(user_id=user, author_id=author) for user, author in follows],
+    )
+
+    for follow in Follow.objects.filter(user_id__in=users).iterator():
+        timeline.backfill(follow)
+    counters.rebuild()
+    index.rebuild(Post, Comment)
+    return {
+        'users': len(users),
+        'groups': len(groups),
+        'posts': len(posts),
+        'comments': comments,
+        'follows': len(follows),
+    }
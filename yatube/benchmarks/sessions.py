@@ -0,0 +1,56 @@
+"""Обращения к таблице сессий на просмотр страницы.
+
+Авторизованный читатель открывает главную, группу, профиль, пост и
+ленту подписок. Для каждого хранилища – стандартного из Django и с
+ленивым сохранением из core.sessions – считаются чтения и записи
+django_session на один просмотр. С save_every_request сессия
+сохраняется на каждый запрос (SESSION_SAVE_EVERY_REQUEST, скользящий
+срок жизни), так видно записи, которые отсекает ленивое сохранение.
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from core.sessions.config import ENGINES
+
+from .runner import Scenarios, without_rate_limits
+
+PAGES = ('index', 'group_posts', 'profile', 'post_detail', 'follow_index')
+DJANGO_ENGINES = 'django.contrib.sessions.backends.'
+
+
+def variants():
+    for name, engine in ENGINES.items():
+        yield name, DJANGO_ENGINES + name
+        yield f'{name} lazy', engine
+
+
+def measure(engine, rounds, save_every_request):
+    with override_settings(SESSION_ENGINE=engine,
+                           SESSION_SAVE_EVERY_REQUEST=save_every_request):
+        scenarios = Scenarios()
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(rounds):
+                for page in PAGES:
+                    getattr(scenarios, page)()
+    reads = writes = 0
+    for query in queries.captured_queries:
+        if 'django_session' not in query['sql']:
+            continue
+        if query['sql'].startswith('SELECT'):
+            reads += 1
+        else:
+            writes += 1
+    views = rounds * len(PAGES)
+    return {
+        'reads': round(reads / views, 2),
+        'writes': round(writes / views, 2),
+    }
+
+
+def run(rounds=20, save_every_request=False):
+    """Чтений и записей сессий на просмотр по хранилищам."""
+    with without_rate_limits():
+        return {
+            name: measure(engine, rounds, save_every_request)
+            for name, engine in variants()
+        }
@@ -0,0 +1,143 @@
+from django.conf import settings
+from django.db.models import Count
+from django.template import Context
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import resolve
+
+from posts.models import Comment, Follow, Post, TimelineEntry, User
+
+from . import concurrency, rendering, runner, sessions
+from .seed import SeedOptions, seed
+
+
+class SeedTests(TestCase):
+    """Проверка генератора синтетических данных"""
+
+    def test_seed_creates_consistent_data(self):
+        """Генератор создает записи и строит по ним ленты и счетчики,
+        подписчики распределены неравномерно"""
+
+        counts = seed(SeedOptions(users=30, posts=60, groups=3))
+
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Post.objects.count(), 60)
+        self.assertEqual(Comment.objects.count(), counts['comments'])
+        self.assertEqual(Follow.objects.count(), counts['follows'])
+        self.assertTrue(TimelineEntry.objects.exists())
+        followers = sorted(
+            User.objects.annotate(total=Count('following'))
+            .values_list('total', flat=True)
+        )
+        self.assertGreater(followers[-1], 3 * followers[len(followers) // 2])
+        post = Post.objects.order_by('-comment_count').first()
+        self.assertEqual(post.comment_count, post.comment.count())
+
+
+class RunnerTests(TestCase):
+    """Проверка замеров и сравнения с базовой линией"""
+
+    def test_run_reports_every_scenario(self):
+        """Для каждого сценария считаются перцентили, запросы и память"""
+
+        seed(SeedOptions(users=10, posts=20, groups=2))
+
+        results = runner.run(iterations=2)
+
+        self.assertEqual(set(results), set(runner.Scenarios().names()))
+        for row in results.values():
+            self.assertGreater(row['queries'], 0)
+            self.assertLessEqual(row['p50_ms'], row['p99_ms'])
+
+    def test_warm_run_is_not_rate_limited(self):
+        """С теплым кэшем ведра не сбрасываются, но повторы записи
+        сверх их емкости не получают 429"""
+
+        seed(SeedOptions(users=10, posts=20, groups=2))
+        capacity = settings.RATE_LIMITS['comment']['user'][0]
+
+        results = runner.run(
+            iterations=capacity + 1, warm=True, only=['add_comment']
+        )
+
+        self.assertEqual(list(results), ['add_comment'])
+
+    def test_compare_finds_regressions(self):
+        """Рост числа запросов и p95 сверх допуска – регрессия"""
+
+        baseline = {'index': {'queries': 3, 'p95_ms': 10.0}}
+
+        self.assertEqual(runner.compare(
+            {'index': {'queries': 3, 'p95_ms': 11.0}}, baseline, 0.25
+        ), [])
+        self.assertEqual(len(runner.compare(
+            {'index': {'queries': 4, 'p95_ms': 20.0}}, baseline, 0.25
+        )), 2)
+
+
+class ConcurrencyTests(TransactionTestCase):
+    """Проверка сравнения путей WSGI и ASGI"""
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    }})
+    def test_both_paths_are_measured(self):
+        """Оба пути отвечают без ошибок и дают показатели"""
+
+        seed(SeedOptions(users=10, posts=20, groups=2))
+
+        results = concurrency.run(
+            requests=8, concurrency=4, wsgi_threads=2, asgi_threads=2,
+            db_latency=0.001,
+        )
+
+        self.assertEqual(set(results), {'wsgi', 'asgi'})
+        for row in results.values():
+            self.assertEqual(row['errors'], 0)
+            self.assertGreater(row['rps'], 0)
+            self.assertLessEqual(row['p50_ms'], row['p99_ms'])
+
+
+class RenderingTests(SimpleTestCase):
+    """Проверка замера рендеринга карточек"""
+
+    def test_cards_match_legacy_markup(self):
+        """post_cards выводит ту же разметку, что прежний include"""
+
+        page = rendering.posts(3)
+        html = {}
+        for name, code in (('before', rendering.BEFORE),
+                           ('cards', rendering.CARDS)):
+            template = rendering.engine(cached=True).from_string(code)
+            request = RequestFactory().get('/')
+            request.resolver_match = resolve('/')
+            html[name] = ' '.join(template.render(
+                Context({'page_obj': page, 'request': request})
+            ).split())
+        self.assertEqual(html['cards'], html['before'])
+
+    def test_run_reports_every_variant(self):
+        results = rendering.run(sizes=(2,), repeat=1)
+        self.assertEqual(set(results[2]), {'before', 'cached', 'cards'})
+
+
+class SessionTests(TestCase):
+    """Проверка замера обращений к сессиям"""
+
+    def test_lazy_stores_do_not_write(self):
+        """При сохранении на каждый запрос стандартные хранилища пишут
+        в базу, ленивые – нет; cached_db не читает базу"""
+
+        seed(SeedOptions(users=10, posts=20, groups=2))
+
+        results = sessions.run(rounds=1, save_every_request=True)
+
+        self.assertEqual(results['db']['writes'], 1)
+        self.assertEqual(results['db lazy']['writes'], 0)
+        self.assertEqual(results['cached_db lazy'],
+                         {'reads': 0, 'writes': 0})
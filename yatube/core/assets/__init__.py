@@ -0,0 +1,8 @@
+"""Статические файлы в боевом режиме.
+
+collectstatic через CompressedManifestStorage добавляет к именам хэш
+содержимого и заранее сжимает текстовые файлы в .gz и .br. StaticFiles
+отдает STATIC_ROOT прямо из WSGI, до Django: выбирает сжатый вариант
+по Accept-Encoding, а файлы с хэшем в имени помечает неизменяемыми на
+год – браузер больше не запрашивает их вовсе.
+"""
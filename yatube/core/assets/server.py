@@ -0,0 +1,151 @@
+import json
+import mimetypes
+import os
+from dataclasses import dataclass, field
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+from django.utils.http import http_date
+
+# Кэширование файлов с хэшем в имени (их содержимое не меняется) и
+# остальных (favicon.ico, файлы без хэша – через ETag).
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'public, max-age=60'
+# Кодировки в порядке предпочтения и суффиксы их файлов.
+ENCODINGS = (('br', 'br'), ('gzip', 'gz'))
+MANIFEST = 'staticfiles.json'
+BLOCK_SIZE = 64 * 1024
+
+
+@dataclass
+class Variant:
+    path: str
+    size: int
+    etag: str
+
+
+@dataclass
+class Asset:
+    content_type: str
+    last_modified: str
+    cache_control: str
+    variants: dict = field(default_factory=dict)
+
+    def choose(self, accept_encoding):
+        """Кодировка и вариант файла для заголовка Accept-Encoding."""
+        accepted = _accepted(accept_encoding)
+        for encoding, _ in ENCODINGS:
+            if encoding in self.variants and (
+                encoding in accepted or '*' in accepted
+            ):
+                return encoding, self.variants[encoding]
+        return None, self.variants[None]
+
+
+def _accepted(header):
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = params.strip().partition('q=')[2]
+        try:
+            refused = quality and float(quality) == 0
+        except ValueError:
+            refused = False
+        if coding and not refused:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _variant(path, suffix=''):
+    stat = os.stat(path)
+    etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}{suffix}"'
+    return Variant(path, stat.st_size, etag)
+
+
+def scan(root, prefix):
+    """Файлы STATIC_ROOT по адресам; сжатые копии – варианты файла."""
+    immutable = set()
+    try:
+        with open(os.path.join(root, MANIFEST)) as file:
+            immutable = set(json.load(file)['paths'].values())
+    except (OSError, ValueError, KeyError):
+        pass
+    suffixes = tuple(f'.{suffix}' for _, suffix in ENCODINGS)
+    assets = {}
+    for directory, _, files in os.walk(root):
+        for filename in files:
+            path = os.path.join(directory, filename)
+            if filename.endswith(suffixes) and os.path.exists(
+                path.rsplit('.', 1)[0]
+            ):
+                continue
+            name = os.path.relpath(path, root).replace(os.sep, '/')
+            content_type, _ = mimetypes.guess_type(name)
+            asset = Asset(
+                content_type=content_type or 'application/octet-stream',
+                last_modified=http_date(os.stat(path).st_mtime),
+                cache_control=(
+                    IMMUTABLE if name in immutable else REVALIDATE
+                ),
+            )
+            asset.variants[None] = _variant(path)
+            for encoding, suffix in ENCODINGS:
+                if os.path.exists(f'{path}.{suffix}'):
+                    asset.variants[encoding] = _variant(
+                        f'{path}.{suffix}', f'-{suffix}'
+                    )
+            assets[prefix + name] = asset
+    return assets
+
+
+class StaticFiles:
+    """WSGI-приложение: отдает файлы из root по адресам prefix…, а
+    остальные запросы передает application.
+
+    Список файлов составляется при запуске, поэтому после collectstatic
+    процесс нужно перезапустить.
+    """
+
+    def __init__(self, application, root=None, prefix=None):
+        self.application = application
+        self.assets = scan(
+            root or settings.STATIC_ROOT, prefix or settings.STATIC_URL
+        )
+
+    def __call__(self, environ, start_response):
+        method = environ['REQUEST_METHOD']
+        asset = self.assets.get(environ.get('PATH_INFO', ''))
+        if asset is None or method not in ('GET', 'HEAD'):
+            return self.application(environ, start_response)
+        encoding, variant = asset.choose(
+            environ.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        headers = [
+            ('Cache-Control', asset.cache_control),
+            ('ETag', variant.etag),
+            ('Last-Modified', asset.last_modified),
+        ]
+        if len(asset.variants) > 1:
+            headers.append(('Vary', 'Accept-Encoding'))
+        if variant.etag in environ.get('HTTP_IF_NONE_MATCH', ''):
+            start_response('304 Not Modified', headers)
+            return []
+        headers += [
+            ('Content-Type', asset.content_type),
+            ('Content-Length', str(variant.size)),
+        ]
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        start_response('200 OK', headers)
+        if method == 'HEAD':
+            return []
+        file_wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        return file_wrapper(open(variant.path, 'rb'), BLOCK_SIZE)
+
+
+def static_application(application):
+    """Оборачивает application в StaticFiles в боевом режиме, если
+    collectstatic уже собрал STATIC_ROOT."""
+    if settings.DEBUG or not os.path.isdir(settings.STATIC_ROOT or ''):
+        return application
+    return StaticFiles(application)
@@ -0,0 +1,59 @@
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = (
+    '.css', '.js', '.map', '.svg', '.ico', '.json', '.txt', '.xml', '.html',
+)
+# Мельче этого сжатие не окупает лишний заголовок и разбор.
+MIN_SIZE = 512
+# Сжатый вариант сохраняется, только если он заметно меньше.
+MAX_RATIO = 0.95
+
+
+def compressors():
+    """Кодировки и функции сжатия: gzip всегда, brotli – если
+    установлен пакет brotli."""
+    result = {'gz': lambda data: gzip.compress(data, 9, mtime=0)}
+    if brotli is not None:
+        result['br'] = lambda data: brotli.compress(data, quality=11)
+    return result
+
+
+class CompressedManifestStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage, который после расстановки хэшей
+    сохраняет рядом с файлами их сжатые копии name.gz и name.br."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if not name.endswith(COMPRESSIBLE):
+                continue
+            for suffix in self.compress(name):
+                yield name, f'{name}.{suffix}', True
+
+    def compress(self, name):
+        with self.open(name) as file:
+            data = file.read()
+        if len(data) < MIN_SIZE:
+            return []
+        written = []
+        for suffix, compress in compressors().items():
+            compressed = compress(data)
+            if len(compressed) > len(data) * MAX_RATIO:
+                continue
+            variant = f'{name}.{suffix}'
+            if self.exists(variant):
+                self.delete(variant)
+            self._save(variant, ContentFile(compressed))
+            written.append(suffix)
+        return written
@@ -0,0 +1,404 @@
+"""Бэкенды общего для всех воркеров кэша.
+
+SQLiteCache – кэш в отдельном файле SQLite для одной машины,
+RedisCache и PyLibMCCache – для продакшена. Крупные значения
+(отрендеренные фрагменты, страницы лент) сжимаются перед записью.
+"""
+import pickle
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.filebased import (
+    FileBasedCache as DjangoFileBasedCache,
+)
+from django.core.cache.backends.locmem import LocMemCache as DjangoLocMemCache
+from django.core.cache.backends.memcached import (
+    PyLibMCCache as DjangoPyLibMCCache,
+)
+from django.core.exceptions import ImproperlyConfigured
+
+from core.metrics import recorder
+
+PICKLE_PROTOCOL = pickle.HIGHEST_PROTOCOL
+_MISSING = object()
+
+
+class Compressed:
+    """Сжатое значение кэша."""
+
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data
+
+    def __getstate__(self):
+        return self.data
+
+    def __setstate__(self, state):
+        self.data = state
+
+
+class CompressionMixin:
+    """Сжимает значения, сериализованный размер которых не меньше
+    COMPRESS_MIN_LENGTH байт."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        params = args[-1]
+        self._compress_min_length = params.get('COMPRESS_MIN_LENGTH', 1024)
+
+    def _encode(self, value):
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        data = pickle.dumps(value, PICKLE_PROTOCOL)
+        if len(data) < self._compress_min_length:
+            return value
+        return Compressed(zlib.compress(data))
+
+    def _decode(self, value):
+        if isinstance(value, Compressed):
+            return pickle.loads(zlib.decompress(value.data))
+        return value
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return super().add(key, self._encode(value), timeout, version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return super().set(key, self._encode(value), timeout, version)
+
+    def get(self, key, default=None, version=None):
+        return self._decode(super().get(key, default, version))
+
+    def get_many(self, keys, version=None):
+        return {
+            key: self._decode(value)
+            for key, value in super().get_many(keys, version).items()
+        }
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        data = {key: self._encode(value) for key, value in data.items()}
+        return super().set_many(data, timeout, version)
+
+
+class MetricsMixin:
+    """Учитывает попадания и промахи в метриках текущего запроса."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Стандартный get_many вызывает get для каждого ключа, и
+        # обращения уже учтены там.
+        self._get_many_counted = (
+            getattr(super().get_many, '__func__', None)
+            is BaseCache.get_many
+        )
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            recorder.record_cache(0, 1)
+            return default
+        recorder.record_cache(1, 0)
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version)
+        if not self._get_many_counted:
+            recorder.record_cache(len(found), len(keys) - len(found))
+        return found
+
+
+class SQLiteStore(BaseCache):
+    """Кэш в файле SQLite, общий для процессов одной машины.
+
+    Каждый поток держит свое постоянное соединение; журнал WAL
+    позволяет читать, пока другой процесс пишет.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+
+    @property
+    def _db(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self._path, timeout=5, isolation_level=None
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)'
+            )
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS cache_expires ON cache(expires)'
+            )
+            self._local.connection = connection
+        return connection
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _dumps(self, value):
+        return pickle.dumps(value, PICKLE_PROTOCOL)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        cursor = self._db.execute(
+            'INSERT INTO cache (key, value, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET '
+            'value = excluded.value, expires = excluded.expires '
+            'WHERE cache.expires IS NOT NULL AND cache.expires <= ?',
+            (self._key(key, version), self._dumps(value),
+             self.get_backend_timeout(timeout), time.time()),
+        )
+        return cursor.rowcount > 0
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        if not keys:
+            return {}
+        rows = self._db.execute(
+            'SELECT key, value FROM cache WHERE key IN (%s) '
+            'AND (expires IS NULL OR expires > ?)'
+            % ', '.join('?' * len(keys)),
+            (*keys, time.time()),
+        )
+        return {keys[key]: pickle.loads(value) for key, value in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        rows = [
+            (self._key(key, version), self._dumps(value), expires)
+            for key, value in data.items()
+        ]
+        with self._transaction() as db:
+            db.executemany(
+                'INSERT OR REPLACE INTO cache (key, value, expires) '
+                'VALUES (?, ?, ?)', rows
+            )
+        if random.randrange(self._cull_frequency * 100) == 0:
+            self._cull()
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        cursor = self._db.execute(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), self._key(key, version),
+             time.time()),
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, key, version=None):
+        self._db.execute(
+            'DELETE FROM cache WHERE key = ?', (self._key(key, version),)
+        )
+
+    def has_key(self, key, version=None):
+        return key in self.get_many([key], version)
+
+    def incr(self, key, delta=1, version=None):
+        db_key = self._key(key, version)
+        with self._transaction() as db:
+            row = db.execute(
+                'SELECT value FROM cache WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                (db_key, time.time()),
+            ).fetchone()
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            value = pickle.loads(row[0]) + delta
+            db.execute(
+                'UPDATE cache SET value = ? WHERE key = ?',
+                (self._dumps(value), db_key),
+            )
+        return value
+
+    def clear(self):
+        self._db.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Соединение живет вместе с потоком и переиспользуется между
+        # запросами.
+        pass
+
+    @contextmanager
+    def _transaction(self):
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    def _cull(self):
+        db = self._db
+        db.execute(
+            'DELETE FROM cache WHERE expires <= ?', (time.time(),)
+        )
+        count = db.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        if count > self._max_entries:
+            db.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                'ORDER BY expires LIMIT ?)',
+                (count // self._cull_frequency,),
+            )
+
+
+class RedisStore(BaseCache):
+    """Кэш в Redis. Пул соединений общий для всех потоков процесса;
+    целые числа хранятся как есть, чтобы incr был атомарным."""
+
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured(
+                'Для кэша в Redis установите пакет redis'
+            )
+        self._redis = redis
+        self._url = server
+        self._pool_options = params.get('OPTIONS', {})
+
+    @property
+    def _client(self):
+        with self._pools_lock:
+            pool = self._pools.get(self._url)
+            if pool is None:
+                pool = self._redis.ConnectionPool.from_url(
+                    self._url, **self._pool_options
+                )
+                self._pools[self._url] = pool
+        return self._redis.Redis(connection_pool=pool)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _ttl(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return None
+        return max(int(timeout * 1000), 1)
+
+    @staticmethod
+    def _dumps(value):
+        if isinstance(value, int) and not isinstance(value, bool):
+            return str(value).encode()
+        return pickle.dumps(value, PICKLE_PROTOCOL)
+
+    @staticmethod
+    def _loads(raw):
+        try:
+            return int(raw)
+        except ValueError:
+            return pickle.loads(raw)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return bool(self._client.set(
+            self._key(key, version), self._dumps(value),
+            px=self._ttl(timeout), nx=True,
+        ))
+
+    def get(self, key, default=None, version=None):
+        raw = self._client.get(self._key(key, version))
+        return default if raw is None else self._loads(raw)
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = self._client.mget([self._key(key, version) for key in keys])
+        return {
+            key: self._loads(raw)
+            for key, raw in zip(keys, values) if raw is not None
+        }
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        ttl = self._ttl(timeout)
+        pipeline = self._client.pipeline(transaction=False)
+        for key, value in data.items():
+            pipeline.set(self._key(key, version), self._dumps(value), px=ttl)
+        pipeline.execute()
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        ttl = self._ttl(timeout)
+        if ttl is None:
+            return bool(self._client.persist(key))
+        return bool(self._client.pexpire(key, ttl))
+
+    def delete(self, key, version=None):
+        self._client.delete(self._key(key, version))
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        if keys:
+            self._client.delete(*keys)
+
+    def has_key(self, key, version=None):
+        return bool(self._client.exists(self._key(key, version)))
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        pipeline = self._client.pipeline()
+        pipeline.exists(key)
+        pipeline.incrby(key, delta)
+        exists, value = pipeline.execute()
+        if not exists:
+            self._client.delete(key)
+            raise ValueError("Key '%s' not found" % key)
+        return value
+
+    def clear(self):
+        client = self._client
+        for key in client.scan_iter(match=self.make_key('*')):
+            client.delete(key)
+
+
+class LocMemCache(MetricsMixin, DjangoLocMemCache):
+    pass
+
+
+class FileBasedCache(MetricsMixin, DjangoFileBasedCache):
+    pass
+
+
+class SQLiteCache(MetricsMixin, CompressionMixin, SQLiteStore):
+    pass
+
+
+class RedisCache(MetricsMixin, CompressionMixin, RedisStore):
+    pass
+
+
+class PyLibMCCache(MetricsMixin, CompressionMixin, DjangoPyLibMCCache):
+    pass
@@ -0,0 +1,38 @@
+from urllib.parse import urlsplit
+
+BACKENDS = {
+    'locmem': 'core.caching.backends.LocMemCache',
+    'file': 'core.caching.backends.FileBasedCache',
+    'sqlite': 'core.caching.backends.SQLiteCache',
+    'redis': 'core.caching.backends.RedisCache',
+    'rediss': 'core.caching.backends.RedisCache',
+    'memcached': 'core.caching.backends.PyLibMCCache',
+}
+
+
+def cache_from_url(url):
+    """Настройки кэша по адресу вида:
+
+    locmem://                      – память процесса (разработка, тесты)
+    file:///var/tmp/yatube         – каталог, общий для воркеров
+    sqlite:///var/tmp/yatube.db    – файл SQLite, общий для воркеров
+    sqlite://cache/yatube.db       – путь относительно текущего каталога
+    redis://localhost:6379/0       – Redis
+    memcached://host1:11211,host2:11211
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in BACKENDS:
+        raise ValueError(f'Неизвестный тип кэша: {url}')
+    config = {'BACKEND': BACKENDS[parts.scheme]}
+    if parts.scheme in ('file', 'sqlite'):
+        # У относительного пути первая часть попадает в netloc.
+        config['LOCATION'] = parts.netloc + parts.path
+        if not config['LOCATION']:
+            raise ValueError(f'Не указан путь кэша: {url}')
+    elif parts.scheme in ('redis', 'rediss'):
+        config['LOCATION'] = url
+        config['OPTIONS'] = {'max_connections': 50}
+    elif parts.scheme == 'memcached':
+        config['LOCATION'] = parts.netloc.split(',')
+        config['OPTIONS'] = {'binary': True}
+    return config
@@ -0,0 +1,56 @@
+"""Защита от одновременного пересчета одного значения многими воркерами.
+
+Значение хранится вместе со сроком свежести, а сама запись живет в
+кэше дольше на STALE_GRACE секунд. Когда срок свежести истек, значение
+пересчитывает только тот, кто взял блокировку, остальные отдают
+устаревшую копию. Если копии нет совсем, остальные недолго ждут
+результата того, кто считает. Если он упал и снял блокировку без
+значения (или блокировка истекла), ожидающие сразу перестают ждать и
+считают сами.
+"""
+import time
+
+from django.core.cache import cache as default_cache
+
+STALE_GRACE = 60
+LOCK_TIMEOUT = 10
+WAIT_STEP = 0.05
+
+
+def _lock_key(key):
+    return f'{key}:lock'
+
+
+def _wait(cache, key, lock_key, lock_timeout):
+    """Ждет значения, пока блокировка на месте; None – если ее сняли
+    без значения."""
+    deadline = time.time() + lock_timeout
+    while time.time() < deadline:
+        time.sleep(WAIT_STEP)
+        found = cache.get_many([key, lock_key])
+        if key in found:
+            return found[key]
+        if lock_key not in found:
+            return None
+    return None
+
+
+def get_or_set_stale(key, build, timeout, cache=default_cache,
+                     grace=STALE_GRACE, lock_timeout=LOCK_TIMEOUT):
+    entry = cache.get(key)
+    if entry is not None and entry[1] > time.time():
+        return entry[0]
+    lock_key = _lock_key(key)
+    locked = cache.add(lock_key, True, lock_timeout)
+    if not locked:
+        if entry is None:
+            entry = _wait(cache, key, lock_key, lock_timeout)
+        if entry is not None:
+            return entry[0]
+    try:
+        value = build()
+        cache.set(key, (value, time.time() + timeout), timeout + grace)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return value
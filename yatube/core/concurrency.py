@@ -0,0 +1,86 @@
+"""Одновременное выполнение независимых запросов к базе.
+
+Представление, которому нужны несколько не связанных между собой
+выборок (страница постов, список групп, проверка подписки), отдает их
+в gather(): первая выполняется в текущем потоке, остальные – в пуле
+QUERY_THREADS потоков со своими соединениями. Время ответа тогда
+определяет самый медленный запрос, а не их сумма.
+"""
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+from .metrics import recorder
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            _slots = threading.BoundedSemaphore(settings.QUERY_THREADS)
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.QUERY_THREADS,
+                thread_name_prefix='queries',
+            )
+    return _executor
+
+
+def _in_transaction():
+    return any(connection.in_atomic_block for connection in connections.all())
+
+
+def _task(func):
+    """Выполняет func в потоке пула; запросы попадают в показатели
+    запроса, от которого пришла задача."""
+    try:
+        with ExitStack() as stack:
+            if recorder.active():
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(recorder.record_query)
+                    )
+            return func()
+    finally:
+        close_old_connections()
+        _slots.release()
+
+
+def gather(*funcs):
+    """Выполняет функции одновременно и возвращает их результаты по
+    порядку; исключение первой упавшей функции пробрасывается.
+
+    Функция уходит в пул, только если в нем есть свободный поток:
+    под нагрузкой ожидание в очереди пула съело бы весь выигрыш, и
+    такие функции выполняются в текущем потоке. Внутри транзакции все
+    функции выполняются по очереди: в другом потоке было бы другое
+    соединение, не видящее незафиксированных изменений. Так же при
+    QUERY_THREADS = 0.
+    """
+    if len(funcs) < 2 or not settings.QUERY_THREADS or _in_transaction():
+        return [func() for func in funcs]
+    executor = _get_executor()
+    pending = []
+    for func in funcs[1:]:
+        if _slots.acquire(blocking=False):
+            pending.append(executor.submit(
+                contextvars.copy_context().run, _task, func
+            ))
+        else:
+            pending.append(func)
+    try:
+        first = funcs[0]()
+        rest = [
+            item() if callable(item) else item.result() for item in pending
+        ]
+    except BaseException:
+        wait([item for item in pending if not callable(item)])
+        raise
+    return [first] + rest
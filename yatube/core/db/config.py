@@ -0,0 +1,46 @@
+# Журнал WAL: читатели не ждут пишущую транзакцию и видят последнее
+# зафиксированное состояние. С WAL достаточно synchronous=NORMAL: после
+# сбоя питания теряется только последняя транзакция, но база остается
+# целой. Остальное – кэш страниц, отображение файла в память и
+# временные таблицы в памяти.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+def sqlite_database(name, conn_max_age=600, pragmas=None,
+                    transaction_mode='IMMEDIATE'):
+    """Настройки базы SQLite для core.db.sqlite.
+
+    conn_max_age – сколько секунд соединение переиспользуется между
+    запросами (0 – закрывать после каждого запроса), pragmas дополняют
+    и переопределяют SQLITE_PRAGMAS.
+    """
+    pragmas = {**SQLITE_PRAGMAS, **(pragmas or {})}
+    return {
+        'ENGINE': 'core.db.sqlite',
+        'NAME': name,
+        'CONN_MAX_AGE': conn_max_age,
+        'OPTIONS': {
+            # Ожидание занятой базы в модуле sqlite3, в секундах.
+            'timeout': pragmas['busy_timeout'] / 1000,
+            'pragmas': pragmas,
+            'transaction_mode': transaction_mode,
+        },
+    }
+
+
+def sqlite_replicas(paths, conn_max_age=600):
+    """Настройки реплик replica1, replica2, ... по путям к файлам.
+    В тестах реплики указывают на тестовую основную базу."""
+    replicas = {}
+    for number, path in enumerate(paths, 1):
+        config = sqlite_database(path, conn_max_age)
+        config['TEST'] = {'MIRROR': 'default'}
+        replicas[f'replica{number}'] = config
+    return replicas
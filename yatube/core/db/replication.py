@@ -0,0 +1,48 @@
+"""Имитация репликации SQLite для локальной проверки реплик.
+
+Снимок основной базы копируется на реплики через backup API с
+задержкой, поэтому реплики отстают так же, как при настоящей
+асинхронной репликации.
+"""
+import sqlite3
+import time
+
+from django.db import connections
+
+
+def _raw(alias):
+    connection = connections[alias]
+    connection.ensure_connection()
+    return connection.connection
+
+
+def snapshot(source='default'):
+    """Копия базы source в памяти."""
+    copy = sqlite3.connect(':memory:', check_same_thread=False)
+    _raw(source).backup(copy)
+    return copy
+
+
+def apply(copy, replicas):
+    for alias in replicas:
+        copy.backup(_raw(alias))
+
+
+def copy(source, replicas):
+    """Сразу переносит состояние source на реплики."""
+    data = snapshot(source)
+    try:
+        apply(data, replicas)
+    finally:
+        data.close()
+
+
+def replicate_forever(source, replicas, lag, interval):
+    """Каждые interval секунд переносит на реплики снимок source,
+    снятый lag секунд назад."""
+    while True:
+        data = snapshot(source)
+        time.sleep(lag)
+        apply(data, replicas)
+        data.close()
+        time.sleep(interval)
@@ -0,0 +1,106 @@
+"""Чтение с реплик с прилипанием к основной базе после записи.
+
+Представления, помеченные read_replica, читают с одной из реплик
+REPLICA_DATABASES, выбранной на весь запрос. Все записи идут в
+основную базу. Если запрос что-то записал, ReplicaPinMiddleware
+ставит cookie, и следующие REPLICA_PIN_SECONDS секунд все запросы
+пользователя читают из основной базы: свой пост или комментарий он
+видит сразу, даже если реплика еще отстает.
+
+Вне запроса (команды, фоновые задачи, тесты) чтение всегда идет
+из основной базы.
+"""
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+PIN_COOKIE = 'db_primary_until'
+# Сессии пишутся при входе и изменении данных и должны читаться свежими.
+PRIMARY_APPS = {'sessions'}
+
+_replica = ContextVar('db_replica', default=None)
+_writes = ContextVar('db_writes', default=None)
+
+
+def current_database():
+    """Псевдоним базы, с которой сейчас читают представления."""
+    return _replica.get() or 'default'
+
+
+def is_pinned(request):
+    try:
+        until = float(request.COOKIES.get(PIN_COOKIE, 0))
+    except ValueError:
+        return False
+    return until > time.time()
+
+
+def read_replica(view):
+    """Выполняет GET- и HEAD-запросы к представлению на реплике."""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        replicas = settings.REPLICA_DATABASES
+        if (not replicas or request.method not in ('GET', 'HEAD')
+                or is_pinned(request)):
+            return view(request, *args, **kwargs)
+        token = _replica.set(random.choice(replicas))
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _replica.reset(token)
+
+    return wrapper
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_APPS:
+            return None
+        return _replica.get()
+
+    def db_for_write(self, model, **hints):
+        writes = _writes.get()
+        if writes is not None and model._meta.app_label not in PRIMARY_APPS:
+            writes.append(model._meta.label)
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.REPLICA_DATABASES}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Схема и данные попадают на реплики вместе с репликацией.
+        if db in settings.REPLICA_DATABASES:
+            return False
+        return None
+
+
+class ReplicaPinMiddleware:
+    """Запоминает в cookie, что пользователь только что писал в базу."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        writes = []
+        token = _writes.set(writes)
+        try:
+            response = self.get_response(request)
+        finally:
+            _writes.reset(token)
+        if writes and settings.REPLICA_DATABASES:
+            response.set_cookie(
+                PIN_COOKIE,
+                str(time.time() + settings.REPLICA_PIN_SECONDS),
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -0,0 +1,30 @@
+"""SQLite с настройками соединения для боевой нагрузки.
+
+Поверх стандартного движка каждое новое соединение получает PRAGMA из
+OPTIONS['pragmas'], а транзакции transaction.atomic открываются как
+BEGIN <OPTIONS['transaction_mode']>. С BEGIN IMMEDIATE пишущая
+транзакция сразу берет блокировку записи и при занятой базе ждет
+busy_timeout, вместо того чтобы упасть с «database is locked» при
+попытке повысить блокировку чтения.
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        params.pop('transaction_mode', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        pragmas = self.settings_dict['OPTIONS'].get('pragmas', {})
+        for name, value in pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}').fetchall()
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode')
+        self.cursor().execute(f'BEGIN {mode}' if mode else 'BEGIN')
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.db import replication
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite на реплики REPLICA_DATABASES '
+            'с заданной задержкой, имитируя асинхронную репликацию')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lag', type=float, default=2,
+            help='На сколько секунд реплики отстают от основной базы',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1,
+            help='Пауза между копированиями, в секундах',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Скопировать один раз без задержки и выйти',
+        )
+
+    def handle(self, *args, **options):
+        replicas = settings.REPLICA_DATABASES
+        if not replicas:
+            raise CommandError('Реплики не настроены: YATUBE_DB_REPLICAS')
+        if options['once']:
+            replication.copy('default', replicas)
+            return
+        try:
+            replication.replicate_forever(
+                'default', replicas, options['lag'], options['interval']
+            )
+        except KeyboardInterrupt:
+            pass
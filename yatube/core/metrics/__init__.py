@@ -0,0 +1,2 @@
+"""Метрики запросов: число и время SQL-запросов, попадания в кэш и
+время рендеринга шаблонов по каждому представлению."""
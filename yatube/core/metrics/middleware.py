@@ -0,0 +1,59 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import recorder, registry
+
+logger = logging.getLogger('core.metrics')
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class MetricsMiddleware:
+    """Считает SQL-запросы, время БД, обращения к кэшу и время
+    рендеринга каждого запроса и копит их по имени представления.
+
+    QUERY_BUDGETS задает наибольшее число SQL-запросов для
+    представления; превышение пишется в лог, а при
+    QUERY_BUDGET_MODE = 'raise' (в тестах) поднимает исключение.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats, token = recorder.start()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(recorder.record_query)
+                    )
+                response = self.get_response(request)
+        finally:
+            recorder.stop(token)
+        duration = time.perf_counter() - started
+
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        registry.observe(view, stats, duration)
+        self.check_budget(view, stats)
+        return response
+
+    @staticmethod
+    def check_budget(view, stats):
+        budget = settings.QUERY_BUDGETS.get(view)
+        if budget is None or stats.queries <= budget:
+            return
+        registry.BUDGET_EXCEEDED.inc((view,))
+        message = (f'{view}: {stats.queries} SQL-запросов '
+                   f'при бюджете {budget}')
+        if settings.QUERY_BUDGET_MODE == 'raise':
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -0,0 +1,61 @@
+"""Сбор показателей текущего запроса.
+
+Показатели копятся в объекте RequestStats, привязанном к контексту
+выполнения; вне запроса (фоновые пулы, команды) запись пропускается.
+"""
+import time
+from contextvars import ContextVar
+
+_current = ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_time', 'cache_hits', 'cache_misses',
+                 'render_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.render_time = 0.0
+
+
+def start():
+    """Начинает сбор; возвращает статистику и токен для stop()."""
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def active():
+    return _current.get() is not None
+
+
+def record_query(execute, sql, params, many, context):
+    """Обертка для connection.execute_wrapper()."""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - started
+
+
+def record_cache(hits, misses):
+    stats = _current.get()
+    if stats is not None:
+        stats.cache_hits += hits
+        stats.cache_misses += misses
+
+
+def record_render(seconds):
+    stats = _current.get()
+    if stats is not None:
+        stats.render_time += seconds
@@ -0,0 +1,166 @@
+"""Гистограммы и счетчики в памяти процесса и их вывод в текстовом
+формате Prometheus."""
+import threading
+from bisect import bisect_left
+
+TIME_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'),
+        )
+        for name, value in zip(names, values)
+    )
+    return '{%s}' % pairs
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def header(self):
+        return [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels=()):
+        return self._values.get(labels, 0)
+
+    def render(self):
+        lines = self.header()
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            lines.append(
+                f'{self.name}{_labels(self.labelnames, labels)} '
+                f'{_number(value)}'
+            )
+        return lines
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=TIME_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (float('inf'),)
+
+    def observe(self, value, labels=()):
+        with self._lock:
+            counts, total = self._values.get(
+                labels, ([0] * len(self.buckets), 0)
+            )
+            counts[bisect_left(self.buckets, value)] += 1
+            self._values[labels] = (counts, total + value)
+
+    def count(self, labels=()):
+        counts, _ = self._values.get(labels, ((), 0))
+        return sum(counts)
+
+    def render(self):
+        lines = self.header()
+        with self._lock:
+            values = sorted(
+                (labels, (list(counts), total))
+                for labels, (counts, total) in self._values.items()
+            )
+        names = self.labelnames + ('le',)
+        for labels, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(
+                    f'{self.name}_bucket'
+                    f'{_labels(names, labels + (_number(bound),))} '
+                    f'{cumulative}'
+                )
+            suffix = _labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{suffix} {_number(total)}')
+            lines.append(f'{self.name}_count{suffix} {cumulative}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+REQUEST_DURATION = REGISTRY.register(Histogram(
+    'yatube_request_duration_seconds',
+    'Время обработки запроса.', ['view'],
+))
+REQUEST_QUERIES = REGISTRY.register(Histogram(
+    'yatube_request_queries',
+    'Число SQL-запросов на запрос.', ['view'], COUNT_BUCKETS,
+))
+REQUEST_DB_TIME = REGISTRY.register(Histogram(
+    'yatube_request_db_seconds',
+    'Время выполнения SQL-запросов на запрос.', ['view'],
+))
+REQUEST_RENDER_TIME = REGISTRY.register(Histogram(
+    'yatube_request_render_seconds',
+    'Время рендеринга шаблонов на запрос.', ['view'],
+))
+CACHE_HITS = REGISTRY.register(Counter(
+    'yatube_cache_hits_total', 'Попадания в кэш.', ['view'],
+))
+CACHE_MISSES = REGISTRY.register(Counter(
+    'yatube_cache_misses_total', 'Промахи кэша.', ['view'],
+))
+BUDGET_EXCEEDED = REGISTRY.register(Counter(
+    'yatube_query_budget_exceeded_total',
+    'Запросы, превысившие бюджет SQL-запросов.', ['view'],
+))
+
+
+def observe(view, stats, duration):
+    labels = (view,)
+    REQUEST_DURATION.observe(duration, labels)
+    REQUEST_QUERIES.observe(stats.queries, labels)
+    REQUEST_DB_TIME.observe(stats.db_time, labels)
+    REQUEST_RENDER_TIME.observe(stats.render_time, labels)
+    CACHE_HITS.inc(labels, stats.cache_hits)
+    CACHE_MISSES.inc(labels, stats.cache_misses)
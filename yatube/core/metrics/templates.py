@@ -0,0 +1,31 @@
+"""Бэкенд шаблонов Django, засекающий время рендеринга."""
+import time
+
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates as Base
+from django.template.backends.django import Template as BaseTemplate
+from django.template.backends.django import reraise
+
+from . import recorder
+
+
+class Template(BaseTemplate):
+
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            recorder.record_render(time.perf_counter() - started)
+
+
+class DjangoTemplates(Base):
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
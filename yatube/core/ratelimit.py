@@ -0,0 +1,99 @@
+"""Ограничение частоты записей (token bucket) в общем кэше.
+
+У каждого пользователя и каждого адреса на область (scope) свое ведро
+на capacity токенов, которое пополняется capacity токенами за period
+секунд. Запрос берет токен; если токенов нет, представление не
+вызывается, а клиент получает 429 с Retry-After. Так один клиент не
+может занять блокировку записи SQLite и замедлить чтение остальным.
+
+Ведро хранится двумя ключами: start – момент, с которого оно
+пополняется, и used – число взятых токенов. Токен берется атомарным
+cache.incr(used), поэтому одновременные запросы воркеров не берут
+один токен дважды. Доступно capacity + rate * (now - start) - used
+токенов; у переполненного ведра start сдвигается так, чтобы токенов
+было не больше capacity.
+"""
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .views import too_many_requests
+
+# Ключи ведра живут дольше любого периода: incr не продлевает срок
+# жизни ключа, а истекший ключ означал бы полное ведро.
+BUCKET_TIMEOUT = 60 * 60 * 24
+
+
+def _keys(scope, ident):
+    prefix = f'ratelimit:{scope}:{ident}'
+    return f'{prefix}:start', f'{prefix}:used'
+
+
+def consume(scope, ident, capacity, period, now=None):
+    """Берет токен из ведра; возвращает 0 или через сколько секунд
+    появится следующий токен."""
+    now = time.time() if now is None else now
+    rate = capacity / period
+    start_key, used_key = _keys(scope, ident)
+    cache.add(start_key, now, BUCKET_TIMEOUT)
+    cache.add(used_key, 0, BUCKET_TIMEOUT)
+    try:
+        used = cache.incr(used_key)
+    except ValueError:
+        # Ключ вытеснен между add и incr или кэш не хранит значений
+        # (DummyCache): ограничение не применяется.
+        return 0
+    start = cache.get(start_key, now)
+    refilled = (now - start) * rate
+    if used > capacity + refilled:
+        cache.decr(used_key)
+        return (used - capacity - refilled) / rate
+    if refilled > used - 1:
+        cache.set(start_key, now - (used - 1) / rate, BUCKET_TIMEOUT)
+    return 0
+
+
+def release(scope, ident):
+    """Возвращает взятый токен: запрос отклонило другое ведро."""
+    try:
+        cache.decr(_keys(scope, ident)[1])
+    except ValueError:
+        pass
+
+
+def client_ip(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def rate_limit(scope, methods=('POST',)):
+    """Ограничивает запросы methods к представлению по бюджету
+    RATE_LIMITS[scope] – отдельно для пользователя и адреса."""
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return view(request, *args, **kwargs)
+            budgets = settings.RATE_LIMITS.get(scope, {})
+            idents = []
+            if request.user.is_authenticated:
+                idents.append(('user', f'user:{request.user.pk}'))
+            idents.append(('ip', f'ip:{client_ip(request)}'))
+            taken = []
+            for kind, ident in idents:
+                if kind not in budgets:
+                    continue
+                retry_after = consume(scope, ident, *budgets[kind])
+                if retry_after:
+                    for previous in taken:
+                        release(scope, previous)
+                    return too_many_requests(request, math.ceil(retry_after))
+                taken.append(ident)
+            return view(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
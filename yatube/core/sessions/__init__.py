@@ -0,0 +1,8 @@
+"""Хранилища сессий с ленивым сохранением.
+
+SessionMiddleware сохраняет сессию, если ее пометили измененной, а
+пометку ставит любое присваивание – даже того же значения. Хранилища
+core.sessions помнят, какие данные загружены или уже записаны, и
+пропускают сохранение, если ни данные, ни ключ не изменились.
+Движок выбирается в settings через session_engine().
+"""
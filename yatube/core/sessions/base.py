@@ -0,0 +1,47 @@
+import copy
+
+
+class LazySaveMixin:
+    """Сохраняет сессию, только если с загрузки или прошлой записи
+    изменились ее данные или ключ.
+
+    _stored – ключ и данные в хранилище, _cookie_key – ключ из cookie
+    запроса. Сессия считается измененной, если ее пометили и при этом
+    данные разошлись с хранилищем или клиенту нужна cookie с новым
+    ключом. Срок жизни неизменной сессии не продлевается, даже с
+    SESSION_SAVE_EVERY_REQUEST.
+    """
+
+    _stored = None
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        self._cookie_key = self.session_key
+
+    @property
+    def modified(self):
+        if not self._modified:
+            return False
+        return (self.session_key != self._cookie_key
+                or not self._is_stored())
+
+    @modified.setter
+    def modified(self, value):
+        self._modified = value
+
+    def _is_stored(self):
+        return self._stored == (self.session_key, self._session)
+
+    def _remember(self, data):
+        self._stored = (self.session_key, copy.deepcopy(data))
+
+    def load(self):
+        data = super().load()
+        self._remember(data)
+        return data
+
+    def save(self, must_create=False):
+        if not must_create and self._is_stored():
+            return
+        super().save(must_create)
+        self._remember(self._session)
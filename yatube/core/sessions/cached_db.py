@@ -0,0 +1,7 @@
+from django.contrib.sessions.backends import cached_db
+
+from .base import LazySaveMixin
+
+
+class SessionStore(LazySaveMixin, cached_db.SessionStore):
+    pass
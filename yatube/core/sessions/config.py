@@ -0,0 +1,19 @@
+ENGINES = {
+    'db': 'core.sessions.db',
+    'cached_db': 'core.sessions.cached_db',
+    'signed_cookies': 'core.sessions.signed_cookies',
+}
+
+
+def session_engine(name):
+    """SESSION_ENGINE по имени хранилища:
+
+    db              – таблица django_session, чтение на каждый запрос
+    cached_db       – кэш с записью в таблицу; с несколькими воркерами
+                      нужен общий кэш, иначе выход из аккаунта не
+                      дойдет до кэша других воркеров
+    signed_cookies  – подписанная cookie, база не используется
+    """
+    if name not in ENGINES:
+        raise ValueError(f'Неизвестное хранилище сессий: {name}')
+    return ENGINES[name]
@@ -0,0 +1,7 @@
+from django.contrib.sessions.backends import db
+
+from .base import LazySaveMixin
+
+
+class SessionStore(LazySaveMixin, db.SessionStore):
+    pass
@@ -0,0 +1,37 @@
+"""Помощники тестов."""
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class OnCommitMixin:
+    """captureOnCommitCallbacks из Django 3.2 для TestCase.
+
+    TestCase выполняет тест в транзакции, которая откатывается, поэтому
+    колбэки transaction.on_commit – задачи очереди в режиме JOBS_EAGER,
+    повторный сдвиг поколений лент – сами не выполняются. Блок
+    with self.captureOnCommitCallbacks(execute=True) выполняет
+    накопленные в нем колбэки на выходе, как при фиксации, включая
+    колбэки, поставленные самими колбэками.
+    """
+
+    @classmethod
+    @contextmanager
+    def captureOnCommitCallbacks(cls, *, using=DEFAULT_DB_ALIAS,
+                                 execute=False):
+        callbacks = []
+        connection = connections[using]
+        start = len(connection.run_on_commit)
+        try:
+            yield callbacks
+        finally:
+            while True:
+                added = connection.run_on_commit[start:]
+                if not added:
+                    break
+                start += len(added)
+                callbacks.extend(func for _, func in added)
+                if not execute:
+                    break
+                for _, func in added:
+                    func()
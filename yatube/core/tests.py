@@ -1,4 +1,47 @@
-from django.test import TestCase, Client
+import asyncio
+import gzip
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.core.handlers.wsgi import WSGIHandler
+from django.contrib.auth import get_user_model
+from django.db import connections, transaction
+from django.db.utils import ConnectionHandler
+from django.test import (
+    Client,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Post
+
+from .asgi import ASGIHandler, build_environ
+from .assets.server import IMMUTABLE, StaticFiles
+from .caching.backends import SQLiteCache
+from .caching.config import cache_from_url
+from .caching.stampede import get_or_set_stale
+from .concurrency import gather
+from .db import replication
+from .db.config import sqlite_database
+from .db.routers import PIN_COOKIE
+from .metrics import recorder
+from .metrics.middleware import QueryBudgetExceeded
+from .metrics.registry import REQUEST_QUERIES
+from .ratelimit import consume
+from .sessions.config import ENGINES
+from .sessions.db import SessionStore
 
 
 class TemplateTest(TestCase):
@@ -15,3 +58,708 @@ class TemplateTest(TestCase):
         response = self.client.get(url)
 
         self.assertTemplateUsed(response, template)
+
+
+class SQLiteCacheTest(TestCase):
+    """Проверка кэша в файле SQLite"""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.cache = SQLiteCache(
+            os.path.join(self.directory, 'cache.sqlite3'),
+            {'COMPRESS_MIN_LENGTH': 100},
+        )
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_set_get_delete(self):
+        """Значения записываются, читаются и удаляются"""
+
+        self.cache.set('key', {'a': 1})
+        self.assertEqual(self.cache.get('key'), {'a': 1})
+        self.assertEqual(self.cache.get_many(['key', 'none']),
+                         {'key': {'a': 1}})
+
+        self.cache.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_add_and_incr_are_atomic_operations(self):
+        """add не перезаписывает живой ключ, incr увеличивает значение"""
+
+        self.assertTrue(self.cache.add('counter', 1))
+        self.assertFalse(self.cache.add('counter', 5))
+        self.assertEqual(self.cache.incr('counter', 2), 3)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_expired_values_are_not_returned(self):
+        """Просроченное значение не отдается и может быть добавлено заново"""
+
+        self.cache.set('key', 'value', timeout=-1)
+        self.assertIsNone(self.cache.get('key'))
+        self.assertTrue(self.cache.add('key', 'new'))
+
+    def test_large_values_are_compressed(self):
+        """Большие значения хранятся сжатыми и читаются без изменений"""
+
+        value = 'фрагмент ' * 1000
+        self.cache.set('page', value)
+        raw = self.cache._db.execute('SELECT value FROM cache').fetchone()[0]
+
+        self.assertLess(len(raw), len(value.encode()) // 10)
+        self.assertEqual(self.cache.get('page'), value)
+
+    def test_cache_is_shared_between_instances(self):
+        """Второй экземпляр (другой воркер) видит записи первого"""
+
+        other = SQLiteCache(self.cache._path, {})
+        self.cache.set('shared', 'value')
+
+        self.assertEqual(other.get('shared'), 'value')
+
+
+class StampedeTest(TestCase):
+    """Проверка защиты от одновременного пересчета"""
+
+    def setUp(self) -> None:
+        self.cache = LocMemCache('stampede', {})
+        self.cache.clear()
+        self.calls = 0
+
+    def build(self):
+        self.calls += 1
+        return self.calls
+
+    def test_fresh_value_is_not_rebuilt(self):
+        """Свежее значение не пересчитывается"""
+
+        get_or_set_stale('key', self.build, 60, cache=self.cache)
+        value = get_or_set_stale('key', self.build, 60, cache=self.cache)
+
+        self.assertEqual(value, 1)
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_value_is_served_while_locked(self):
+        """Пока другой воркер пересчитывает значение, отдается старое"""
+
+        get_or_set_stale('key', self.build, 0, cache=self.cache)
+        self.cache.add('key:lock', True)
+
+        value = get_or_set_stale('key', self.build, 60, cache=self.cache)
+
+        self.assertEqual(value, 1)
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_value_is_rebuilt_by_lock_owner(self):
+        """Устаревшее значение пересчитывает взявший блокировку"""
+
+        get_or_set_stale('key', self.build, 0, cache=self.cache)
+        value = get_or_set_stale('key', self.build, 60, cache=self.cache)
+
+        self.assertEqual(value, 2)
+        self.assertIsNone(self.cache.get('key:lock'))
+
+    def test_waiters_stop_when_builder_fails(self):
+        """Если пересчитывающий упал и снял блокировку, ожидающий не
+        ждет до конца ее срока, а считает сам"""
+
+        def failing_build():
+            raise RuntimeError
+
+        with self.assertRaises(RuntimeError):
+            get_or_set_stale('key', failing_build, 60, cache=self.cache)
+        self.assertIsNone(self.cache.get('key:lock'))
+
+        self.cache.add('key:lock', True)
+        threading.Timer(0.1, self.cache.delete, ['key:lock']).start()
+        started = time.monotonic()
+        value = get_or_set_stale(
+            'key', self.build, 60, cache=self.cache, lock_timeout=5
+        )
+
+        self.assertEqual(value, 1)
+        self.assertLess(time.monotonic() - started, 1)
+
+
+class CacheConfigTest(TestCase):
+    """Проверка настройки кэша по адресу"""
+
+    def test_cache_from_url(self):
+        """Адрес кэша превращается в настройки бэкенда"""
+
+        cases = {
+            'locmem://': {
+                'BACKEND': 'core.caching.backends.LocMemCache',
+            },
+            'sqlite:///tmp/cache.db': {
+                'BACKEND': 'core.caching.backends.SQLiteCache',
+                'LOCATION': '/tmp/cache.db',
+            },
+            'sqlite://cache/yatube.db': {
+                'BACKEND': 'core.caching.backends.SQLiteCache',
+                'LOCATION': 'cache/yatube.db',
+            },
+            'memcached://a:11211,b:11211': {
+                'BACKEND': 'core.caching.backends.PyLibMCCache',
+                'LOCATION': ['a:11211', 'b:11211'],
+                'OPTIONS': {'binary': True},
+            },
+        }
+        for url, expected in cases.items():
+            with self.subTest(url=url):
+                self.assertEqual(cache_from_url(url), expected)
+
+        for url in ('ftp://example.com', 'sqlite://'):
+            with self.subTest(url=url), self.assertRaises(ValueError):
+                cache_from_url(url)
+
+
+class SQLiteProfileTest(TestCase):
+    """Проверка настроек соединения SQLite под нагрузкой"""
+
+    HOLD = 0.3
+
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def database(self, config):
+        handler = ConnectionHandler({'default': config})
+        self.addCleanup(handler['default'].close)
+        return handler
+
+    def read_latency(self, config, readers=4):
+        """Худшее время чтения, пока другой поток пишет комментарий.
+
+        Писатель держит блокировку записи HOLD секунд: в журнале
+        отката так выглядит фиксация большой транзакции, на время
+        которой читатели останавливаются.
+        """
+        handler = self.database(config)
+        with handler['default'].cursor() as cursor:
+            cursor.execute(
+                'CREATE TABLE comment (id INTEGER PRIMARY KEY, text TEXT)'
+            )
+        locked = threading.Event()
+        latencies = []
+
+        def write():
+            db = handler['default']
+            with db.cursor() as cursor:
+                cursor.execute('BEGIN EXCLUSIVE')
+                cursor.execute("INSERT INTO comment (text) VALUES ('new')")
+                locked.set()
+                time.sleep(self.HOLD)
+                cursor.execute('COMMIT')
+            db.close()
+
+        def read():
+            db = handler['default']
+            locked.wait()
+            start = time.monotonic()
+            with db.cursor() as cursor:
+                cursor.execute('SELECT COUNT(*) FROM comment')
+                cursor.fetchone()
+            latencies.append(time.monotonic() - start)
+            db.close()
+
+        threads = [threading.Thread(target=write)] + [
+            threading.Thread(target=read) for _ in range(readers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return max(latencies)
+
+    def test_pragmas_are_applied(self):
+        """Новое соединение получает WAL и остальные PRAGMA"""
+
+        handler = self.database(sqlite_database(
+            os.path.join(self.directory, 'db.sqlite3')
+        ))
+        with handler['default'].cursor() as cursor:
+            for pragma, expected in (
+                ('journal_mode', 'wal'),
+                ('synchronous', 1),
+                ('temp_store', 2),
+                ('busy_timeout', 5000),
+            ):
+                cursor.execute(f'PRAGMA {pragma}')
+                self.assertEqual(cursor.fetchone()[0], expected)
+
+    def test_readers_do_not_wait_for_writer(self):
+        """С WAL чтение не ждет пишущую транзакцию, без него – ждет"""
+
+        bare = self.read_latency({
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(self.directory, 'bare.sqlite3'),
+            'OPTIONS': {'timeout': 5},
+        })
+        tuned = self.read_latency(sqlite_database(
+            os.path.join(self.directory, 'tuned.sqlite3')
+        ))
+
+        self.assertGreater(bare, self.HOLD / 2)
+        self.assertLess(tuned, self.HOLD / 2)
+
+
+@override_settings(REPLICA_DATABASES=['replica'])
+class ReplicaTest(TransactionTestCase):
+    """Проверка чтения с реплики и прилипания к основной базе"""
+
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        connections.databases['replica'] = sqlite_database(
+            os.path.join(cls.directory, 'replica.sqlite3')
+        )
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections.databases['replica']
+        shutil.rmtree(cls.directory, ignore_errors=True)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.author = get_user_model().objects.create_user(username='author')
+        self.client = Client()
+        self.client.force_login(self.author)
+        self.old_post = Post.objects.create(author=self.author, text='Старый')
+        replication.copy('default', ['replica'])
+        # Этот пост реплика еще не получила.
+        self.new_post = Post.objects.create(author=self.author, text='Новый')
+
+    def index(self, client):
+        response = client.get(reverse('posts:index'))
+        return list(response.context['page_obj'])
+
+    def test_read_views_use_replica(self):
+        """Страницы для чтения отстают вместе с репликой"""
+
+        self.assertEqual(self.index(self.client), [self.old_post])
+
+        replication.copy('default', ['replica'])
+        cache.clear()
+        self.assertEqual(
+            self.index(self.client), [self.new_post, self.old_post]
+        )
+
+    def test_writer_sticks_to_primary(self):
+        """После записи автор читает из основной базы, остальные –
+        с реплики"""
+
+        response = self.client.post(
+            reverse('posts:add_comment', args=[self.old_post.pk]),
+            {'text': 'Свой комментарий'},
+        )
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        detail = self.client.get(
+            reverse('posts:post_detail', args=[self.old_post.pk])
+        )
+        self.assertContains(detail, 'Свой комментарий')
+        self.assertEqual(
+            self.index(self.client), [self.new_post, self.old_post]
+        )
+        self.assertEqual(self.index(Client()), [self.old_post])
+
+    def test_pin_expires(self):
+        """По истечении окна чтение возвращается на реплику"""
+
+        self.client.cookies[PIN_COOKIE] = '0'
+        self.assertEqual(self.index(self.client), [self.old_post])
+
+
+class ASGITest(TransactionTestCase):
+    """Проверка входа ASGI"""
+
+    def request(self, application, scope, body=b''):
+        messages = [
+            {'type': 'http.request', 'body': body[:1], 'more_body': True},
+            {'type': 'http.request', 'body': body[1:]},
+        ]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(application(scope, receive, send))
+        return sent
+
+    def test_http_request(self):
+        """Запрос проходит через Django и возвращается целиком"""
+
+        application = ASGIHandler(WSGIHandler(), threads=2)
+        self.addCleanup(application.executor.shutdown)
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': reverse('posts:index'),
+            'query_string': b'page=1',
+            'headers': [(b'host', b'testserver')],
+        }
+
+        start, *body = self.request(application, scope)
+
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'content-type', b'text/html; charset=utf-8'),
+                      start['headers'])
+        self.assertIn(b'</body>', b''.join(m['body'] for m in body))
+        self.assertFalse(body[-1].get('more_body', False))
+
+    def test_build_environ(self):
+        """Заголовки, путь и тело переносятся в окружение WSGI"""
+
+        environ = build_environ({
+            'method': 'POST',
+            'path': '/поиск/',
+            'query_string': b'q=1',
+            'headers': [
+                (b'content-type', b'text/plain'),
+                (b'accept', b'text/html'),
+                (b'accept', b'*/*'),
+                (b'cookie', b'a=1'),
+                (b'cookie', b'b=2'),
+            ],
+        }, io.BytesIO(b'data'))
+
+        self.assertEqual(environ['REQUEST_METHOD'], 'POST')
+        self.assertEqual(
+            environ['PATH_INFO'].encode('latin-1').decode(), '/поиск/'
+        )
+        self.assertEqual(environ['QUERY_STRING'], 'q=1')
+        self.assertEqual(environ['CONTENT_TYPE'], 'text/plain')
+        self.assertEqual(environ['HTTP_ACCEPT'], 'text/html,*/*')
+        self.assertEqual(environ['HTTP_COOKIE'], 'a=1; b=2')
+        self.assertEqual(environ['wsgi.input'].read(), b'data')
+
+    def test_body_is_read_on_demand(self):
+        """Тело читается, только пока его читает приложение: отказ по
+        началу тела не ждет остальных частей"""
+
+        def wsgi_application(environ, start_response):
+            head = environ['wsgi.input'].read(6)
+            start_response('413 Request Entity Too Large', [])
+            return [head]
+
+        application = ASGIHandler(wsgi_application, threads=1)
+        self.addCleanup(application.executor.shutdown)
+        messages = [
+            {'type': 'http.request', 'body': b'part', 'more_body': True}
+            for _ in range(10)
+        ]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(application(
+            {'type': 'http', 'method': 'POST', 'path': '/'}, receive, send
+        ))
+
+        self.assertEqual(sent[0]['status'], 413)
+        self.assertEqual(sent[1]['body'], b'partpa')
+        self.assertEqual(len(messages), 8)
+
+    def test_lifespan(self):
+        application = ASGIHandler(WSGIHandler(), threads=1)
+        messages = [
+            {'type': 'lifespan.startup'},
+            {'type': 'lifespan.shutdown'},
+        ]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.run(application({'type': 'lifespan'}, receive, send))
+
+        self.assertEqual(sent, [
+            'lifespan.startup.complete', 'lifespan.shutdown.complete'
+        ])
+
+
+@override_settings(QUERY_THREADS=2)
+class GatherTest(TransactionTestCase):
+    """Проверка одновременного выполнения независимых запросов"""
+
+    def query(self):
+        return threading.get_ident(), Post.objects.count()
+
+    def test_runs_in_threads_and_counts_queries(self):
+        """Вне транзакции запросы идут в разных потоках и попадают в
+        показатели запроса"""
+
+        stats, token = recorder.start()
+        try:
+            with connections['default'].execute_wrapper(
+                    recorder.record_query):
+                first, second = gather(self.query, self.query)
+        finally:
+            recorder.stop(token)
+
+        self.assertEqual(first[0], threading.get_ident())
+        self.assertNotEqual(second[0], threading.get_ident())
+        self.assertEqual(stats.queries, 2)
+
+    def test_sequential_in_transaction(self):
+        """В транзакции все запросы выполняются в текущем потоке"""
+
+        with transaction.atomic():
+            results = gather(self.query, self.query)
+
+        self.assertEqual(
+            {ident for ident, _ in results}, {threading.get_ident()}
+        )
+
+    def test_exception_is_raised(self):
+        def fail():
+            raise ValueError
+
+        with self.assertRaises(ValueError):
+            gather(self.query, fail)
+
+
+class MetricsTest(TestCase):
+    """Проверка метрик запросов и бюджетов SQL-запросов"""
+
+    def setUp(self) -> None:
+        self.client = Client()
+
+    def test_requests_are_measured_per_view(self):
+        """Запрос учитывается в гистограммах своего представления,
+        метрики отдаются в формате Prometheus только своим адресам"""
+
+        before = REQUEST_QUERIES.count(('posts:index',))
+        self.client.get(reverse('posts:index'))
+
+        self.assertEqual(REQUEST_QUERIES.count(('posts:index',)), before + 1)
+        response = self.client.get(reverse('metrics'))
+        self.assertContains(
+            response, 'yatube_request_queries_count{view="posts:index"}'
+        )
+        self.assertContains(response, 'yatube_request_render_seconds_bucket')
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='10.1.1.1')
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(QUERY_BUDGETS={'posts:index': 0})
+    def test_query_budget(self):
+        """Превышение бюджета пишется в лог, а в режиме raise –
+        роняет запрос"""
+
+        cache.clear()
+        with self.assertLogs('core.metrics', 'WARNING'):
+            self.client.get(reverse('posts:index'))
+
+        cache.clear()
+        with override_settings(QUERY_BUDGET_MODE='raise'):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(reverse('posts:index'))
+
+
+@override_settings(RATE_LIMITS={
+    'comment': {'user': (2, 60), 'ip': (3, 60)},
+})
+class RateLimitTest(TestCase):
+    """Тестирование ограничения частоты записей."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        User = get_user_model()
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(author=self.author, text='Пост')
+        self.url = reverse('posts:add_comment', args=[self.post.pk])
+
+    def comment(self, username):
+        client = Client()
+        client.force_login(
+            get_user_model().objects.get_or_create(username=username)[0]
+        )
+        return client.post(self.url, {'text': 'Комментарий'})
+
+    def test_bucket_refills_at_rate_up_to_capacity(self):
+        """Ведро отдает capacity токенов сразу, дальше – по одному за
+        period / capacity секунд и не копит больше capacity."""
+
+        taken = [consume('test', 'a', 2, 60, now=0) for _ in range(3)]
+        self.assertEqual(taken, [0, 0, 30])
+        self.assertEqual(consume('test', 'a', 2, 60, now=15), 15)
+        self.assertEqual(consume('test', 'a', 2, 60, now=30), 0)
+        taken = [consume('test', 'a', 2, 60, now=1000) for _ in range(3)]
+        self.assertEqual(taken, [0, 0, 30])
+
+    def test_user_and_ip_budgets(self):
+        """Пользователь получает 429 с Retry-After после своего бюджета,
+        адрес – после общего; отклоненная запись не выполняется."""
+
+        statuses = [self.comment('reader').status_code for _ in range(3)]
+        self.assertEqual(statuses, [302, 302, 429])
+        self.assertEqual(self.comment('other').status_code, 302)
+
+        response = self.comment('third')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(Comment.objects.count(), 3)
+
+    def test_reads_are_not_limited(self):
+        client = Client()
+        client.force_login(self.author)
+        for _ in range(5):
+            self.comment('author')
+        response = client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    }})
+    def test_no_limit_without_cache(self):
+        self.assertEqual(consume('test', 'a', 1, 60, now=0), 0)
+        self.assertEqual(consume('test', 'a', 1, 60, now=0), 0)
+
+
+class SessionTest(TestCase):
+    """Тестирование хранилищ сессий с ленивым сохранением."""
+
+    def session_writes(self, session):
+        with CaptureQueriesContext(connections['default']) as queries:
+            if session.modified:
+                session.save()
+        return [
+            query for query in queries.captured_queries
+            if 'django_session' in query['sql']
+            and not query['sql'].startswith('SELECT')
+        ]
+
+    def test_unchanged_session_is_not_saved(self):
+        """Присваивание тех же данных не пишет в базу, изменение –
+        пишет."""
+
+        session = SessionStore()
+        session['cart'] = [1]
+        session.save()
+        session = SessionStore(session.session_key)
+        session['cart'] = [1]
+        self.assertFalse(self.session_writes(session))
+
+        session['cart'].append(2)
+        session.modified = True
+        self.assertEqual(len(self.session_writes(session)), 1)
+        self.assertEqual(SessionStore(session.session_key)['cart'], [1, 2])
+
+    def test_login_and_logout_with_every_engine(self):
+        """Вход меняет ключ сессии, выход ее удаляет."""
+
+        user = get_user_model().objects.create_user(
+            username='reader', password='password'
+        )
+        url = reverse('posts:follow_index')
+        for engine in ENGINES.values():
+            with self.subTest(engine=engine), \
+                    override_settings(SESSION_ENGINE=engine):
+                client = Client()
+                response = client.post(reverse('users:login'), {
+                    'username': user.username, 'password': 'password',
+                })
+                self.assertEqual(response.status_code, 302)
+                self.assertEqual(client.get(url).status_code, 200)
+                client.get(reverse('users:logout'))
+                self.assertEqual(client.get(url).status_code, 302)
+
+
+class StaticAssetsTest(SimpleTestCase):
+    """Тестирование сборки и раздачи статических файлов."""
+
+    def setUp(self) -> None:
+        self.root = tempfile.mkdtemp()
+        settings = override_settings(
+            STATIC_ROOT=self.root,
+            STATICFILES_STORAGE=(
+                'core.assets.storage.CompressedManifestStorage'
+            ),
+            STATICFILES_FINDERS=[
+                'django.contrib.staticfiles.finders.FileSystemFinder',
+            ],
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        self.app = StaticFiles(
+            lambda environ, start_response: start_response(
+                '404 Not Found', []
+            ) or [b'django'],
+            self.root,
+            '/static/',
+        )
+
+    def call(self, path, method='GET', **headers):
+        environ = {'REQUEST_METHOD': method, 'PATH_INFO': path, **headers}
+        response = {}
+
+        def start_response(status, headers):
+            response['status'] = status
+            response['headers'] = dict(headers)
+
+        body = b''.join(self.app(environ, start_response))
+        return response['status'], response['headers'], body
+
+    def hashed(self, name):
+        return staticfiles_storage.stored_name(name)
+
+    def test_collectstatic_hashes_and_compresses(self):
+        """Файлы получают хэш в имени и сжатые копии."""
+
+        css = self.hashed('css/bootstrap.min.css')
+        self.assertRegex(css, r'^css/bootstrap\.min\.[0-9a-f]{12}\.css$')
+        with open(os.path.join(self.root, css), 'rb') as file:
+            original = file.read()
+        with open(os.path.join(self.root, css + '.gz'), 'rb') as file:
+            self.assertEqual(gzip.decompress(file.read()), original)
+
+    def test_compressed_variant_is_served_immutable(self):
+        path = '/static/' + self.hashed('css/bootstrap.min.css')
+
+        status, headers, body = self.call(
+            path, HTTP_ACCEPT_ENCODING='br;q=0, gzip'
+        )
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(headers['Cache-Control'], IMMUTABLE)
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(int(headers['Content-Length']), len(body))
+
+        status, _, body = self.call(
+            path, HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_IF_NONE_MATCH=headers['ETag'],
+        )
+        self.assertEqual(status, '304 Not Modified')
+        self.assertEqual(body, b'')
+
+        status, headers, body = self.call(path)
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertTrue(body.startswith(b'@charset'))
+
+    def test_other_requests_reach_django(self):
+        for path, method in (('/static/missing.css', 'GET'),
+                             ('/', 'GET'),
+                             ('/static/js/navbar.js', 'POST')):
+            with self.subTest(path=path, method=method):
+                self.assertEqual(self.call(path, method)[2], b'django')
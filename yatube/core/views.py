@@ -1,5 +1,9 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
 from django.shortcuts import render
 
+from .metrics.registry import REGISTRY
+
 
 def page_not_found(request, exception):
     template = 'core/404.html'
@@ -16,6 +20,24 @@ def server_error(request):
     return render(request, template, status=500)
 
 
+def too_many_requests(request, retry_after):
+    template = 'core/429.html'
+    response = render(
+        request, template, {'retry_after': retry_after}, status=429
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
 def csrf_failure(request, reason=''):
     template = 'core/403csrf.html'
     return render(request, template)
+
+
+def metrics(request):
+    """Метрики процесса в текстовом формате Prometheus."""
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(
+        REGISTRY.render(), content_type='text/plain; version=0.0.4'
+    )
@@ -0,0 +1,76 @@
+"""Отправка почты через очередь задач.
+
+EmailBackend не соединяется с почтовым сервером в запросе, а ставит
+каждое письмо задачей send_email; отправляет его бэкенд
+JOBS_EMAIL_BACKEND. Ключ идемпотентности – Message-ID письма.
+"""
+import base64
+from email.utils import make_msgid
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.utils import DNS_NAME
+
+
+def _encode_attachment(attachment):
+    filename, content, mimetype = attachment
+    if isinstance(content, bytes):
+        return [filename, base64.b64encode(content).decode(), mimetype, True]
+    return [filename, content, mimetype, False]
+
+
+def _decode_attachment(attachment):
+    filename, content, mimetype, binary = attachment
+    if binary:
+        content = base64.b64decode(content)
+    return filename, content, mimetype
+
+
+def encode(message):
+    """Письмо в виде, сериализуемом в JSON. Вложения MIMEBase не
+    поддерживаются."""
+    return {
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': message.to,
+        'cc': message.cc,
+        'bcc': message.bcc,
+        'reply_to': message.reply_to,
+        'headers': message.extra_headers,
+        'alternatives': getattr(message, 'alternatives', []),
+        'attachments': [
+            _encode_attachment(attachment)
+            for attachment in message.attachments
+        ],
+    }
+
+
+def decode(data):
+    data = dict(data)
+    attachments = [
+        _decode_attachment(attachment) for attachment in data.pop(
+            'attachments'
+        )
+    ]
+    alternatives = [tuple(item) for item in data.pop('alternatives')]
+    return EmailMultiAlternatives(
+        attachments=attachments, alternatives=alternatives, **data
+    )
+
+
+class EmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        from .tasks import send_email
+
+        for message in email_messages:
+            message_id = message.extra_headers.setdefault(
+                'Message-ID', make_msgid(domain=DNS_NAME)
+            )
+            send_email.delay(
+                encode(message),
+                settings.JOBS_EMAIL_BACKEND,
+                key=f'email:{message_id}',
+            )
+        return len(email_messages)
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from jobs import queue
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=1,
+            help='Пауза, когда очередь пуста, в секундах',
+        )
+        parser.add_argument(
+            '--batch', type=int, default=100,
+            help='Сколько задач забирать за раз',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                done, failed = queue.run_pending(options['batch'])
+                if done or failed:
+                    self.stdout.write(
+                        f'Выполнено: {done}, с ошибкой: {failed}'
+                    )
+                if options['once']:
+                    return
+                queue.prune()
+                # Соединение с истекшим CONN_MAX_AGE переоткрывается,
+                # как между запросами веб-воркера.
+                close_old_connections()
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
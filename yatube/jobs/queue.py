@@ -0,0 +1,168 @@
+"""Очередь фоновых задач в таблице базы данных.
+
+Задача – функция из модуля tasks.py приложения, помеченная @task.
+Вызов task.delay(*args) записывает строку Job в той же транзакции,
+что и изменение, которое ее породило: задача не теряется, если
+запрос упал после записи, и не выполняется, если транзакция
+откатилась. Выполняет задачи команда run_jobs.
+
+Задача выполняется вне транзакции, а отметка о выполнении пишется
+отдельной короткой транзакцией: на SQLite транзакция держит блокировку
+записи, и перекодирование картинки или отправка письма не должны
+останавливать запись в веб-процессах. Поэтому такие задачи при
+падении воркера могут повториться и должны быть идемпотентными.
+Задачи с @task(atomic=True), которые только пишут в базу (счетчики),
+выполняются в одной транзакции с отметкой и применяются ровно один
+раз. Упавшая задача повторяется с экспоненциальной задержкой, после
+max_attempts попыток остается в таблице со статусом failed.
+
+Ключ идемпотентности: пока в таблице есть задача с тем же ключом,
+повторная постановка ничего не делает.
+
+При JOBS_EAGER (по умолчанию в разработке, без воркера) задача
+выполняется в вызывающем процессе после фиксации транзакции, как если
+бы ее сразу забрал воркер; вне транзакции – сразу.
+"""
+import json
+import logging
+import traceback
+from contextlib import nullcontext
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+class Task:
+    def __init__(self, func, name, max_attempts, atomic=False):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+        self.atomic = atomic
+
+    def __call__(self, *args):
+        return self.func(*args)
+
+    def transaction(self):
+        """Транзакция, в которой выполняется задача, если она atomic."""
+        return transaction.atomic() if self.atomic else nullcontext()
+
+    def run_eager(self, args):
+        with self.transaction():
+            self.func(*args)
+
+    def delay(self, *args, key=None):
+        """Ставит задачу в очередь; аргументы должны сериализоваться
+        в JSON."""
+        payload = json.dumps(args)
+        if settings.JOBS_EAGER:
+            args = json.loads(payload)
+            transaction.on_commit(lambda: self.run_eager(args))
+            return
+        Job.objects.bulk_create(
+            [Job(
+                name=self.name,
+                args=payload,
+                key=key,
+                max_attempts=self.max_attempts,
+            )],
+            ignore_conflicts=key is not None,
+        )
+
+
+def task(func=None, *, max_attempts=None, atomic=False):
+    """Регистрирует функцию как фоновую задачу. atomic – выполнять ее
+    в одной транзакции с отметкой о выполнении."""
+
+    def decorator(func):
+        name = f'{func.__module__}.{func.__name__}'
+        registry[name] = Task(
+            func, name, max_attempts or settings.JOBS_MAX_ATTEMPTS, atomic
+        )
+        return registry[name]
+
+    if func is None:
+        return decorator
+    return decorator(func)
+
+
+def backoff(attempts):
+    """Задержка перед повтором после attempts неудачных попыток."""
+    delay = settings.JOBS_RETRY_DELAY * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, settings.JOBS_RETRY_MAX_DELAY))
+
+
+def claim(limit):
+    """Забирает до limit готовых к выполнению задач.
+
+    Забранная задача откладывается на JOBS_LOCK_TIMEOUT секунд: другие
+    воркеры ее не видят, а если воркер упал, она вернется в очередь.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        due = Job.objects.filter(status=Job.PENDING, run_at__lte=now)
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        pks = list(due.values_list('pk', flat=True)[:limit])
+        Job.objects.filter(pk__in=pks).update(
+            run_at=now + timedelta(seconds=settings.JOBS_LOCK_TIMEOUT),
+            attempts=F('attempts') + 1,
+        )
+    return list(Job.objects.filter(pk__in=pks))
+
+
+def run(job):
+    """Выполняет забранную задачу; возвращает True при успехе."""
+    task = registry[job.name]
+    try:
+        with task.transaction():
+            task.func(*json.loads(job.args))
+            with transaction.atomic():
+                Job.objects.filter(pk=job.pk).update(
+                    status=Job.DONE, finished=timezone.now(), last_error=''
+                )
+        return True
+    except Exception:
+        logger.exception('Задача %s не выполнена', job)
+        changes = {'last_error': traceback.format_exc()}
+        if job.attempts >= job.max_attempts:
+            changes.update(status=Job.FAILED, finished=timezone.now())
+        else:
+            changes['run_at'] = timezone.now() + backoff(job.attempts)
+        Job.objects.filter(pk=job.pk).update(**changes)
+        return False
+
+
+def run_pending(limit=100):
+    """Выполняет готовые задачи пачками, пока они есть; возвращает
+    число выполненных и упавших."""
+    done = failed = 0
+    while True:
+        jobs = claim(limit)
+        if not jobs:
+            return done, failed
+        for job in jobs:
+            if run(job):
+                done += 1
+            else:
+                failed += 1
+
+
+def prune():
+    """Удаляет выполненные задачи старше JOBS_KEEP_DONE секунд;
+    упавшие остаются для разбора."""
+    deleted, _ = Job.objects.filter(
+        status=Job.DONE,
+        finished__lt=timezone.now() - timedelta(
+            seconds=settings.JOBS_KEEP_DONE
+        ),
+    ).delete()
+    return deleted
@@ -0,0 +1,10 @@
+from django.core.mail import get_connection
+
+from .mail import decode
+from .queue import task
+
+
+@task
+def send_email(message, backend):
+    """Отправляет письмо через настоящий бэкенд почты."""
+    get_connection(backend).send_messages([decode(message)])
@@ -0,0 +1,182 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.db import connection, transaction
+from django.test import (
+    Client,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from core.testing import OnCommitMixin
+from posts.models import Comment, Post
+
+from . import queue
+from .models import Job
+
+User = get_user_model()
+calls = []
+
+
+@queue.task(max_attempts=2, atomic=True)
+def flaky(value):
+    calls.append(value)
+    Post.objects.filter(pk=value).update(text='Изменено')
+    raise RuntimeError('Сбой')
+
+
+@queue.task
+def record_transaction():
+    calls.append(connection.in_atomic_block)
+
+
+@override_settings(JOBS_EAGER=True)
+class EagerTest(OnCommitMixin, TestCase):
+    """Тестирование выполнения задач без воркера."""
+
+    def test_task_runs_after_commit(self):
+        """Задача выполняется после фиксации транзакции, а не внутри
+        нее, и не пишется в таблицу очереди."""
+
+        author = User.objects.create_user(username='author')
+        with self.captureOnCommitCallbacks() as callbacks:
+            post = Post.objects.create(author=author, text='Пост')
+            Comment.objects.create(post=post, author=author, text='Да')
+            post.refresh_from_db()
+            self.assertEqual(post.comment_count, 0)
+
+        for callback in callbacks:
+            callback()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+        self.assertFalse(Job.objects.exists())
+
+
+@override_settings(JOBS_EAGER=False)
+class QueueTest(TestCase):
+    """Тестирование очереди фоновых задач."""
+
+    def setUp(self) -> None:
+        calls.clear()
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(author=self.author, text='Пост')
+        queue.run_pending()
+
+    def test_side_effects_run_in_worker(self):
+        """Счетчик меняется не в запросе, а при выполнении задачи,
+        ровно один раз."""
+
+        Comment.objects.create(post=self.post, author=self.author, text='Да')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+
+        self.assertEqual(queue.run_pending(), (1, 0))
+        self.assertEqual(queue.run_pending(), (0, 0))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        self.assertFalse(Job.objects.exclude(status=Job.DONE).exists())
+
+    def test_rolled_back_job_is_not_queued(self):
+        """Задача из откатившейся транзакции не попадает в очередь."""
+
+        before = Job.objects.count()
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                Comment.objects.create(
+                    post=self.post, author=self.author, text='Да'
+                )
+                raise RuntimeError
+        self.assertEqual(Job.objects.count(), before)
+
+    def test_failed_job_is_retried_with_backoff(self):
+        """Упавшая задача откатывается и повторяется с задержкой, после
+        max_attempts попыток остается со статусом failed."""
+
+        flaky.delay(self.post.pk)
+        started = timezone.now()
+        self.assertEqual(queue.run_pending(), (0, 1))
+
+        job = Job.objects.get(name='jobs.tests.flaky')
+        self.assertEqual((job.status, job.attempts), (Job.PENDING, 1))
+        self.assertGreaterEqual(job.run_at, started + queue.backoff(1))
+        self.assertIn('Сбой', job.last_error)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text, 'Пост')
+
+        Job.objects.filter(pk=job.pk).update(run_at=started)
+        queue.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertEqual(calls, [self.post.pk, self.post.pk])
+
+    def test_backoff_is_exponential_and_capped(self):
+        with self.settings(JOBS_RETRY_DELAY=2, JOBS_RETRY_MAX_DELAY=10):
+            self.assertEqual(
+                [queue.backoff(n).total_seconds() for n in range(1, 5)],
+                [2, 4, 8, 10],
+            )
+
+    def test_idempotency_key(self):
+        """Задача с занятым ключом повторно не ставится."""
+
+        for _ in range(3):
+            flaky.delay(self.post.pk, key='flaky')
+        self.assertEqual(Job.objects.filter(key='flaky').count(), 1)
+
+    def test_claimed_job_is_hidden_until_lock_expires(self):
+        flaky.delay(self.post.pk)
+        self.assertEqual(len(queue.claim(10)), 1)
+        self.assertEqual(queue.claim(10), [])
+        Job.objects.filter(name='jobs.tests.flaky').update(
+            run_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(len(queue.claim(10)), 1)
+
+    def test_prune_keeps_failed_jobs(self):
+        old = timezone.now() - timedelta(days=30)
+        Job.objects.update(finished=old)
+        Job.objects.create(name='x', status=Job.FAILED, finished=old)
+        queue.prune()
+        self.assertEqual(
+            list(Job.objects.values_list('status', flat=True)), [Job.FAILED]
+        )
+
+    @override_settings(
+        EMAIL_BACKEND='jobs.mail.EmailBackend',
+        JOBS_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    )
+    def test_password_reset_email_is_sent_by_worker(self):
+        """Письмо сброса пароля отправляет воркер, а не запрос."""
+
+        self.author.email = 'author@example.com'
+        self.author.set_password('password-1234')
+        self.author.save()
+        Client().post(
+            reverse('users:password_reset'), {'email': self.author.email}
+        )
+        self.assertEqual(mail.outbox, [])
+
+        queue.run_pending()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [self.author.email])
+        self.assertIn('Message-ID', mail.outbox[0].extra_headers)
+
+
+@override_settings(JOBS_EAGER=False)
+class WorkerTransactionTest(TransactionTestCase):
+    """Тестирование транзакций воркера."""
+
+    def test_task_runs_outside_transaction(self):
+        """Задача без atomic выполняется вне транзакции и не держит
+        блокировку записи."""
+
+        calls.clear()
+        record_transaction.delay()
+
+        self.assertEqual(queue.run_pending(), (1, 0))
+        self.assertEqual(calls, [False])
+        self.assertTrue(Job.objects.filter(status=Job.DONE).exists())
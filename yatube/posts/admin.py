@@ -1,5 +1,8 @@
+from django.conf import settings
 from django.contrib import admin
 
+from search import index
+
 from .models import Group, Post, Comment
 
 
@@ -10,6 +13,13 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date', 'group')
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Ищет по полнотекстовому индексу вместо LIKE по всей таблице."""
+        if not search_term:
+            return queryset, False
+        ids = index.search(search_term, settings.SEARCH_MAX_RESULTS)
+        return queryset.filter(pk__in=ids), False
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = ('pk', 'title', 'slug', 'description')
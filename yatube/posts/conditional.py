@@ -0,0 +1,113 @@
+"""Условные GET-запросы к лентам и странице поста.
+
+Валидатором служат поколения лент из feed_cache: их сдвигает каждое
+изменение поста, комментария, подписки или группы, и хранят они время
+этого изменения. ETag складывается из поколений страницы и
+пользователя, которому она показана, поэтому проверка стоит не
+больше одного запроса по индексу и чтения из кэша, а ответ 304
+отдается без запросов страницы и рендеринга шаблона.
+
+Last-Modified не отдается: его точность – секунда, и изменение в ту
+же секунду, что и закэшированный ответ, прошло бы проверку
+If-Modified-Since, а клиент получил бы неверный 304.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+    quote_etag,
+)
+
+from core.db import routers
+
+from . import feed_cache
+from .models import Group, Post, User
+
+
+def _validators(request, feeds):
+    versions = feed_cache.generations(feeds)
+    digest = hashlib.md5(
+        f'{request.user.pk}:{versions!r}'.encode()
+    ).hexdigest()
+    return quote_etag(digest), max(versions)
+
+
+def _fresh_enough(changed):
+    """Страница с реплики может не содержать последнее изменение,
+    пока не прошло окно прилипания к основной базе."""
+    if routers.current_database() == 'default':
+        return True
+    return time.time() - changed >= settings.REPLICA_PIN_SECONDS
+
+
+def conditional(get_feeds):
+    """Отвечает 304, если страница не менялась.
+
+    get_feeds(request, *args, **kwargs) возвращает ленты, от которых
+    зависит страница, или None, если проверять нечего (например,
+    объекта нет и представление ответит 404).
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            feeds = get_feeds(request, *args, **kwargs)
+            if feeds is None:
+                return view(request, *args, **kwargs)
+            etag, changed = _validators(request, feeds)
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code == 200 and _fresh_enough(changed):
+                    response['ETag'] = etag
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ('Cookie',))
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def index_feeds(request):
+    return [feed_cache.INDEX]
+
+
+def group_feeds(request, slug):
+    pk = Group.objects.filter(slug=slug).values_list('pk', flat=True).first()
+    if pk is None:
+        return None
+    return [feed_cache.group_feed(pk)]
+
+
+def profile_feeds(request, username):
+    pk = User.objects.filter(
+        username=username
+    ).values_list('pk', flat=True).first()
+    if pk is None:
+        return None
+    feeds = [feed_cache.author_feed(pk)]
+    if request.user.is_authenticated:
+        # Кнопка «подписаться» зависит от подписок читателя.
+        feeds.append(feed_cache.follow_feed(request.user.pk))
+    return feeds
+
+
+def post_feeds(request, post_id):
+    post = Post.objects.filter(
+        pk=post_id
+    ).values_list('author_id', 'group_id').first()
+    if post is None:
+        return None
+    author_id, group_id = post
+    feeds = [feed_cache.author_feed(author_id)]
+    if group_id:
+        feeds.append(feed_cache.group_feed(group_id))
+    return feeds
@@ -0,0 +1,65 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+def change(queryset, field, delta):
+    """Атомарно изменяет счетчик на delta, не опуская его ниже нуля."""
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    return queryset.update(**{field: F(field) + delta})
+
+
+def post_created(post, delta=1):
+    change(UserStats.objects.filter(pk=post.author_id), 'posts_count', delta)
+    if post.group_id:
+        change(Group.objects.filter(pk=post.group_id), 'posts_count', delta)
+
+
+def post_moved(old_group_id, new_group_id):
+    if old_group_id:
+        change(Group.objects.filter(pk=old_group_id), 'posts_count', -1)
+    if new_group_id:
+        change(Group.objects.filter(pk=new_group_id), 'posts_count', 1)
+
+
+def comment_created(comment, delta=1):
+    if comment.post_id:
+        change(
+            Post.objects.filter(pk=comment.post_id), 'comment_count', delta
+        )
+
+
+def follow_created(follow, delta=1):
+    change(
+        UserStats.objects.filter(pk=follow.user_id), 'following_count', delta
+    )
+    change(
+        UserStats.objects.filter(pk=follow.author_id), 'followers_count', delta
+    )
+
+
+def _count(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    ), 0)
+
+
+def rebuild():
+    """Пересчитывает все счетчики по фактическим данным."""
+    UserStats.objects.bulk_create(
+        [UserStats(user_id=pk) for pk in
+         User.objects.filter(stats__isnull=True).values_list('pk', flat=True)]
+    )
+    Post.objects.update(comment_count=_count(Comment, 'post'))
+    Group.objects.update(posts_count=_count(Post, 'group'))
+    UserStats.objects.update(
+        posts_count=_count(Post, 'author'),
+        followers_count=_count(Follow, 'author'),
+        following_count=_count(Follow, 'user'),
+    )
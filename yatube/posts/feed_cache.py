@@ -0,0 +1,140 @@
+"""Кэш страниц лент с инвалидацией по событиям.
+
+У каждой ленты (главная, группа, автор, подписки пользователя) есть
+поколение – метка времени последнего изменения. Оно входит в ключ
+кэша страницы, поэтому изменение поста, комментария или подписки
+сдвигает поколение только затронутых лент, и их старые страницы
+больше не читаются.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from core.caching.stampede import get_or_set_stale
+from core.db import routers
+
+from . import timeline
+from .models import Follow, Group, Post, User
+
+INDEX = 'index'
+# Общее поколение для лент подписок на популярных авторов: их посты
+# не раскладываются по лентам, поэтому и подписчиков не перебираем.
+CELEBRITIES = 'celebrities'
+BATCH_SIZE = 500
+
+
+def group_feed(group_id):
+    return f'group:{group_id}'
+
+
+def author_feed(author_id):
+    return f'author:{author_id}'
+
+
+def follow_feed(user_id):
+    return f'follow:{user_id}'
+
+
+def _gen_key(feed):
+    return f'feed-gen:{feed}'
+
+
+def generations(feeds):
+    """Текущие поколения лент; отсутствующие создаются."""
+    keys = [_gen_key(feed) for feed in feeds]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            now = time.time()
+            cache.add(key, now, None)
+            # Без кэша (DummyCache) поколение новое на каждый запрос.
+            found[key] = cache.get(key, now)
+    return [found[key] for key in keys]
+
+
+def bump(*feeds):
+    """Сдвигает поколения лент.
+
+    Внутри транзакции поколения сдвигаются еще раз после фиксации:
+    читатель, увидевший первое поколение до фиксации, строит и кэширует
+    страницу без изменения, а второе поколение делает эту страницу и
+    ее ETag недействительными.
+    """
+    feeds = list(feeds)
+    _set_generations(feeds)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _set_generations(feeds))
+
+
+def _set_generations(feeds):
+    now = time.time()
+    for start in range(0, len(feeds), BATCH_SIZE):
+        cache.set_many(
+            {_gen_key(feed): now for feed in feeds[start:start + BATCH_SIZE]},
+            None,
+        )
+
+
+def page_key(feeds, token):
+    versions = '|'.join(map(repr, generations(feeds)))
+    digest = hashlib.md5(f'{versions}:{token}'.encode()).hexdigest()
+    return f'feed:{",".join(feeds)}:{digest}'
+
+
+def get_page(feeds, token, build):
+    """Страница ленты из кэша; при промахе строится через build().
+
+    Страницу одной версии ленты пересчитывает только один воркер.
+    Страницы, прочитанные с реплики, кэшируются отдельно и не дольше
+    окна прилипания к основной базе: реплика могла еще не получить
+    изменение, которое сдвинуло поколение.
+    """
+    database = routers.current_database()
+    key = page_key(feeds, f'{database}:{token}')
+    timeout = settings.FEED_CACHE_TIMEOUT
+    if database != 'default':
+        timeout = min(timeout, settings.REPLICA_PIN_SECONDS)
+
+    def build_page():
+        page = build()
+        page.cache_key = key
+        page.cache_timeout = timeout
+        return page
+
+    return get_or_set_stale(key, build_page, timeout)
+
+
+def invalidate_post(author_id, group_ids=()):
+    """Сбрасывает ленты, в которых виден пост автора."""
+    feeds = [INDEX, author_feed(author_id)]
+    feeds += [group_feed(pk) for pk in group_ids if pk]
+    if timeline.is_celebrity(author_id):
+        feeds.append(CELEBRITIES)
+    else:
+        followers = Follow.objects.filter(
+            author_id=author_id
+        ).values_list('user_id', flat=True)
+        feeds += [follow_feed(pk) for pk in followers.iterator()]
+    bump(*feeds)
+
+
+def invalidate_comment(post_id):
+    """Сбрасывает ленты, в которых виден пост с комментарием."""
+    post = Post.objects.filter(
+        pk=post_id
+    ).values('author_id', 'group_id').first()
+    if post:
+        invalidate_post(post['author_id'], [post['group_id']])
+
+
+def invalidate_all():
+    """Сбрасывает все ленты, например после массовой загрузки."""
+    feeds = [INDEX, CELEBRITIES]
+    feeds += [group_feed(pk) for pk in
+              Group.objects.values_list('pk', flat=True).iterator()]
+    for pk in User.objects.values_list('pk', flat=True).iterator():
+        feeds += [author_feed(pk), follow_feed(pk)]
+    bump(*feeds)
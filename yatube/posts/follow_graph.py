@@ -0,0 +1,82 @@
+"""Граф подписок: на кого подписан пользователь.
+
+Множество id авторов, на которых подписан пользователь, читается
+одним запросом по индексу (user, author), хранится в кэше до
+изменения подписок и запоминается на объекте пользователя на время
+запроса, поэтому проверка «подписан ли» для любого числа авторов
+(кнопки в карточках, профиль) – поиск в множестве без запросов.
+Взаимные подписки и число подписчиков тоже считаются по индексам
+Follow и UserStats, без соединений таблиц.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Follow, UserStats
+
+ATTRIBUTE = '_following_ids'
+
+
+def _key(user_id):
+    return f'follow-graph:{user_id}'
+
+
+def following_ids(user):
+    """Множество id авторов, на которых подписан user."""
+    if not user.is_authenticated:
+        return frozenset()
+    ids = getattr(user, ATTRIBUTE, None)
+    if ids is None:
+        ids = cache.get(_key(user.pk))
+    if ids is None:
+        ids = frozenset(Follow.objects.filter(
+            user_id=user.pk
+        ).values_list('author_id', flat=True))
+        cache.set(_key(user.pk), ids, settings.FOLLOW_GRAPH_TIMEOUT)
+    setattr(user, ATTRIBUTE, ids)
+    return ids
+
+
+def is_following(user, author_id):
+    return author_id in following_ids(user)
+
+
+def mutual_ids(user):
+    """id пользователей, с которыми у user взаимная подписка: его
+    подписчики из множества его подписок, по уникальному индексу
+    (author, user)."""
+    ids = following_ids(user)
+    if not ids:
+        return frozenset()
+    return frozenset(Follow.objects.filter(
+        author_id=user.pk, user_id__in=ids
+    ).values_list('user_id', flat=True))
+
+
+def is_mutual(user, author_id):
+    if not is_following(user, author_id):
+        return False
+    return Follow.objects.filter(
+        user_id=author_id, author_id=user.pk
+    ).exists()
+
+
+def follower_counts(author_ids):
+    """Число подписчиков авторов из счетчиков UserStats – одним
+    запросом по первичному ключу."""
+    counts = dict.fromkeys(author_ids, 0)
+    counts.update(UserStats.objects.filter(
+        pk__in=counts
+    ).values_list('pk', 'followers_count'))
+    return counts
+
+
+def invalidate(user_id):
+    """Сбрасывает множество подписок после подписки или отписки.
+
+    Ключ удаляется сразу и еще раз после фиксации транзакции: иначе
+    параллельный запрос мог бы между ними положить в кэш множество без
+    нового изменения.
+    """
+    cache.delete(_key(user_id))
+    transaction.on_commit(lambda: cache.delete(_key(user_id)))
@@ -8,6 +8,17 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def __init__(self, *args, upload_errors=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.upload_errors = upload_errors or {}
+
+    def clean_image(self):
+        """Показывает, почему загрузка отброшена обработчиком."""
+        error = self.upload_errors.get('image')
+        if error:
+            raise forms.ValidationError(error)
+        return self.cleaned_data['image']
+
 
 class CommentForm(forms.ModelForm):
     text = forms.CharField(
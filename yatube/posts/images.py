@@ -0,0 +1,76 @@
+"""Перекодирование загруженных картинок вне веб-воркера.
+
+После сохранения поста его исходная загрузка перекодируется в
+IMAGE_FORMAT (по умолчанию WebP) без EXIF задачей очереди jobs:
+декодирование и сжатие идут в воркере run_jobs, а не в веб-процессе,
+и задача не теряется при перезапуске и повторяется при ошибке.
+"""
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from . import feed_cache, thumbnails, uploads
+from .models import Post
+
+
+def reencode(path, image_format):
+    """Перекодирует файл и возвращает байты; метаданные, кроме
+    цветового профиля, не переносятся."""
+    with Image.open(path) as image:
+        image_format = image_format or image.format
+        options = {}
+        if getattr(image, 'is_animated', False):
+            options['save_all'] = True
+        else:
+            image = ImageOps.exif_transpose(image)
+        if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        image.info.pop('exif', None)
+        icc_profile = image.info.get('icc_profile')
+        if icc_profile:
+            options['icc_profile'] = icc_profile
+        buffer = BytesIO()
+        image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def process(name):
+    """Создает перекодированную копию загрузки, переводит на нее посты
+    и удаляет исходник. Повторный вызов для обработанного файла ничего
+    не делает."""
+    storage = uploads.post_image_storage
+    target = uploads.processed_name(name)
+    if not storage.exists(target):
+        if not storage.exists(name):
+            return
+        data = reencode(storage.path(name), uploads.target_format())
+        target = storage.save_processed(target, ContentFile(data))
+    posts = Post.objects.filter(image=name)
+    affected = list(posts.values_list('author_id', 'group_id'))
+    posts.update(image=target)
+    for author_id, group_id in affected:
+        feed_cache.invalidate_post(author_id, [group_id])
+    storage.delete(name)
+    for geometry_string, options in thumbnails.GEOMETRIES:
+        thumbnails.schedule(target, geometry_string, options)
+
+
+def schedule(name):
+    """Ставит перекодирование загрузки в очередь задач. Возвращает
+    False, если файл уже обработан."""
+    from .tasks import reencode_image
+
+    if not uploads.is_upload(name):
+        return False
+    # Без ключа: одинаковая загрузка после обработки сохраняется под
+    # тем же именем, а задача для обработанного файла ничего не делает.
+    reencode_image.delay(name)
+    return True
+
+
+def schedule_post(post):
+    """Ставит в очередь обработку картинки поста: перекодирование
+    новой загрузки или, если картинка уже готова, ее миниатюры."""
+    if post.image and not schedule(post.image.name):
+        thumbnails.schedule_post(post)
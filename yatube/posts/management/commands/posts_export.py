@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+
+
+def add_transfer_arguments(parser):
+    """Параметры, общие для posts_export и posts_import."""
+    parser.add_argument('directory', help='Каталог с файлами *.jsonl')
+    parser.add_argument(
+        '--tables', nargs='+', choices=transfer.TABLE_NAMES, default=(),
+        help='Только перечисленные таблицы',
+    )
+    parser.add_argument(
+        '--workers', type=int, default=len(transfer.TABLES),
+        help='Сколько таблиц обрабатывать параллельно',
+    )
+    parser.add_argument(
+        '--chunk-size', type=int, default=transfer.CHUNK_SIZE,
+        help='Строк в одной пачке',
+    )
+    parser.add_argument(
+        '--resume', action='store_true',
+        help='Продолжить с сохраненных отметок',
+    )
+
+
+def report(command, counts):
+    command.stdout.write(command.style.SUCCESS(
+        ', '.join(f'{name} – {count}' for name, count in counts.items())
+    ))
+
+
+class Command(BaseCommand):
+    help = ('Выгружает пользователей, группы, посты, комментарии и '
+            'подписки в JSONL, по файлу на таблицу')
+
+    def add_arguments(self, parser):
+        add_transfer_arguments(parser)
+
+    def handle(self, *args, **options):
+        try:
+            counts = transfer.export(
+                options['directory'],
+                tables=options['tables'],
+                workers=options['workers'],
+                chunk_size=options['chunk_size'],
+                resume=options['resume'],
+            )
+        except OSError as error:
+            raise CommandError(error)
+        report(self, counts)
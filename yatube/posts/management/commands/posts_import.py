@@ -0,0 +1,29 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+from posts.management.commands.posts_export import (
+    add_transfer_arguments,
+    report,
+)
+
+
+class Command(BaseCommand):
+    help = ('Загружает выгрузку posts_export пачками через bulk_create '
+            'и пересчитывает счетчики, ленты и поисковый индекс')
+
+    def add_arguments(self, parser):
+        add_transfer_arguments(parser)
+
+    def handle(self, *args, **options):
+        if not os.path.isdir(options['directory']):
+            raise CommandError(f'Нет каталога {options["directory"]}')
+        counts = transfer.load(
+            options['directory'],
+            tables=options['tables'],
+            workers=options['workers'],
+            batch_size=options['chunk_size'],
+            resume=options['resume'],
+        )
+        report(self, counts)
@@ -0,0 +1,42 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:21
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+BATCH_SIZE = 1000
+
+
+def fill_summaries(apps, schema_editor):
+    # Миграция не видит методов модели, поэтому длины повторены здесь.
+    Post = apps.get_model('posts', 'Post')
+    batch = []
+    for post in Post.objects.only('text').iterator(chunk_size=BATCH_SIZE):
+        text = Truncator(post.text)
+        post.title = text.chars(30)
+        post.excerpt = text.chars(300)
+        batch.append(post)
+        if len(batch) == BATCH_SIZE:
+            Post.objects.bulk_update(batch, ['title', 'excerpt'])
+            batch = []
+    Post.objects.bulk_update(batch, ['title', 'excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_auto_20261018_0455'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, verbose_name='Начало текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='title',
+            field=models.TextField(blank=True, editable=False, verbose_name='Заголовок'),
+        ),
+        migrations.RunPython(fill_summaries, migrations.RunPython.noop),
+    ]
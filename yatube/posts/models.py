@@ -1,8 +1,15 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils.text import Truncator
+
+from .uploads import post_image_storage
 
 User = get_user_model()
 
+# Длины заголовка страницы поста и текста карточки в лентах.
+TITLE_LENGTH = 30
+EXCERPT_LENGTH = 300
+
 
 class Group(models.Model):
     title = models.CharField(
@@ -22,6 +29,11 @@ class Group(models.Model):
         verbose_name='Описание',
         help_text='Введите описание сообщества'
     )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число постов'
+    )
 
     def __str__(self):
         return self.title
@@ -32,6 +44,15 @@ class Group(models.Model):
         verbose_name_plural = 'Сообщества'
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты с авторами и группами, загруженными одним запросом.
+        Полный текст не читается: карточке хватает excerpt."""
+        return self.select_related('author', 'group').defer(
+            'text'
+        ).order_by('-pub_date', '-pk')
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name='Текст поста',
@@ -44,7 +65,8 @@ class Post(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name='posts',
-        verbose_name='Автор'
+        verbose_name='Автор',
+        db_index=False
     )
     group = models.ForeignKey(
         Group,
@@ -53,22 +75,69 @@ class Post(models.Model):
         null=True,
         related_name='posts',
         verbose_name='Сообщество',
-        help_text='Группа, к которой будет относиться пост'
+        help_text='Группа, к которой будет относиться пост',
+        db_index=False
     )
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=post_image_storage,
         blank=True
     )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число комментариев'
+    )
+    title = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Заголовок'
+    )
+    excerpt = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Начало текста'
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ['-pub_date']
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        # По индексу на каждую ленту в порядке ее сортировки; индексы
+        # по автору и группе заменяют одиночные индексы внешних ключей.
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_date_idx'),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_date_idx'),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_date_idx'),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    def summarize(self):
+        """Заполняет title и excerpt по тексту так же, как их обрезает
+        фильтр truncatechars. bulk_create не вызывает save(), поэтому
+        при массовой вставке метод вызывается явно."""
+        text = Truncator(self.text)
+        self.title = text.chars(TITLE_LENGTH)
+        self.excerpt = text.chars(EXCERPT_LENGTH)
+
+    def save(self, *args, **kwargs):
+        self.summarize()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'title', 'excerpt'}
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -78,6 +147,7 @@ class Comment(models.Model):
         null=True,
         related_name='comment',
         verbose_name='Пост',
+        db_index=False,
     )
     author = models.ForeignKey(
         User,
@@ -95,6 +165,12 @@ class Comment(models.Model):
         ordering = ['-created']
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            # Страницы комментариев поста по курсору (created, id).
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='comment_post_cursor_idx'),
+        ]
 
     def __str__(self):
         return f'Текст: {self.text[:15]}, автор: {self.author}'
@@ -104,7 +180,8 @@ class Follow(models.Model):
     user = models.ForeignKey(
         User,
         related_name='follower',
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
     author = models.ForeignKey(
         User,
@@ -121,3 +198,74 @@ class Follow(models.Model):
                 fields=['author', 'user'],
                 name='unique_follower')
         ]
+        # Уникальный индекс покрывает поиск подписчиков автора, этот –
+        # поиск авторов, на которых подписан пользователь.
+        indexes = [
+            models.Index(
+                fields=['user', 'author'],
+                name='follow_user_author_idx'),
+        ]
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число постов'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число подписчиков'
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число подписок'
+    )
+
+    class Meta:
+        verbose_name = 'Счетчики пользователя'
+        verbose_name_plural = 'Счетчики пользователей'
+
+    def __str__(self):
+        return f'Счетчики {self.user}'
+
+
+class TimelineEntry(models.Model):
+    """Запись в предрассчитанной ленте подписок пользователя."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_entry')
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_date_idx'),
+        ]
+
+    def __str__(self):
+        return f'Лента {self.user}: пост {self.post_id}'
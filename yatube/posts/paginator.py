@@ -0,0 +1,161 @@
+import base64
+import binascii
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+
+CURSOR_NEXT = 'n'
+CURSOR_PREVIOUS = 'p'
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorPaginator(Paginator):
+    """Паджинатор по ключу (ordering[0], pk) – полям модели или
+    аннотациям запроса.
+
+    Вместо COUNT(*) и OFFSET каждая страница выбирается условием
+    «строго после/до курсора», поэтому стоимость запроса не зависит
+    от глубины страницы. Курсор – непрозрачная строка, в которой
+    закодированы направление и значения ключа крайней записи страницы.
+    Номер страницы (?page=N) поддерживается для совместимости: такая
+    страница выбирается через OFFSET, но без подсчета всех записей.
+    """
+
+    def __init__(self, object_list, per_page, ordering=('-pub_date', '-pk')):
+        self.ordering = ordering
+        super().__init__(object_list.order_by(*ordering), per_page)
+        self._number = 1
+        self._has_next = False
+
+    def __getstate__(self):
+        # Страница кэшируется вместе с паджинатором, а запрос к базе
+        # при сериализации выполнился бы целиком.
+        state = self.__dict__.copy()
+        state['object_list'] = None
+        return state
+
+    @property
+    def num_pages(self):
+        """Известное число страниц: текущая и, если есть, следующая."""
+        return self._number + 1 if self._has_next else self._number
+
+    def get_page(self, number=None, cursor=None):
+        """Возвращает страницу по курсору, а при его отсутствии – по
+        номеру. Некорректные значения дают первую страницу, номер за
+        концом ленты – последнюю."""
+        if cursor:
+            try:
+                return self.page_by_cursor(cursor)
+            except InvalidCursor:
+                pass
+        try:
+            number = max(int(number), 1)
+        except (TypeError, ValueError):
+            number = 1
+        return self.page_by_number(number)
+
+    def page_by_number(self, number):
+        offset = (number - 1) * self.per_page
+        rows = list(self.object_list[offset:offset + self.per_page + 1])
+        if not rows and number > 1:
+            # Номер за концом ленты: как Paginator.get_page, отдаем
+            # последнюю страницу; COUNT(*) нужен только в этом случае.
+            count = self.object_list.count()
+            last = max((count + self.per_page - 1) // self.per_page, 1)
+            if last < number:
+                return self.page_by_number(last)
+        has_next = len(rows) > self.per_page
+        return self._build_page(
+            rows[:self.per_page], number, has_next, has_previous=number > 1
+        )
+
+    def page_by_cursor(self, cursor):
+        direction, values = self.decode_cursor(cursor)
+        forward = direction == CURSOR_NEXT
+        queryset = self.object_list.filter(self._keyset_q(values, forward))
+        if not forward:
+            queryset = queryset.reverse()
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if forward:
+            return self._build_page(rows, 2, has_more, has_previous=True)
+        rows.reverse()
+        return self._build_page(
+            rows, 2 if has_more else 1, True, has_previous=has_more
+        )
+
+    def encode_cursor(self, obj, direction):
+        values = [
+            self._value_to_string(obj, name) for name in self._field_names()
+        ]
+        raw = '|'.join([direction] + values).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        padding = '=' * (-len(cursor) % 4)
+        try:
+            raw = base64.urlsafe_b64decode(cursor + padding).decode()
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise InvalidCursor(cursor)
+        direction, *values = raw.split('|')
+        names = self._field_names()
+        if direction not in (CURSOR_NEXT, CURSOR_PREVIOUS):
+            raise InvalidCursor(cursor)
+        if len(values) != len(names):
+            raise InvalidCursor(cursor)
+        try:
+            return direction, [
+                self._field(name).to_python(value)
+                for name, value in zip(names, values)
+            ]
+        except Exception:
+            raise InvalidCursor(cursor)
+
+    def _build_page(self, rows, number, has_next, has_previous):
+        self._number = number if has_previous else 1
+        self._has_next = has_next
+        page = self._get_page(rows, self._number, self)
+        page.next_cursor = None
+        page.previous_cursor = None
+        if rows and has_next:
+            page.next_cursor = self.encode_cursor(rows[-1], CURSOR_NEXT)
+        if rows and has_previous:
+            page.previous_cursor = self.encode_cursor(
+                rows[0], CURSOR_PREVIOUS
+            )
+        return page
+
+    def _keyset_q(self, values, forward):
+        """Условие «после курсора» для лексикографического ключа."""
+        query = Q()
+        equal = {}
+        for order, value in zip(self.ordering, values):
+            name = order.lstrip('-')
+            descending = order.startswith('-')
+            lookup = 'lt' if descending == forward else 'gt'
+            query |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return query
+
+    def _field_names(self):
+        return [order.lstrip('-') for order in self.ordering]
+
+    def _field(self, name):
+        annotation = self.object_list.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        opts = self.object_list.model._meta
+        return opts.pk if name == 'pk' else opts.get_field(name)
+
+    def _value_to_string(self, obj, name):
+        """Значение ключа записи; ключом может быть и аннотация."""
+        if name in self.object_list.query.annotations:
+            value = getattr(obj, name)
+            return value.isoformat() if hasattr(value, 'isoformat') else (
+                str(value)
+            )
+        return self._field(name).value_to_string(obj)
@@ -0,0 +1,102 @@
+"""Медленные побочные эффекты изменений – счетчики, ленты подписок,
+картинки – ставятся в очередь задач (jobs) и выполняются после
+фиксации транзакции, вне запроса. Кэш лент сбрасывается сразу, чтобы
+следующая же страница показала изменение; задачи, меняющие показанные
+на страницах данные, сбрасывают его еще раз, когда выполнятся."""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import feed_cache, follow_graph, images, tasks
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+@receiver(post_save, sender=User)
+def create_user_stats(sender, instance, created, **kwargs):
+    if created:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_group(sender, instance, **kwargs):
+    instance._previous_group_id = None
+    if instance.pk is not None:
+        instance._previous_group_id = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('group_id', flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Post)
+def count_post(sender, instance, created, **kwargs):
+    if created:
+        tasks.count_post.delay(instance.author_id, instance.group_id, 1)
+        tasks.fan_out.delay(instance.pk)
+    elif instance._previous_group_id != instance.group_id:
+        tasks.move_post.delay(instance._previous_group_id, instance.group_id)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post(sender, instance, **kwargs):
+    tasks.count_post.delay(instance.author_id, instance.group_id, -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    if created:
+        tasks.count_comment.delay(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    tasks.count_comment.delay(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, **kwargs):
+    if created:
+        tasks.count_follow.delay(instance.user_id, instance.author_id, 1)
+        tasks.backfill.delay(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    tasks.count_follow.delay(instance.user_id, instance.author_id, -1)
+    tasks.prune.delay(instance.user_id, instance.author_id)
+
+
+@receiver([post_save, post_delete], sender=Post)
+def invalidate_post_feeds(sender, instance, **kwargs):
+    groups = [instance.group_id, getattr(instance, '_previous_group_id', None)]
+    feed_cache.invalidate_post(instance.author_id, groups)
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_comment_feeds(sender, instance, **kwargs):
+    feed_cache.invalidate_comment(instance.post_id)
+
+
+@receiver([post_save, post_delete], sender=Follow)
+def invalidate_follow_feed(sender, instance, **kwargs):
+    # В профилях обоих пользователей показаны счетчики подписок.
+    feed_cache.bump(
+        feed_cache.follow_feed(instance.user_id),
+        feed_cache.author_feed(instance.user_id),
+        feed_cache.author_feed(instance.author_id),
+    )
+
+
+@receiver([post_save, post_delete], sender=Follow)
+def invalidate_follow_graph(sender, instance, **kwargs):
+    # Не через очередь: кнопка подписки меняется на следующей же странице.
+    follow_graph.invalidate(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=Group)
+def invalidate_group_feeds(sender, instance, **kwargs):
+    feed_cache.bump(feed_cache.INDEX, feed_cache.group_feed(instance.pk))
+
+
+@receiver(post_save, sender=Post)
+def schedule_image_processing(sender, instance, **kwargs):
+    images.schedule_post(instance)
@@ -0,0 +1,90 @@
+"""Фоновые задачи постов: счетчики, ленты подписок, перекодирование
+картинок и миниатюры. Ставятся из signals.py, images.py и
+thumbnails.py. Задача, изменившая показанные на страницах данные,
+сбрасывает кэш этих лент."""
+from jobs.queue import task
+
+from . import counters, feed_cache, images, thumbnails, timeline
+from .models import Comment, Follow, Post
+
+
+def _group_feeds(*group_ids):
+    return [feed_cache.group_feed(pk) for pk in group_ids if pk]
+
+
+@task(atomic=True)
+def count_post(author_id, group_id, delta):
+    counters.post_created(Post(author_id=author_id, group_id=group_id), delta)
+    feed_cache.bump(
+        feed_cache.author_feed(author_id), *_group_feeds(group_id)
+    )
+
+
+@task(atomic=True)
+def move_post(old_group_id, new_group_id):
+    counters.post_moved(old_group_id, new_group_id)
+    feed_cache.bump(*_group_feeds(old_group_id, new_group_id))
+
+
+@task(atomic=True)
+def count_comment(post_id, delta):
+    counters.comment_created(Comment(post_id=post_id), delta)
+    feed_cache.invalidate_comment(post_id)
+
+
+@task(atomic=True)
+def count_follow(user_id, author_id, delta):
+    counters.follow_created(
+        Follow(user_id=user_id, author_id=author_id), delta
+    )
+    # Задача атомарна: проверка видит счетчик после этого изменения,
+    # поэтому переход ниже предела замечает ровно одна отписка.
+    if delta < 0 and timeline.is_demoted(author_id):
+        demote.delay(author_id)
+    feed_cache.bump(
+        feed_cache.author_feed(user_id), feed_cache.author_feed(author_id)
+    )
+
+
+@task
+def demote(author_id):
+    timeline.demote(author_id)
+    feed_cache.invalidate_post(author_id)
+
+
+@task
+def fan_out(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        timeline.fan_out(post)
+        feed_cache.invalidate_post(post.author_id, [post.group_id])
+
+
+@task
+def backfill(user_id, author_id):
+    follow = Follow.objects.filter(user_id=user_id, author_id=author_id)
+    if follow.exists():
+        timeline.backfill(Follow(user_id=user_id, author_id=author_id))
+        feed_cache.bump(feed_cache.follow_feed(user_id))
+
+
+@task
+def prune(user_id, author_id):
+    timeline.prune(Follow(user_id=user_id, author_id=author_id))
+    feed_cache.bump(feed_cache.follow_feed(user_id))
+
+
+@task
+def generate_thumbnail(name, geometry_string, options):
+    thumbnails.generate(name, geometry_string, options)
+    # Страницы с запасным вариантом картинки уже могли попасть в кэш.
+    posts = Post.objects.filter(
+        image=name
+    ).values_list('author_id', 'group_id')
+    for author_id, group_id in posts.distinct():
+        feed_cache.invalidate_post(author_id, [group_id])
+
+
+@task
+def reencode_image(name):
+    images.process(name)
@@ -0,0 +1,17 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from ..cards import CardRenderer
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts):
+    """Карточки постов страницы, см. posts.cards."""
+    return mark_safe(CardRenderer(context).render(context, posts))
+
+
+@register.simple_tag(takes_context=True)
+def post_card(context, post):
+    return post_cards(context, [post])
@@ -0,0 +1,24 @@
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from ..cards import NUMBER_MARKER, WORD_MARKER, UrlTemplate
+
+
+class UrlTemplateTest(SimpleTestCase):
+    """Тестирование заготовок адресов карточек."""
+
+    def test_matches_reverse(self):
+        """Подстановка в заготовку дает тот же адрес, что reverse()."""
+
+        cases = {
+            ('posts:post_detail', NUMBER_MARKER): [1, 10, 987],
+            ('posts:profile', WORD_MARKER): ['user', 'a.b@c+d-e_f', 'ёж'],
+            ('posts:group_list', WORD_MARKER): ['slug-1', 'Test_2'],
+        }
+        for (viewname, marker), values in cases.items():
+            url = UrlTemplate(viewname, marker)
+            for value in values:
+                with self.subTest(viewname=viewname, value=value):
+                    self.assertEqual(
+                        url(value), reverse(viewname, args=[value])
+                    )
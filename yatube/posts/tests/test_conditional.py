@@ -0,0 +1,117 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from core.testing import OnCommitMixin
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTest(OnCommitMixin, TestCase):
+    """Тестирование ответов 304 для лент и страницы поста."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            description='Тестовое описание',
+            slug='test-slug',
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.guest = Client()
+        self.post = Post.objects.create(
+            author=self.author, text='Тестовый пост', group=self.group
+        )
+        self.urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        ]
+
+    def revalidate(self, client, url):
+        response = client.get(url)
+        return client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_unchanged_pages_are_not_rendered(self):
+        """Неизмененная страница отдается как 304 без запросов страницы
+        и рендеринга."""
+
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.guest.get(url)['ETag']
+                with self.assertNumQueries(0 if url == '/' else 1):
+                    response = self.guest.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.templates, [])
+
+    def test_changes_invalidate_validators(self):
+        """Новый комментарий и подписка меняют ETag страниц."""
+
+        detail, profile = self.urls[3], self.urls[2]
+        etags = {url: self.guest.get(url)['ETag'] for url in self.urls}
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(
+                post=self.post, author=self.reader, text='Да'
+            )
+            Follow.objects.create(user=self.reader, author=self.author)
+
+        for url in (detail, profile, self.urls[0], self.urls[1]):
+            with self.subTest(url=url):
+                response = self.guest.get(url, HTTP_IF_NONE_MATCH=etags[url])
+                self.assertEqual(response.status_code, 200)
+
+    def test_validators_depend_on_user(self):
+        """ETag зависит от пользователя; Last-Modified не отдается, а
+        If-Modified-Since не дает 304."""
+
+        url = self.urls[0]
+        reader = Client()
+        reader.force_login(self.reader)
+        guest_response = self.guest.get(url)
+        reader_response = reader.get(url)
+
+        self.assertNotEqual(guest_response['ETag'], reader_response['ETag'])
+        self.assertFalse(guest_response.has_header('Last-Modified'))
+        self.assertFalse(reader_response.has_header('Last-Modified'))
+        self.assertEqual(self.revalidate(reader, url).status_code, 304)
+        response = reader.get(
+            url, HTTP_IF_NONE_MATCH=guest_response['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+
+        response = self.guest.get(
+            url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    @override_settings(JOBS_EAGER=False)
+    def test_pages_change_before_jobs_run(self):
+        """Новый пост и подписка меняют страницы сразу, не дожидаясь
+        воркера очереди задач."""
+
+        profile = self.urls[2]
+        author = Client()
+        author.force_login(self.author)
+        etag = author.get(profile)['ETag']
+        author.post(reverse('posts:post_create'), {'text': 'Свежий пост'})
+        response = author.get(profile, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Свежий пост')
+
+        reader = Client()
+        reader.force_login(self.reader)
+        etag = reader.get(profile)['ETag']
+        reader.get(
+            reverse('posts:profile_follow', args=[self.author.username])
+        )
+        response = reader.get(profile, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
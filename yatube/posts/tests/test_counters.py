@@ -0,0 +1,132 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from core.testing import OnCommitMixin
+
+from ..models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+
+class CountersTest(OnCommitMixin, TestCase):
+    """Тестирование денормализованных счетчиков."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            description='Тестовое описание',
+            slug='test-slug',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            description='Тестовое описание',
+            slug='other-slug',
+        )
+
+    def setUp(self) -> None:
+        self.client = Client()
+        self.client.force_login(self.reader)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post = Post.objects.create(
+                author=self.user,
+                text='Тестовый пост',
+                group=self.group,
+            )
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_post_counters(self):
+        """Создание, перенос и удаление поста меняют счетчики
+        автора и групп."""
+
+        self.group.refresh_from_db()
+        self.assertEqual(self.stats(self.user).posts_count, 1)
+        self.assertEqual(self.group.posts_count, 1)
+
+        self.post.group = self.other_group
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.save()
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertEqual(self.other_group.posts_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.delete()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.stats(self.user).posts_count, 0)
+        self.assertEqual(self.other_group.posts_count, 0)
+
+    def test_comment_counter(self):
+        """Комментарий через view увеличивает счетчик поста,
+        удаление – уменьшает."""
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('posts:add_comment', args=[self.post.pk]),
+                {'text': 'Комментарий'},
+            )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.filter(post=self.post).delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+
+    def test_follow_counters(self):
+        """Подписка и отписка меняют счетчики обеих сторон."""
+
+        url = reverse('posts:profile_follow', args=[self.user.username])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(url)
+            self.client.get(url)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        self.assertEqual(self.stats(self.user).followers_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(
+                reverse('posts:profile_unfollow', args=[self.user.username])
+            )
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+        self.assertEqual(self.stats(self.user).followers_count, 0)
+
+    def test_cascade_delete_updates_counters(self):
+        """Удаление пользователя каскадно уменьшает чужие счетчики."""
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reader = User.objects.create_user(username='leaving')
+            Follow.objects.create(user=reader, author=self.user)
+            Comment.objects.create(post=self.post, author=reader, text='Ок')
+        self.assertEqual(self.stats(self.user).followers_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reader.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+        self.assertEqual(self.stats(self.user).followers_count, 0)
+
+    def test_rebuild_counters_command(self):
+        """Команда rebuild_counters исправляет разъехавшиеся счетчики."""
+
+        Follow.objects.create(user=self.reader, author=self.user)
+        Comment.objects.create(post=self.post, author=self.reader, text='Ок')
+        Post.objects.update(comment_count=42)
+        UserStats.objects.update(posts_count=7, followers_count=7)
+        UserStats.objects.filter(user=self.reader).delete()
+
+        call_command('rebuild_counters', stdout=StringIO())
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        self.assertEqual(self.stats(self.user).posts_count, 1)
+        self.assertEqual(self.stats(self.user).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
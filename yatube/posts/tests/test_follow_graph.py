@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.testing import OnCommitMixin
+
+from .. import follow_graph
+from ..models import Follow
+
+User = get_user_model()
+
+
+class FollowGraphTest(OnCommitMixin, TestCase):
+    """Тестирование графа подписок."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.reader = User.objects.create_user(username='reader')
+        self.authors = [
+            User.objects.create_user(username=f'author{number}')
+            for number in range(3)
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            for author in self.authors[:2]:
+                Follow.objects.create(user=self.reader, author=author)
+
+    def fresh_reader(self):
+        return User.objects.get(pk=self.reader.pk)
+
+    def test_membership_is_loaded_once(self):
+        """Множество подписок читается одним запросом, дальше – из
+        объекта пользователя и из кэша."""
+
+        reader = self.fresh_reader()
+        with self.assertNumQueries(1):
+            checks = [
+                follow_graph.is_following(reader, author.pk)
+                for author in self.authors
+            ]
+        self.assertEqual(checks, [True, True, False])
+        reader = self.fresh_reader()
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                follow_graph.is_following(reader, self.authors[0].pk)
+            )
+
+    def test_follow_and_unfollow_invalidate(self):
+        """Подписка и отписка сразу видны на странице профиля."""
+
+        follow_graph.following_ids(self.fresh_reader())
+        client = Client()
+        client.force_login(self.reader)
+        author = self.authors[2]
+        profile = reverse('posts:profile', args=[author.username])
+
+        client.get(reverse('posts:profile_follow', args=[author.username]))
+        self.assertTrue(client.get(profile).context['following'])
+
+        client.get(reverse('posts:profile_unfollow', args=[author.username]))
+        self.assertFalse(client.get(profile).context['following'])
+        self.assertNotIn(
+            author.pk, follow_graph.following_ids(self.fresh_reader())
+        )
+
+    def test_mutual_and_follower_counts(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(user=self.authors[1], author=self.reader)
+            Follow.objects.create(user=self.authors[2], author=self.reader)
+        reader = self.fresh_reader()
+        follow_graph.following_ids(reader)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(
+                follow_graph.mutual_ids(reader), {self.authors[1].pk}
+            )
+        # Подписки берутся из уже загруженного множества, без подзапроса.
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(queries[0]['sql'].count('SELECT'), 1)
+        self.assertTrue(follow_graph.is_mutual(reader, self.authors[1].pk))
+        self.assertFalse(follow_graph.is_mutual(reader, self.authors[0].pk))
+        self.assertFalse(follow_graph.is_mutual(reader, self.authors[2].pk))
+        self.assertEqual(
+            follow_graph.follower_counts(
+                [self.reader.pk, self.authors[0].pk, 0]
+            ),
+            {self.reader.pk: 2, self.authors[0].pk: 1, 0: 0},
+        )
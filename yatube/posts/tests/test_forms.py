@@ -1,3 +1,4 @@
+import hashlib
 import shutil
 import tempfile
 
@@ -40,6 +41,9 @@ class FormTest(TestCase):
             content=small_gif,
             content_type='image/gif'
         )
+        # Картинки хранятся под именем из хеша содержимого
+        digest = hashlib.sha256(small_gif).hexdigest()
+        cls.image_name = f'posts/uploads/{digest[:2]}/{digest}.gif'
 
         cls.post = Post.objects.create(
             text='test_post',
@@ -79,7 +83,7 @@ class PostFormTest(FormTest):
                     kwargs={'username': f'{self.user_noname}'})
         )
         self.assertEqual(post.text, text)
-        self.assertEqual(str(post.image), 'posts/' + str(self.uploaded))
+        self.assertEqual(str(post.image), self.image_name)
 
     def test_form_edit_post(self):
         """Проверяет, что при отправке формы редактирования поста сохраняются
@@ -0,0 +1,94 @@
+import re
+
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+from ..paginator import CURSOR_NEXT, CursorPaginator
+from ..views import COMMENTS_ORDERING
+
+User = get_user_model()
+# Полный проход по таблице и сортировка во временном B-дереве.
+FULL_SCAN = re.compile(r'^SCAN (?!.*\bUSING\b)|USE TEMP B-TREE')
+
+
+class FeedIndexTest(TestCase):
+    """Проверяет по EXPLAIN QUERY PLAN, что запросы лент идут по
+    индексам, без полного прохода по таблицам и сортировки."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='indexes', description='Описание'
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group, text=f'Пост {i}')
+            for i in range(15)
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост с комментарием'
+        )
+        Comment.objects.create(post=cls.post, author=cls.author, text='Да')
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def plans(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT'):
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                yield sql, [row[-1] for row in cursor.fetchall()]
+
+    def next_page(self, url):
+        response = self.client.get(url)
+        return f'{url}?cursor={response.context["page_obj"].next_cursor}'
+
+    def comments_page(self):
+        paginator = CursorPaginator(
+            Comment.objects.all(), 1, COMMENTS_ORDERING
+        )
+        cursor = paginator.encode_cursor(
+            Comment.objects.get(post=self.post), CURSOR_NEXT
+        )
+        url = reverse('posts:post_comments', args=[self.post.pk])
+        return f'{url}?cursor={cursor}'
+
+    def test_feeds_use_indexes(self):
+        """Ленты, их следующие страницы и страница поста читаются
+        по индексам."""
+
+        feeds = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:follow_index'),
+        )
+        urls = [
+            *feeds,
+            *(self.next_page(url) for url in feeds),
+            reverse('posts:index') + '?page=2',
+            reverse('posts:post_detail', args=[self.post.pk]),
+            self.comments_page(),
+        ]
+        cache.clear()
+        for url in urls:
+            for sql, plan in self.plans(url):
+                with self.subTest(url=url, sql=sql):
+                    self.assertFalse(
+                        [step for step in plan if FULL_SCAN.search(step)],
+                        plan,
+                    )
@@ -1,5 +1,8 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.template.defaultfilters import truncatechars
 from django.test import TestCase
+from django.urls import reverse
 
 from ..models import Post, Group
 
@@ -91,3 +94,32 @@ class PostModelTest(TestCase):
                 self.assertEqual(
                     group._meta.get_field(field).help_text, expected_value
                 )
+
+
+class PostSummaryTest(TestCase):
+    """Тестирование заголовка и начала текста поста."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.post = Post.objects.create(author=self.user, text='Слово ' * 100)
+
+    def test_summary_matches_truncatechars(self):
+        """title и excerpt совпадают с прежним выводом truncatechars
+        и обновляются вместе с текстом."""
+
+        for text in ('Короткий', 'Длинный текст ' * 50):
+            with self.subTest(text=text[:20]):
+                self.post.text = text
+                self.post.save(update_fields=['text'])
+                self.post.refresh_from_db()
+                self.assertEqual(self.post.title, truncatechars(text, 30))
+                self.assertEqual(self.post.excerpt, truncatechars(text, 300))
+
+    def test_feed_does_not_read_text(self):
+        """Лента не читает полный текст поста."""
+
+        response = self.client.get(reverse('posts:index'))
+        post = response.context['page_obj'][0]
+        self.assertIn('text', post.get_deferred_fields())
+        self.assertContains(response, self.post.excerpt)
@@ -0,0 +1,89 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from sorl.thumbnail import get_thumbnail
+
+from jobs import queue
+from jobs.models import Job
+
+from .. import feed_cache, thumbnails
+from ..models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, JOBS_EAGER=False)
+class DeferredThumbnailTest(TestCase):
+    """Тестирование фоновой подготовки миниатюр."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        cache.clear()
+        author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(
+            author=author,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        )
+        # Перекодирование загрузки, поставленное при сохранении поста,
+        # здесь не проверяется.
+        Job.objects.all().delete()
+        geometry, self.options = thumbnails.GEOMETRIES[0]
+        self.geometry = geometry
+
+    def test_missing_thumbnail_is_not_scheduled_on_read(self):
+        """Недостающая миниатюра не создается и не ставится в очередь
+        при чтении страницы."""
+
+        for _ in range(2):
+            self.assertIsNone(
+                get_thumbnail(self.post.image, self.geometry, **self.options)
+            )
+        self.assertFalse(Job.objects.exists())
+
+    def test_scheduled_thumbnail_invalidates_feeds(self):
+        """Миниатюра из очереди отдается, а ленты с постом сбрасываются,
+        чтобы страницы с запасным вариантом не оставались в кэше."""
+
+        feed = feed_cache.author_feed(self.post.author_id)
+        before = feed_cache.generations([feed])
+        thumbnails.schedule_post(self.post)
+        thumbnails.schedule_post(self.post)
+        self.assertEqual(
+            Job.objects.filter(name__endswith='generate_thumbnail').count(), 1
+        )
+
+        queue.run_pending()
+        self.assertIsNotNone(
+            get_thumbnail(self.post.image, self.geometry, **self.options)
+        )
+        self.assertNotEqual(feed_cache.generations([feed]), before)
+
+    def test_generated_thumbnail_is_served(self):
+        """Созданная воркером миниатюра отдается из хранилища ключей."""
+
+        thumbnails.generate(self.post.image.name, self.geometry, self.options)
+
+        thumbnail = get_thumbnail(
+            self.post.image, self.geometry, **self.options
+        )
+        self.assertIsNotNone(thumbnail)
+        self.assertTrue(thumbnail.exists())
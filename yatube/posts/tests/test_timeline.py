@@ -0,0 +1,118 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from core.testing import OnCommitMixin
+
+from .. import timeline
+from ..models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTest(OnCommitMixin, TestCase):
+    """Тестирование предрассчитанной ленты подписок."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self) -> None:
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def feed(self):
+        response = self.client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        """Новый пост попадает в ленты подписчиков автора."""
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(user=self.reader, author=self.author)
+            post = Post.objects.create(author=self.author, text='Новый пост')
+
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertEqual(self.feed(), [post])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Подписка дозаполняет ленту, отписка очищает ее."""
+
+        post = Post.objects.create(author=self.author, text='Старый пост')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(
+                reverse('posts:profile_follow', args=[self.author.username])
+            )
+        self.assertEqual(self.feed(), [post])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse(
+                'posts:profile_unfollow', args=[self.author.username]
+            ))
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+        self.assertEqual(self.feed(), [])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_popular_author_posts_are_pulled(self):
+        """Посты популярного автора не раскладываются, но видны
+        в ленте подписчика."""
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(user=self.reader, author=self.author)
+            post = Post.objects.create(
+                author=self.author, text='Популярный пост'
+            )
+
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.assertEqual(self.feed(), [post])
+
+    def test_demoted_author_posts_are_fanned_out(self):
+        """Посты, написанные автором в популярности, остаются в ленте
+        подписчика, когда подписчиков становится меньше предела."""
+
+        other = User.objects.create_user(username='other')
+        with override_settings(TIMELINE_FANOUT_LIMIT=2):
+            with self.captureOnCommitCallbacks(execute=True):
+                Follow.objects.create(user=self.reader, author=self.author)
+                Follow.objects.create(user=other, author=self.author)
+            with self.captureOnCommitCallbacks(execute=True):
+                post = Post.objects.create(
+                    author=self.author, text='Популярный пост'
+                )
+            self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+
+            with self.captureOnCommitCallbacks(execute=True):
+                Follow.objects.filter(user=other).delete()
+
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertEqual(self.feed(), [post])
+
+    def test_rebuild_skips_popular_authors(self):
+        """Перестроение раскладывает последние посты обычных авторов и
+        пропускает популярных."""
+
+        other = User.objects.create_user(username='other')
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(user=self.reader, author=self.author)
+            Follow.objects.create(user=other, author=self.author)
+            Follow.objects.create(user=self.author, author=other)
+        posts = [
+            Post.objects.create(author=author, text='Пост')
+            for author in (self.author, other, other)
+        ]
+
+        with override_settings(
+            TIMELINE_FANOUT_LIMIT=2, TIMELINE_BACKFILL_SIZE=1
+        ):
+            timeline.rebuild()
+
+        self.assertEqual(
+            list(TimelineEntry.objects.values_list('user', 'post')),
+            [(self.author.pk, posts[2].pk)],
+        )
@@ -0,0 +1,162 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from search import index
+
+from .. import transfer
+from ..models import Comment, Follow, Group, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TransferTest(TestCase):
+    """Тестирование выгрузки и загрузки данных в JSONL."""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.posts = [
+            Post.objects.create(
+                author=self.author, group=self.group, text=f'Пост {number}'
+            )
+            for number in range(5)
+        ]
+        self.old_date = timezone.now() - timedelta(days=30)
+        Post.objects.filter(pk=self.posts[0].pk).update(
+            pub_date=self.old_date
+        )
+        Comment.objects.create(
+            post=self.posts[0], author=self.reader, text='Комментарий'
+        )
+
+    def lines(self, table):
+        path = os.path.join(self.directory, f'{table}.jsonl')
+        with open(path, encoding='utf-8') as file:
+            return [json.loads(line) for line in file]
+
+    def wipe(self):
+        for model in (Comment, Follow, Post, Group, User):
+            model.objects.all().delete()
+
+    def test_round_trip(self):
+        """Выгрузка и загрузка сохраняют ключи и даты, а счетчики,
+        ленты и поисковый индекс строятся заново."""
+
+        call_command('posts_export', self.directory, '--chunk-size=2',
+                     '--workers=1',
+                     stdout=StringIO())
+        self.assertEqual(len(self.lines('posts')), 5)
+        self.wipe()
+
+        call_command('posts_import', self.directory, '--chunk-size=2',
+                     stdout=StringIO())
+
+        self.assertEqual(
+            sorted(Post.objects.values_list('pk', flat=True)),
+            sorted(post.pk for post in self.posts),
+        )
+        post = Post.objects.get(pk=self.posts[0].pk)
+        self.assertEqual(post.pub_date, self.old_date)
+        self.assertEqual(post.excerpt, post.text)
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(Group.objects.get().posts_count, 5)
+        self.assertEqual(
+            User.objects.get(username='author').stats.followers_count, 1
+        )
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 5
+        )
+        self.assertIn(post.pk, index.search('Комментарий', 10))
+
+    def test_export_resumes_after_interruption(self):
+        """Повторная выгрузка отрезает оборванную строку и дописывает
+        только новые записи."""
+
+        transfer.export(self.directory, tables=['posts'], chunk_size=2)
+        with open(os.path.join(self.directory, 'posts.jsonl'), 'a') as file:
+            file.write('{"id": 9')
+        new_post = Post.objects.create(author=self.author, text='Новый')
+
+        counts = transfer.export(
+            self.directory, tables=['posts'], chunk_size=2, resume=True
+        )
+
+        self.assertEqual(counts, {'posts': 1})
+        self.assertEqual(
+            [row['id'] for row in self.lines('posts')],
+            [post.pk for post in self.posts] + [new_post.pk],
+        )
+
+    def test_import_skips_checkpointed_rows(self):
+        """Загрузка с отметки пропускает уже загруженные строки."""
+
+        transfer.export(self.directory)
+        Post.objects.all().delete()
+        checkpoint = transfer.Checkpoint(
+            os.path.join(self.directory, transfer.IMPORT_CHECKPOINT)
+        )
+        checkpoint.set('posts', 2)
+
+        counts = transfer.load(
+            self.directory, tables=['posts'], resume=True
+        )
+
+        self.assertEqual(counts, {'posts': 3})
+        self.assertEqual(
+            sorted(Post.objects.values_list('pk', flat=True)),
+            [post.pk for post in self.posts[2:]],
+        )
+
+    def test_import_resumes_past_blank_lines(self):
+        """Отметка считает только непустые строки, поэтому пустые
+        строки в файле не сдвигают место продолжения."""
+
+        transfer.export(self.directory, tables=['posts'])
+        path = os.path.join(self.directory, 'posts.jsonl')
+        with open(path, encoding='utf-8') as file:
+            lines = file.readlines()
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('\n' + '\n'.join(lines))
+        Post.objects.all().delete()
+        transfer.Checkpoint(
+            os.path.join(self.directory, transfer.IMPORT_CHECKPOINT)
+        ).set('posts', 2)
+
+        transfer.load(self.directory, tables=['posts'], resume=True)
+
+        self.assertEqual(
+            sorted(Post.objects.values_list('pk', flat=True)),
+            [post.pk for post in self.posts[2:]],
+        )
+
+    def test_import_rebuilds_only_dependent_data(self):
+        """Загрузка одних групп не перестраивает ленты подписок."""
+
+        transfer.export(self.directory, tables=['groups'])
+        transfer.rebuild_derived()
+        TimelineEntry.objects.filter(post=self.posts[0]).delete()
+
+        transfer.load(self.directory, tables=['groups'])
+
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 4
+        )
+
+    def test_unknown_table(self):
+        with self.assertRaises(ValueError):
+            transfer.export(self.directory, tables=['likes'])
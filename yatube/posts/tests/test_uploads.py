@@ -0,0 +1,128 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from jobs.models import Job
+
+from .. import images, uploads
+from ..models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(image_format='PNG', size=(50, 50), **options):
+    buffer = BytesIO()
+    Image.new('RGB', size, (200, 0, 0)).save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageUploadTest(TestCase):
+    """Тестирование приема и обработки картинок постов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def create_post(self, text, content, name='image.png'):
+        return self.client.post(reverse('posts:post_create'), {
+            'text': text,
+            'image': SimpleUploadedFile(name, content, 'image/png'),
+        })
+
+    def test_oversized_uploads_are_rejected(self):
+        """Слишком большой файл или картинка отбрасываются с ошибкой
+        формы, пост не создается."""
+
+        cases = (
+            ({'IMAGE_UPLOAD_MAX_SIZE': 100}, 'Размер файла'),
+            ({'IMAGE_UPLOAD_MAX_PIXELS': 100}, 'пикселей'),
+        )
+        for limits, message in cases:
+            with self.subTest(limits=limits), override_settings(**limits):
+                response = self.create_post('Большая картинка', make_image())
+
+                self.assertFalse(Post.objects.exists())
+                errors = response.context['form'].errors['image']
+                self.assertIn(message, errors[0])
+
+    def test_large_metadata_before_dimensions_is_accepted(self):
+        """Снимок с большим ICC-профилем перед размерами принимается."""
+
+        content = make_image('JPEG', icc_profile=bytes(300 * 1024))
+        self.create_post('Снимок', content, 'photo.jpg')
+
+        self.assertTrue(Post.objects.exists())
+
+    def test_csrf_is_checked_after_handlers_are_set(self):
+        """Представление с ограниченными загрузками проверяет CSRF."""
+
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        response = client.post(reverse('posts:post_create'), {
+            'text': 'Без токена',
+            'image': SimpleUploadedFile('image.png', make_image()),
+        })
+
+        self.assertTemplateUsed(response, 'core/403csrf.html')
+        self.assertFalse(Post.objects.exists())
+
+    def test_identical_uploads_share_file(self):
+        """Одинаковые картинки хранятся в одном файле."""
+
+        content = make_image()
+        self.create_post('Первый', content)
+        self.create_post('Второй', content)
+
+        first, second = Post.objects.order_by('pk')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(uploads.is_upload(first.image.name))
+        directory = os.path.dirname(first.image.path)
+        self.assertEqual(len(os.listdir(directory)), 1)
+
+    def test_processing_strips_exif_and_moves_posts(self):
+        """Перекодированная копия без EXIF заменяет исходник у постов."""
+
+        exif = Image.Exif()
+        exif[0x010E] = 'секретное описание'
+        self.create_post('С EXIF', make_image('JPEG', exif=exif), 'photo.jpg')
+        post = Post.objects.get()
+        original = post.image.name
+
+        images.process(original)
+
+        post.refresh_from_db()
+        self.assertEqual(post.image.name, uploads.processed_name(original))
+        self.assertFalse(uploads.post_image_storage.exists(original))
+        with Image.open(post.image.path) as image:
+            self.assertNotIn('exif', image.info)
+
+    @override_settings(JOBS_EAGER=False)
+    def test_processing_is_queued(self):
+        """Перекодирование новой загрузки ставится в очередь задач."""
+
+        self.create_post('В очередь', make_image())
+        post = Post.objects.get()
+
+        job = Job.objects.get(name__endswith='reencode_image')
+        self.assertEqual(job.args, f'["{post.image.name}"]')
@@ -1,3 +1,4 @@
+import hashlib
 import shutil
 import tempfile
 
@@ -6,11 +7,21 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase, Client, override_settings
+from django.db import connection, transaction
+from django.test import (
+    TestCase,
+    TransactionTestCase,
+    Client,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from ..models import Post, Group, Follow
-from ..views import NUMBER_OF_POSTS
+from core.testing import OnCommitMixin
+
+from .. import feed_cache
+from ..models import Comment, Post, Group, Follow
+from ..views import NUMBER_OF_COMMENTS, NUMBER_OF_POSTS
 
 User = get_user_model()
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
@@ -49,6 +60,9 @@ class PostViewsBaseTest(TestCase):
             content=small_gif,
             content_type='image/gif'
         )
+        # Картинки хранятся под именем из хеша содержимого
+        digest = hashlib.sha256(small_gif).hexdigest()
+        cls.image_name = f'posts/uploads/{digest[:2]}/{digest}.gif'
 
         cls.group = Group.objects.create(
             title='Тестовая группа',
@@ -111,7 +125,7 @@ class PostContextTest(PostViewsBaseTest):
         self.assertEqual(str(post.author), 'auth', )
         self.assertEqual(str(post.group), 'Тестовая группа'),
         self.assertEqual(
-            str(post.image), 'posts/' + self.uploaded.name
+            str(post.image), self.image_name
         )
 
     def test_index_group_profile_pages_show_correct_context(self):
@@ -141,7 +155,7 @@ class PostContextTest(PostViewsBaseTest):
                 self.assertEqual(str(obj.author), 'auth', )
                 self.assertEqual(str(obj.group), 'Тестовая группа'),
                 self.assertEqual(
-                    str(obj.image), 'posts/' + self.uploaded.name
+                    str(obj.image), self.image_name
                 )
 
 
@@ -178,6 +192,189 @@ class PaginatorViewTest(PostViewsBaseTest):
         self.assertEqual(numbers_of_post, expected_numbers)
 
 
+class CursorPaginatorViewTest(PostViewsBaseTest):
+    """Класс для проверки курсорной паджинации"""
+
+    def setUp(self) -> None:
+        self.client = Client()
+        [Post.objects.create(
+            author=self.user,
+            text=f'Тестовый пост_{i}',
+            group=self.group,
+        ) for i in range(15)]
+
+    def test_cursor_pages_cover_feed_without_count(self):
+        """Переход по курсорам обходит всю ленту без COUNT(*)"""
+
+        url = reverse('posts:index')
+        seen = []
+        cursor = None
+        with CaptureQueriesContext(connection) as queries:
+            while True:
+                cache.clear()
+                params = {'cursor': cursor} if cursor else {}
+                page_obj = self.client.get(url, params).context['page_obj']
+                seen.extend(post.pk for post in page_obj)
+                cursor = page_obj.next_cursor
+                if cursor is None:
+                    break
+
+        expected = list(Post.objects.order_by('-pub_date', '-pk')
+                        .values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+        for query in queries.captured_queries:
+            self.assertFalse(query['sql'].startswith(
+                'SELECT COUNT(*) AS "__count" FROM "posts_post"'
+            ))
+
+    def test_previous_cursor_returns_previous_page(self):
+        """Курсор назад возвращает предыдущую страницу"""
+
+        url = reverse('posts:index')
+        first = self.client.get(url).context['page_obj']
+        second = self.client.get(
+            url, {'cursor': first.next_cursor}
+        ).context['page_obj']
+        back = self.client.get(
+            url, {'cursor': second.previous_cursor}
+        ).context['page_obj']
+
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+        self.assertTrue(second.has_previous())
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Некорректный курсор отдает первую страницу"""
+
+        url = reverse('posts:index')
+        first = self.client.get(url).context['page_obj']
+        broken = self.client.get(
+            url, {'cursor': 'not-a-cursor'}
+        ).context['page_obj']
+
+        self.assertEqual(list(broken), list(first))
+
+    def test_page_past_the_end_returns_last_page(self):
+        """Номер страницы за концом ленты отдает последнюю страницу"""
+
+        url = reverse('posts:index')
+        last = self.client.get(url, {'page': 2}).context['page_obj']
+        cache.clear()
+        past = self.client.get(url, {'page': 50}).context['page_obj']
+
+        self.assertTrue(past.object_list)
+        self.assertEqual(list(past), list(last))
+        self.assertEqual(past.number, 2)
+        self.assertTrue(past.has_previous())
+        self.assertFalse(past.has_next())
+
+
+class FeedQueryCountTest(TestCase):
+    """Проверка, что число запросов ленты не зависит от числа постов"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            description='Тестовое описание',
+            slug='test-slug',
+        )
+        Follow.objects.create(
+            user=User.objects.create_user(username='follower'),
+            author=cls.user,
+        )
+
+    def setUp(self) -> None:
+        self.client = Client()
+        self.follower_client = Client()
+        self.follower_client.force_login(
+            User.objects.get(username='follower')
+        )
+
+    def create_posts(self, count):
+        for i in range(count):
+            post = Post.objects.create(
+                author=self.user,
+                text=f'Тестовый пост_{i}',
+                group=self.group,
+            )
+            Comment.objects.create(post=post, author=self.user, text='Ок')
+
+    def count_queries(self, client, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            client.get(url)
+        return len(queries)
+
+    def test_feed_query_count_does_not_depend_on_page_size(self):
+        """Лента из 1 и из 10 постов строится одинаковым числом запросов"""
+
+        urls = (
+            (self.client, reverse('posts:index')),
+            (self.client, reverse('posts:group_list', args=['test-slug'])),
+            (self.client, reverse('posts:profile', args=['reader'])),
+            (self.follower_client, reverse('posts:follow_index')),
+        )
+        self.create_posts(1)
+        single = [self.count_queries(client, url) for client, url in urls]
+        self.create_posts(NUMBER_OF_POSTS - 1)
+
+        for (client, url), expected in zip(urls, single):
+            with self.subTest(url=url):
+                cache.clear()
+                with self.assertNumQueries(expected):
+                    client.get(url)
+
+
+class CommentPaginationTest(TestCase):
+    """Тестирование страниц комментариев поста."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        readers = [
+            User.objects.create_user(username=f'reader{i}') for i in range(5)
+        ]
+        for number in range(NUMBER_OF_COMMENTS + 5):
+            Comment.objects.create(
+                post=cls.post,
+                author=readers[number % len(readers)],
+                text=f'Комментарий {number}',
+            )
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_comments_are_paginated(self):
+        """Страница поста показывает первую страницу комментариев,
+        фрагмент по курсору – следующую, без повторов."""
+
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        with self.assertNumQueries(3):
+            comments = self.client.get(url).context['comments']
+        self.assertEqual(len(comments), NUMBER_OF_COMMENTS)
+        self.assertEqual(comments[0].text, f'Комментарий {len(comments) + 4}')
+
+        url = reverse('posts:post_comments', args=[self.post.pk])
+        response = self.client.get(f'{url}?cursor={comments.next_cursor}')
+        rest = response.context['comments']
+        self.assertTemplateUsed(
+            response, 'posts/includes/comment_list.html'
+        )
+        self.assertEqual(
+            [comment.text for comment in rest],
+            [f'Комментарий {number}' for number in range(4, -1, -1)],
+        )
+        self.assertIsNone(rest.next_cursor)
+        self.assertNotContains(response, 'data-comments-more')
+
+    def test_missing_post_comments(self):
+        url = reverse('posts:post_comments', args=[self.post.pk + 1])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
 class PostTemplatesTest(PostViewsBaseTest):
     """Класс для проверки корректности используемых шаблонов"""
 
@@ -232,10 +429,11 @@ class PostCreatingTest(PostViewsBaseTest):
         self.assertNotIn(self.post, context)
 
 
-class CacheTest(TestCase):
+class CacheTest(OnCommitMixin, TestCase):
     """Проверка кэширования"""
 
     def setUp(self) -> None:
+        cache.clear()
         self.client = Client()
         self.user = User.objects.create_user(username='user_noname')
         self.post = Post.objects.create(
@@ -244,23 +442,96 @@ class CacheTest(TestCase):
         )
 
     def test_cache_index(self):
-        """Проверка кэширования главной страницы"""
+        """Главная страница отдается из кэша, пока посты не изменились"""
 
         url = reverse('posts:index')
 
         response = self.client.get(url).content
-        Post.objects.all().delete()
+        with CaptureQueriesContext(connection) as queries:
+            response_cached = self.client.get(url).content
+
+        self.assertEqual(response, response_cached)
+        self.assertEqual(len(queries), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.all().delete()
         response_upd = self.client.get(url).content
 
-        self.assertEqual(response, response_upd)
+        self.assertNotEqual(response, response_upd)
+        self.assertNotContains(self.client.get(url), 'Тестовый пост')
+
+    def test_comment_invalidates_feeds(self):
+        """Новый комментарий сбрасывает кэш лент с постом"""
+
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:profile', args=[self.user.username]),
+        )
+        for url in urls:
+            self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(
+                post=self.post, author=self.user, text='Ок'
+            )
+
+        for url in urls:
+            with self.subTest(url=url):
+                page_obj = self.client.get(url).context['page_obj']
+                self.assertEqual(page_obj[0].comment_count, 1)
+
+    def test_profiles_are_cached_separately(self):
+        """У каждого профиля своя запись в кэше"""
+
+        other = User.objects.create_user(username='other')
+        Post.objects.create(text='Пост другого автора', author=other)
+
+        self.client.get(reverse('posts:profile', args=[self.user.username]))
+        response = self.client.get(reverse('posts:profile', args=['other']))
 
+        self.assertContains(response, 'Пост другого автора')
+        self.assertNotContains(response, 'Тестовый пост')
+
+    def test_follow_invalidates_follow_feed(self):
+        """Подписка сбрасывает кэш ленты подписок читателя"""
+
+        reader = User.objects.create_user(username='reader')
+        client = Client()
+        client.force_login(reader)
+        url = reverse('posts:follow_index')
+
+        self.assertNotContains(client.get(url), 'Тестовый пост')
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(user=reader, author=self.user)
+
+        self.assertContains(client.get(url), 'Тестовый пост')
+
+
+class CacheCommitTest(TransactionTestCase):
+    """Проверка сброса кэша лент после фиксации транзакции"""
+
+    def setUp(self) -> None:
         cache.clear()
-        response_upd_again = self.client.get(url).content
+        self.client = Client()
+        self.user = User.objects.create_user(username='user_noname')
+        self.url = reverse('posts:index')
+
+    def test_page_built_before_commit_is_not_served(self):
+        """Страница, закэшированная читателем между записью поста и
+        фиксацией, после фиксации не отдается"""
 
-        self.assertNotEqual(response, response_upd_again)
+        stale = self.client.get(self.url).context['page_obj']
+        with transaction.atomic():
+            Post.objects.create(text='Новый пост', author=self.user)
+            # Читатель другого соединения уже видит новое поколение, но
+            # еще не видит пост и кэширует страницу без него.
+            feed_cache.get_page(
+                [feed_cache.INDEX], 'None:None', lambda: stale
+            )
 
+        self.assertContains(self.client.get(self.url), 'Новый пост')
 
-class SubscribeTest(PostViewsBaseTest):
+
+class SubscribeTest(OnCommitMixin, PostViewsBaseTest):
     """Тестирование системы подписки"""
 
     def setUp(self) -> None:
@@ -303,7 +574,8 @@ class SubscribeTest(PostViewsBaseTest):
         """Проверяет, что новый пост появляется в ленте подписчиков."""
 
         cache.clear()
-        Follow.objects.create(user=self.user_noname, author=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(user=self.user_noname, author=self.user)
         url = reverse('posts:follow_index')
 
         response = self.authorized_client.get(url)
@@ -319,3 +591,74 @@ class SubscribeTest(PostViewsBaseTest):
         response = self.authorized_client.get(url)
 
         self.assertNotContains(response, self.post)
+
+
+class WriteTransactionTest(PostViewsBaseTest):
+    """Транзакция (и блокировка записи SQLite) открывается только для
+    настоящей записи."""
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_requests_without_writes_open_no_transaction(self):
+        """Форма поста, повторная подписка и отписка от автора, на
+        которого пользователь не подписан, не открывают транзакцию."""
+
+        Follow.objects.create(user=self.user_noname, author=self.user)
+        urls = (
+            reverse('posts:post_create'),
+            reverse('posts:profile_follow', args=(self.user,)),
+            reverse('posts:profile_unfollow', args=(self.user_noname,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    self.authorized_client.get(url)
+                self.assertFalse([
+                    query for query in queries
+                    if query['sql'].startswith('SAVEPOINT')
+                ])
+
+
+@override_settings(QUERY_BUDGET_MODE='raise')
+class QueryBudgetTest(TestCase):
+    """Проверяет, что страницы укладываются в бюджет SQL-запросов
+    (QUERY_BUDGETS) с пустым кэшем."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='budget', description='Описание'
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group, text=f'Пост {i}')
+            for i in range(NUMBER_OF_POSTS + 1)
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Котики'
+        )
+        Comment.objects.create(post=cls.post, author=cls.author, text='Да')
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_views_fit_query_budget(self):
+        """Ленты, страница поста и поиск не превышают бюджет."""
+
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+            reverse('posts:post_comments', args=[self.post.pk]),
+            reverse('posts:follow_index'),
+            reverse('search:search') + '?q=котики',
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
@@ -0,0 +1,78 @@
+"""Фоновая подготовка миниатюр картинок постов.
+
+Бэкенд sorl-thumbnail подменен: во время запроса миниатюра только
+ищется в хранилище ключей, а если ее еще нет, шаблон показывает
+запасной вариант из {% empty %}. Чтение страницы ничего не пишет:
+миниатюры ставятся в очередь задач (jobs) при сохранении поста и
+после перекодирования картинки, а созданная воркером миниатюра
+сбрасывает кэш лент, в которых виден пост.
+"""
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+
+from .uploads import post_image_storage
+
+# Размеры, в которых картинки постов выводятся в шаблонах.
+GEOMETRIES = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+
+
+class DeferredThumbnailBackend(ThumbnailBackend):
+    """Отдает только готовые миниатюры."""
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        source = ImageFile(file_)
+        thumbnail = ImageFile(
+            self._get_thumbnail_filename(
+                source, geometry_string, self._full_options(source, options)
+            ),
+            default.storage,
+        )
+        return default.kvstore.get(thumbnail)
+
+    def generate(self, file_, geometry_string, **options):
+        return super().get_thumbnail(file_, geometry_string, **options)
+
+    def _full_options(self, source, options):
+        """Опции с умолчаниями – так же, как их дополняет sorl."""
+        options = dict(options)
+        if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        return options
+
+
+def generate(name, geometry_string, options):
+    default.backend.generate(
+        ImageFile(name, post_image_storage), geometry_string, **options
+    )
+
+
+def schedule(name, geometry_string, options):
+    """Ставит создание миниатюры в очередь задач. Повторные постановки,
+    пока задача в таблице очереди, отбрасываются по ключу."""
+    from .tasks import generate_thumbnail
+
+    generate_thumbnail.delay(
+        name,
+        geometry_string,
+        options,
+        key=f'thumbnail:{geometry_string}:{name}',
+    )
+
+
+def schedule_post(post):
+    """Ставит в очередь все миниатюры картинки поста."""
+    if not post.image:
+        return
+    for geometry_string, options in GEOMETRIES:
+        schedule(post.image.name, geometry_string, options)
@@ -0,0 +1,150 @@
+"""Предрассчитанные ленты подписок (fan-out on write).
+
+Новый пост сразу раскладывается в ленты подписчиков автора, поэтому
+страница /follow/ читает только свою ленту. Для авторов, у которых
+подписчиков больше TIMELINE_FANOUT_LIMIT, раскладка не делается:
+их посты подмешиваются в ленту при чтении. Когда автор опускается
+ниже предела, его последние посты раскладываются в ленты всех
+подписчиков (demote), иначе посты того периода пропали бы из лент.
+"""
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+
+from .models import Follow, Post, TimelineEntry, UserStats
+
+BATCH_SIZE = 500
+ORDERING = ('-feed_date', '-feed_pk')
+
+
+def is_celebrity(author_id):
+    return UserStats.objects.filter(
+        pk=author_id,
+        followers_count__gte=settings.TIMELINE_FANOUT_LIMIT,
+    ).exists()
+
+
+def _add_entries(entries):
+    TimelineEntry.objects.bulk_create(
+        entries, batch_size=BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def fan_out(post):
+    """Раскладывает новый пост в ленты подписчиков автора."""
+    if is_celebrity(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    _add_entries(
+        TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+        for user_id in followers.iterator()
+    )
+
+
+def _recent_posts(author_id):
+    return Post.objects.filter(
+        author_id=author_id
+    ).order_by('-pub_date').values_list(
+        'pk', 'pub_date'
+    )[:settings.TIMELINE_BACKFILL_SIZE]
+
+
+def _backfill_user(user_id, posts):
+    _add_entries(
+        TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+        for pk, pub_date in posts
+    )
+
+
+def backfill(follow):
+    """Добавляет в ленту нового подписчика последние посты автора."""
+    if is_celebrity(follow.author_id):
+        return
+    _backfill_user(follow.user_id, _recent_posts(follow.author_id))
+
+
+def is_demoted(author_id):
+    """Опустился ли автор ниже предела только что: вызывается в той же
+    транзакции, что и уменьшение счетчика подписчиков на единицу."""
+    return UserStats.objects.filter(
+        pk=author_id,
+        followers_count=settings.TIMELINE_FANOUT_LIMIT - 1,
+    ).exists()
+
+
+def demote(author_id):
+    """Раскладывает последние посты автора, переставшего быть
+    популярным, в ленты всех его подписчиков."""
+    if is_celebrity(author_id):
+        return
+    posts = list(_recent_posts(author_id))
+    followers = Follow.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True)
+    for user_id in followers.iterator():
+        _backfill_user(user_id, posts)
+
+
+REBUILD_SQL = (
+    'INSERT INTO {entry} (user_id, post_id, pub_date) '
+    'SELECT f.user_id, p.id, p.pub_date FROM {follow} f '
+    'JOIN (SELECT id, author_id, pub_date, ROW_NUMBER() OVER ('
+    'PARTITION BY author_id ORDER BY pub_date DESC) AS n FROM {post}) p '
+    'ON p.author_id = f.author_id '
+    'LEFT JOIN {stats} s ON s.user_id = f.author_id '
+    'WHERE p.n <= %s AND COALESCE(s.followers_count, 0) < %s'
+)
+
+
+def rebuild():
+    """Заново раскладывает ленты всех подписчиков, как backfill для
+    каждой подписки, но одним запросом INSERT ... SELECT в транзакции:
+    читатели не видят наполовину пустых лент. Счетчики подписчиков
+    должны быть уже пересчитаны."""
+    sql = REBUILD_SQL.format(
+        entry=TimelineEntry._meta.db_table,
+        follow=Follow._meta.db_table,
+        post=Post._meta.db_table,
+        stats=UserStats._meta.db_table,
+    )
+    with transaction.atomic():
+        TimelineEntry.objects.all().delete()
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [
+                settings.TIMELINE_BACKFILL_SIZE,
+                settings.TIMELINE_FANOUT_LIMIT,
+            ])
+
+
+def prune(follow):
+    """Убирает посты автора из ленты отписавшегося пользователя."""
+    TimelineEntry.objects.filter(
+        user_id=follow.user_id,
+        post__author_id=follow.author_id,
+    ).delete()
+
+
+def feed(user):
+    """Посты ленты подписок в порядке ORDERING.
+
+    Обычно лента целиком разложена, и записи читаются по индексу
+    (user, -pub_date, -post) уже в нужном порядке. Если среди подписок
+    есть популярные авторы, их посты подмешиваются, и страница
+    сортируется при чтении.
+    """
+    celebrities = Follow.objects.filter(
+        user=user,
+        author__stats__followers_count__gte=settings.TIMELINE_FANOUT_LIMIT,
+    ).values('author_id')
+    posts = Post.objects.for_feed()
+    if not celebrities.exists():
+        return posts.filter(timeline_entries__user=user).annotate(
+            feed_date=F('timeline_entries__pub_date'),
+            feed_pk=F('timeline_entries__post_id'),
+        )
+    timeline = TimelineEntry.objects.filter(user=user).values('post_id')
+    return posts.filter(
+        Q(pk__in=timeline) | Q(author_id__in=celebrities)
+    ).annotate(feed_date=F('pub_date'), feed_pk=F('pk'))
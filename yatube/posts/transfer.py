@@ -0,0 +1,295 @@
+"""Потоковая выгрузка и загрузка данных в JSONL.
+
+Каждая таблица пишется в свой файл <таблица>.jsonl, по строке JSON на
+запись. Выгрузка читает таблицу по первичному ключу через
+iterator(chunk_size=...), загрузка вставляет строки пачками через
+bulk_create, так что в памяти держится только одна пачка. Таблицы
+обрабатываются параллельно, по потоку на таблицу: при загрузке – по
+уровням, чтобы внешние ключи ссылались на уже загруженные строки.
+
+После каждой пачки в файл отметок (export-checkpoint.json или
+import-checkpoint.json в том же каталоге) записывается, докуда дошла
+таблица, поэтому прерванный перенос продолжается с места остановки.
+Счетчики, ленты подписок и поисковый индекс не переносятся: после
+загрузки они пересчитываются по данным.
+"""
+import datetime
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, connections, transaction
+from django.utils.dateparse import parse_datetime
+
+from search import index
+
+from . import counters, feed_cache, timeline
+from .models import Comment, Follow, Group, Post, User
+
+CHUNK_SIZE = 2000
+EXPORT_CHECKPOINT = 'export-checkpoint.json'
+IMPORT_CHECKPOINT = 'import-checkpoint.json'
+
+
+@dataclass(frozen=True)
+class Table:
+    name: str
+    model: type
+    fields: tuple
+    # Уровень загрузки: таблицы уровня грузятся после всех предыдущих.
+    level: int
+    # Заполняет производные поля загруженной записи.
+    prepare: object = None
+
+    @property
+    def filename(self):
+        return f'{self.name}.jsonl'
+
+
+# Денормализованные счетчики не выгружаются, а пересчитываются;
+# заголовок и начало текста поста заполняются при загрузке.
+TABLES = (
+    Table('users', User, (
+        'id', 'password', 'last_login', 'is_superuser', 'username',
+        'first_name', 'last_name', 'email', 'is_staff', 'is_active',
+        'date_joined',
+    ), 0),
+    Table('groups', Group, ('id', 'title', 'slug', 'description'), 0),
+    Table('posts', Post, (
+        'id', 'text', 'pub_date', 'author_id', 'group_id', 'image',
+    ), 1, Post.summarize),
+    Table('comments', Comment, (
+        'id', 'post_id', 'author_id', 'text', 'created',
+    ), 2),
+    Table('follows', Follow, ('id', 'user_id', 'author_id'), 2),
+)
+TABLE_NAMES = tuple(table.name for table in TABLES)
+
+
+class Encoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder отбрасывает микросекунды, а они нужны, чтобы
+    порядок постов с близкими датами не изменился."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class Checkpoint:
+    """Прогресс по таблицам в JSON-файле; запись атомарная."""
+
+    def __init__(self, path):
+        self.path = path
+        self.state = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path) as file:
+                self.state = json.load(file)
+
+    def get(self, table):
+        return self.state.get(table)
+
+    def set(self, table, value):
+        with self._lock:
+            self.state[table] = value
+            temporary = f'{self.path}.tmp'
+            with open(temporary, 'w') as file:
+                json.dump(self.state, file)
+            os.replace(temporary, self.path)
+
+
+def _selected(tables):
+    if not tables:
+        return TABLES
+    unknown = set(tables) - set(TABLE_NAMES)
+    if unknown:
+        raise ValueError(
+            'Неизвестные таблицы: ' + ', '.join(sorted(unknown))
+        )
+    return tuple(table for table in TABLES if table.name in tables)
+
+
+def _run_parallel(func, tables, workers):
+    """Выполняет func для каждой таблицы в пуле потоков; у каждого
+    потока свое соединение с базой, оно закрывается по завершении."""
+    def task(table):
+        try:
+            return func(table)
+        finally:
+            connections.close_all()
+
+    if workers <= 1 or len(tables) <= 1:
+        return {table.name: func(table) for table in tables}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(task, tables)
+        return {table.name: result for table, result in zip(tables, results)}
+
+
+def export_table(table, directory, checkpoint, chunk_size=CHUNK_SIZE):
+    """Дописывает в файл таблицы строки после последней выгруженной.
+    Возвращает число выгруженных за этот запуск строк."""
+    path = os.path.join(directory, table.filename)
+    state = checkpoint.get(table.name) or {'pk': None, 'offset': 0}
+    rows = table.model._base_manager.order_by('pk').values(*table.fields)
+    if state['pk'] is not None:
+        rows = rows.filter(pk__gt=state['pk'])
+    exported = 0
+    with open(path, 'a+b') as file:
+        # Строки, дописанные после последней отметки, могли оборваться
+        # на середине – отрезаем их.
+        file.truncate(state['offset'])
+        file.seek(state['offset'])
+        pending = 0
+        for row in rows.iterator(chunk_size=chunk_size):
+            file.write(json.dumps(
+                row, cls=Encoder, ensure_ascii=False
+            ).encode() + b'\n')
+            state['pk'] = row['id']
+            exported += 1
+            pending += 1
+            if pending == chunk_size:
+                file.flush()
+                checkpoint.set(table.name, dict(state, offset=file.tell()))
+                pending = 0
+        file.flush()
+        checkpoint.set(table.name, dict(state, offset=file.tell()))
+    return exported
+
+
+def export(directory, tables=(), workers=1, chunk_size=CHUNK_SIZE,
+           resume=False):
+    """Выгружает таблицы в каталог directory. Без resume начинает
+    заново, иначе продолжает с сохраненных отметок."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, EXPORT_CHECKPOINT)
+    if not resume and os.path.exists(path):
+        os.remove(path)
+    checkpoint = Checkpoint(path)
+    return _run_parallel(
+        lambda table: export_table(table, directory, checkpoint, chunk_size),
+        _selected(tables),
+        workers,
+    )
+
+
+@contextmanager
+def _keep_dates(model):
+    """Отключает auto_now/auto_now_add, чтобы bulk_create сохранил
+    даты из выгрузки, а не текущее время."""
+    saved = []
+    for field in model._meta.concrete_fields:
+        if getattr(field, 'auto_now_add', False) or getattr(
+                field, 'auto_now', False):
+            saved.append((field, field.auto_now, field.auto_now_add))
+            field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _decode(table, row):
+    for field in table.model._meta.concrete_fields:
+        value = row.get(field.attname)
+        if value is not None and field.get_internal_type() == (
+                'DateTimeField'):
+            row[field.attname] = parse_datetime(value)
+    instance = table.model(**row)
+    if table.prepare is not None:
+        table.prepare(instance)
+    return instance
+
+
+def import_table(table, directory, checkpoint, batch_size=CHUNK_SIZE):
+    """Загружает файл таблицы пачками по batch_size строк, пропуская
+    уже загруженные. Возвращает число прочитанных за этот запуск
+    строк. Конфликты по ключам пропускаются, поэтому пачка, вставленная
+    перед сбоем, но не отмеченная, не ломает повторный запуск."""
+    path = os.path.join(directory, table.filename)
+    if not os.path.exists(path):
+        return 0
+    done = checkpoint.get(table.name) or 0
+    loaded = 0
+
+    def flush(batch):
+        with transaction.atomic():
+            table.model._base_manager.bulk_create(
+                batch, ignore_conflicts=True
+            )
+        checkpoint.set(table.name, done + loaded)
+
+    with _keep_dates(table.model), open(path, encoding='utf-8') as file:
+        batch = []
+        skipped = 0
+        for line in file:
+            # Отметка считает только непустые строки – так же и здесь.
+            if not line.strip():
+                continue
+            if skipped < done:
+                skipped += 1
+                continue
+            batch.append(_decode(table, json.loads(line)))
+            loaded += 1
+            if len(batch) == batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+    return loaded
+
+
+def _reset_sequences(tables):
+    """После вставки с явными ключами сдвигает последовательности
+    (в PostgreSQL); в SQLite запросов нет."""
+    statements = connection.ops.sequence_reset_sql(
+        no_style(), [table.model for table in tables]
+    )
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+def rebuild_derived(tables=TABLES):
+    """Пересчитывает данные, которые не переносятся: счетчики, ленты
+    подписок, поисковый индекс и поколения кэша лент – только те, что
+    строятся по загруженным таблицам tables."""
+    names = {table.name for table in tables}
+    counters.rebuild()
+    if names & {'posts', 'follows'}:
+        timeline.rebuild()
+    if names & {'posts', 'comments'}:
+        index.rebuild(Post, Comment)
+    feed_cache.invalidate_all()
+
+
+def load(directory, tables=(), workers=1, batch_size=CHUNK_SIZE,
+         resume=False):
+    """Загружает таблицы из каталога directory. SQLite допускает
+    одного писателя, поэтому для нее таблицы грузятся по очереди."""
+    path = os.path.join(directory, IMPORT_CHECKPOINT)
+    if not resume and os.path.exists(path):
+        os.remove(path)
+    checkpoint = Checkpoint(path)
+    if connection.vendor == 'sqlite':
+        workers = 1
+    tables = _selected(tables)
+    loaded = {}
+    for level in sorted({table.level for table in tables}):
+        loaded.update(_run_parallel(
+            lambda table: import_table(
+                table, directory, checkpoint, batch_size
+            ),
+            [table for table in tables if table.level == level],
+            workers,
+        ))
+    _reset_sequences(tables)
+    rebuild_derived(tables)
+    return loaded
@@ -0,0 +1,186 @@
+"""Прием картинок постов.
+
+Обработчик загрузки пишет файл на диск по частям и по первым байтам
+(заголовку картинки) отбрасывает слишком большие файлы и картинки с
+огромным числом пикселей еще до того, как загрузка дочитана. Он
+подключается только к представлениям постов декоратором
+bounded_image_uploads, а не ко всем загрузкам проекта. Хранилище
+называет файлы по SHA-256 содержимого, поэтому одинаковые картинки
+лежат на диске в одном экземпляре.
+"""
+import hashlib
+import posixpath
+from functools import wraps
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadhandler import (
+    SkipFile,
+    TemporaryFileUploadHandler,
+)
+from django.template.defaultfilters import filesizeformat
+from django.utils.deconstruct import deconstructible
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from PIL import Image
+
+# Столько байт от начала файла ждем, чтобы прочитать размеры картинки:
+# у снимков с камер до размеров идут EXIF, ICC и XMP на сотни килобайт.
+HEADER_LIMIT = 1024 * 1024
+# Исходные загрузки лежат отдельно от перекодированных картинок.
+UPLOADS_DIR = 'uploads'
+EXTENSIONS = {
+    'AVIF': '.avif',
+    'GIF': '.gif',
+    'JPEG': '.jpg',
+    'PNG': '.png',
+    'WEBP': '.webp',
+}
+
+
+def target_format():
+    """Формат перекодирования из IMAGE_FORMAT, если его поддерживает
+    установленный Pillow; иначе None – формат исходника сохраняется."""
+    Image.init()
+    image_format = settings.IMAGE_FORMAT
+    if image_format and image_format in Image.SAVE:
+        return image_format
+    return None
+
+
+def is_upload(name):
+    parts = name.split('/')
+    return len(parts) > 2 and parts[-3] == UPLOADS_DIR
+
+
+def processed_name(name):
+    """Имя перекодированной копии: posts/uploads/ab/<sha>.gif ->
+    posts/ab/<sha>.webp."""
+    directory, filename = posixpath.split(name)
+    root = posixpath.dirname(posixpath.dirname(directory))
+    stem, extension = posixpath.splitext(filename)
+    image_format = target_format()
+    if image_format:
+        extension = EXTENSIONS.get(image_format, extension)
+    return posixpath.join(root, stem[:2], stem + extension)
+
+
+class BoundedImageUploadHandler(TemporaryFileUploadHandler):
+    """Сохраняет загрузку во временный файл и отбрасывает ее, как только
+    стало ясно, что она превышает IMAGE_UPLOAD_MAX_SIZE байт или
+    IMAGE_UPLOAD_MAX_PIXELS пикселей. Причины отказа складываются в
+    request.upload_errors по именам полей формы."""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.header = b''
+        self.checked = False
+        if (self.content_length
+                and self.content_length > settings.IMAGE_UPLOAD_MAX_SIZE):
+            self.reject(self.too_large_message())
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > settings.IMAGE_UPLOAD_MAX_SIZE:
+            self.reject(self.too_large_message())
+        if not self.checked:
+            self.header += raw_data
+            self.check_header()
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        if not self.checked:
+            self.discard('Загрузите правильное изображение.')
+            return None
+        return super().file_complete(file_size)
+
+    def check_header(self):
+        try:
+            image = Image.open(BytesIO(self.header))
+        except Image.DecompressionBombError:
+            self.reject(self.too_many_pixels_message())
+        except Exception:
+            if len(self.header) >= HEADER_LIMIT:
+                self.reject('Загрузите правильное изображение.')
+            return
+        width, height = image.size
+        if width * height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+            self.reject(self.too_many_pixels_message())
+        self.checked = True
+        self.header = b''
+
+    def discard(self, message):
+        errors = getattr(self.request, 'upload_errors', None)
+        if errors is None:
+            errors = self.request.upload_errors = {}
+        errors[self.field_name] = message
+        self.file.close()
+
+    def reject(self, message):
+        self.discard(message)
+        raise SkipFile(message)
+
+    @staticmethod
+    def too_large_message():
+        return 'Размер файла не должен превышать %s.' % filesizeformat(
+            settings.IMAGE_UPLOAD_MAX_SIZE
+        )
+
+    @staticmethod
+    def too_many_pixels_message():
+        return 'В изображении не должно быть больше %s пикселей.' % (
+            settings.IMAGE_UPLOAD_MAX_PIXELS
+        )
+
+
+def bounded_image_uploads(view):
+    """Принимает загрузки представления через BoundedImageUploadHandler.
+
+    CsrfViewMiddleware читает request.POST до вызова представления, и
+    после этого обработчики загрузки уже не заменить. Поэтому
+    представление исключается из проверки middleware, а CSRF
+    проверяется здесь, после замены обработчиков.
+    """
+    protected = csrf_protect(view)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers = [BoundedImageUploadHandler(request)]
+        return protected(request, *args, **kwargs)
+
+    return csrf_exempt(wrapper)
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Файловое хранилище, где имя файла – хеш его содержимого.
+
+    Загрузка сохраняется как <каталог>/uploads/ab/<sha256>.<расширение>.
+    Если такой файл или его перекодированная копия уже есть, новый файл
+    не пишется, и поле получает имя существующего.
+    """
+
+    def save(self, name, content, max_length=None):
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        digest = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        directory, filename = posixpath.split(name)
+        extension = posixpath.splitext(filename)[1].lower()
+        upload = posixpath.join(
+            directory, UPLOADS_DIR, digest[:2], digest + extension
+        )
+        for existing in (processed_name(upload), upload):
+            if self.exists(existing):
+                return existing
+        return super().save(upload, content, max_length)
+
+    def save_processed(self, name, content):
+        """Сохраняет перекодированную копию под готовым именем."""
+        return super().save(name, content)
+
+
+post_image_storage = ContentAddressedStorage()
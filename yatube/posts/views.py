@@ -1,5 +1,6 @@
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import Http404
 from django.shortcuts import (
     render,
     redirect,
@@ -7,23 +8,59 @@ from django.shortcuts import (
 )
 from django.urls import reverse
 
+from core.concurrency import gather
+from core.db.routers import read_replica
+from core.ratelimit import rate_limit
+
+from . import feed_cache, follow_graph, timeline
+from .conditional import (
+    conditional,
+    group_feeds,
+    index_feeds,
+    post_feeds,
+    profile_feeds,
+)
 from .forms import PostForm, CommentForm
-from .models import Group, Post, User, Follow
+from .models import Comment, Group, Post, User, Follow
+from .paginator import CursorPaginator
+from .uploads import bounded_image_uploads
 
 NUMBER_OF_POSTS = 10
+NUMBER_OF_COMMENTS = 20
+COMMENTS_ORDERING = ('-created', '-pk')
+
+
+def paginate(request, element, feeds=(), ordering=('-pub_date', '-pk')):
+    number = request.GET.get('page')
+    cursor = request.GET.get('cursor')
 
+    def build():
+        paginator = CursorPaginator(element, NUMBER_OF_POSTS, ordering)
+        return paginator.get_page(number=number, cursor=cursor)
 
-def paginate(request, element):
-    paginator = Paginator(element, NUMBER_OF_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    return page_obj
+    if not feeds:
+        return build()
+    return feed_cache.get_page(feeds, f'{number}:{cursor}', build)
+
+
+def paginate_comments(post_id, cursor=None):
+    """Страница комментариев поста по курсору (created, id): стоимость
+    запроса и память не зависят от длины обсуждения."""
+    comments = Comment.objects.filter(
+        post_id=post_id
+    ).select_related('author')
+    paginator = CursorPaginator(
+        comments, NUMBER_OF_COMMENTS, COMMENTS_ORDERING
+    )
+    return paginator.get_page(cursor=cursor)
 
 
+@read_replica
+@conditional(index_feeds)
 def index(request):
     template = 'posts/index.html'
-    posts = Post.objects.all()
-    page_obj = paginate(request, posts)
+    posts = Post.objects.for_feed()
+    page_obj = paginate(request, posts, [feed_cache.INDEX])
     groups = Group.objects.all()
     context = {
         'groups': groups,
@@ -32,11 +69,13 @@ def index(request):
     return render(request, template, context)
 
 
+@read_replica
+@conditional(group_feeds)
 def group_posts(request, slug):
     template = 'posts/group_list.html'
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    page_obj = paginate(request, posts)
+    posts = group.posts.for_feed()
+    page_obj = paginate(request, posts, [feed_cache.group_feed(group.pk)])
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -44,19 +83,24 @@ def group_posts(request, slug):
     return render(request, template, context)
 
 
+@read_replica
+@conditional(profile_feeds)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    page_obj = paginate(request, posts)
+    author = get_object_or_404(
+        User.objects.select_related('stats'),
+        username=username
+    )
+    posts = author.posts.for_feed()
     template = 'posts/profile.html'
 
     user = request.user
-    following = False
-    if user.is_authenticated:
-        following = Follow.objects.filter(
-            user=user,
-            author=author
-        ).exists()
+    # Пользователь загружается здесь, а не в потоке пула.
+    authenticated = user.is_authenticated
+
+    page_obj, following = gather(
+        lambda: paginate(request, posts, [feed_cache.author_feed(author.pk)]),
+        lambda: authenticated and follow_graph.is_following(user, author.pk),
+    )
 
     context = {
         'author': author,
@@ -66,12 +110,16 @@ def profile(request, username):
     return render(request, template, context)
 
 
+@read_replica
+@conditional(post_feeds)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post, comments = gather(
+        lambda: get_object_or_404(Post.objects.for_feed(), pk=post_id),
+        lambda: paginate_comments(post_id, request.GET.get('comments')),
+    )
     is_edit = post.author == request.user
     template = 'posts/post_detail.html'
     form = CommentForm()
-    comments = post.comment.all()
     context = {
         'post': post,
         'is_edit': is_edit,
@@ -81,21 +129,44 @@ def post_detail(request, post_id):
     return render(request, template, context)
 
 
+@read_replica
+@conditional(post_feeds)
+def post_comments(request, post_id):
+    """Следующая страница комментариев – фрагмент для «Показать ещё»."""
+    comments = paginate_comments(post_id, request.GET.get('cursor'))
+    if not comments and not Post.objects.filter(pk=post_id).exists():
+        raise Http404
+    template = 'posts/includes/comment_list.html'
+    context = {
+        'post_id': post_id,
+        'comments': comments,
+    }
+    return render(request, template, context)
+
+
 @login_required
+@rate_limit('post')
+@bounded_image_uploads
 def post_create(request):
     template = 'posts/create_post.html'
-    form = PostForm(request.POST or None, files=request.FILES or None)
+    form = PostForm(
+        request.POST or None,
+        files=request.FILES or None,
+        upload_errors=getattr(request, 'upload_errors', None)
+    )
 
     if request.method == 'POST' and form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
-        post.save()
+        with transaction.atomic():
+            post.save()
         url = reverse('posts:profile', args=(request.user,))
         return redirect(url)
     return render(request, template, {'form': form})
 
 
 @login_required
+@bounded_image_uploads
 def post_edit(request, post_id):
     template = 'posts/create_post.html'
     post = get_object_or_404(Post, pk=post_id)
@@ -103,13 +174,15 @@ def post_edit(request, post_id):
     form = PostForm(
         request.POST or None,
         instance=post,
-        files=request.FILES or None
+        files=request.FILES or None,
+        upload_errors=getattr(request, 'upload_errors', None)
     )
     if not post.author == request.user:
         return redirect('posts:post_detail', post.pk)
 
     if request.method == 'POST' and form.is_valid():
-        form.save()
+        with transaction.atomic():
+            form.save()
         url = reverse('posts:post_detail', args=(post.id,))
         return redirect(url)
 
@@ -122,6 +195,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@rate_limit('comment')
 def add_comment(request, post_id):
     url = 'posts:post_detail'
     form = CommentForm(request.POST or None)
@@ -129,37 +203,46 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = get_object_or_404(Post, pk=post_id)
-        comment.save()
+        with transaction.atomic():
+            comment.save()
     return redirect(url, post_id=post_id)
 
 
 @login_required
+@read_replica
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
-    page_obj = paginate(request, posts)
+    posts = timeline.feed(request.user)
+    feeds = [feed_cache.follow_feed(request.user.pk), feed_cache.CELEBRITIES]
+    page_obj = paginate(request, posts, feeds, timeline.ORDERING)
     template = 'posts/follow.html'
     context = {
         'page_obj': page_obj,
     }
-    if not posts:
+    if not page_obj.object_list and not page_obj.has_previous():
         context['empty'] = True
     return render(request, template, context)
 
 
 @login_required
+@rate_limit('follow', methods=('GET', 'POST'))
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     url = reverse('posts:profile', args=(username,))
 
     if request.user != author:
+        # Транзакцию get_or_create открывает, только если подписки нет.
         Follow.objects.get_or_create(user=request.user, author=author)
 
     return redirect(url)
 
 
 @login_required
+@rate_limit('follow', methods=('GET', 'POST'))
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     url = reverse('posts:profile', args=(username,))
-    Follow.objects.filter(user=request.user, author=author).delete()
+    follows = Follow.objects.filter(user=request.user, author=author)
+    if follows.exists():
+        with transaction.atomic():
+            follows.delete()
     return redirect(url)
@@ -0,0 +1,157 @@
+"""Хранение и опрос поискового индекса.
+
+Индекс – отдельная таблица search_document: по строке на пост и на
+комментарий. Номер строки выводится из первичного ключа объекта, так
+что обновление и удаление документа – поиск по первичному ключу.
+Локально (SQLite) таблица – виртуальная FTS5, слова в нее пишутся уже
+приведенными к основе стеммером; в Postgres – tsvector с GIN-индексом и
+русской конфигурацией полнотекстового поиска.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+
+from .stemmer import WORD, stem, stem_text
+
+TABLE = 'search_document'
+POST = 0
+COMMENT = 1
+# Строк в одном INSERT: SQLite до 3.32 принимает не больше 999
+# параметров на запрос.
+ROWS_PER_STATEMENT = 300
+
+
+def document_id(kind, pk):
+    return pk * 2 + kind
+
+
+def _chunks(rows):
+    rows = list(rows)
+    for start in range(0, len(rows), ROWS_PER_STATEMENT):
+        yield rows[start:start + ROWS_PER_STATEMENT]
+
+
+def _values(rows, placeholders):
+    """VALUES на несколько строк одним запросом и его параметры.
+
+    Не executemany: SQL-панель debug_toolbar форматирует запрос с
+    параметрами всего пакета и падает на записи индекса из сигналов.
+    """
+    sql = ', '.join([f'({placeholders})'] * len(rows))
+    return sql, [param for row in rows for param in row]
+
+
+class SQLiteBackend:
+    vendor = 'sqlite'
+
+    def install(self, cursor):
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5('
+            f"body, post_id UNINDEXED, tokenize='unicode61')"
+        )
+
+    def uninstall(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+    def index(self, cursor, documents):
+        """documents – кортежи (номер документа, id поста, текст)."""
+        for rows in _chunks(documents):
+            values, params = _values(
+                [(pk, post_id, stem_text(text))
+                 for pk, post_id, text in rows],
+                '%s, %s, %s',
+            )
+            cursor.execute(
+                f'INSERT OR REPLACE INTO {TABLE} (rowid, post_id, body) '
+                f'VALUES {values}',
+                params,
+            )
+
+    def remove(self, cursor, document_ids):
+        for ids in _chunks(document_ids):
+            placeholders = ', '.join(['%s'] * len(ids))
+            cursor.execute(
+                f'DELETE FROM {TABLE} WHERE rowid IN ({placeholders})', ids
+            )
+
+    def clear(self, cursor):
+        cursor.execute(f'DELETE FROM {TABLE}')
+
+    def search(self, cursor, query, limit):
+        # Каждая основа берется в кавычки, чтобы символы запроса не
+        # разбирались как синтаксис FTS5; слова соединяются через AND.
+        terms = {stem(word) for word in WORD.findall(query)}
+        if not terms:
+            return []
+        match = ' '.join(f'"{term}"' for term in sorted(terms))
+        cursor.execute(
+            f'SELECT post_id FROM {TABLE} WHERE {TABLE} MATCH %s '
+            f'GROUP BY post_id ORDER BY MIN(rank), post_id DESC LIMIT %s',
+            [match, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresBackend:
+    vendor = 'postgresql'
+    config = 'russian'
+
+    def install(self, cursor):
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS {TABLE} ('
+            f'id bigint PRIMARY KEY, post_id integer NOT NULL, '
+            f'body tsvector NOT NULL)'
+        )
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {TABLE}_body '
+            f'ON {TABLE} USING GIN (body)'
+        )
+
+    def uninstall(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+    def index(self, cursor, documents):
+        for rows in _chunks(documents):
+            values, params = _values(
+                [(pk, post_id, self.config, text)
+                 for pk, post_id, text in rows],
+                '%s, %s, to_tsvector(%s, %s)',
+            )
+            cursor.execute(
+                f'INSERT INTO {TABLE} (id, post_id, body) '
+                f'VALUES {values} '
+                f'ON CONFLICT (id) DO UPDATE SET '
+                f'post_id = EXCLUDED.post_id, body = EXCLUDED.body',
+                params,
+            )
+
+    def remove(self, cursor, document_ids):
+        cursor.execute(
+            f'DELETE FROM {TABLE} WHERE id = ANY(%s)', [list(document_ids)]
+        )
+
+    def clear(self, cursor):
+        cursor.execute(f'TRUNCATE {TABLE}')
+
+    def search(self, cursor, query, limit):
+        cursor.execute(
+            f'SELECT post_id FROM {TABLE}, plainto_tsquery(%s, %s) query '
+            f'WHERE body @@ query GROUP BY post_id '
+            f'ORDER BY MAX(ts_rank(body, query)) DESC, post_id DESC '
+            f'LIMIT %s',
+            [self.config, query, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+BACKENDS = {
+    backend.vendor: backend for backend in (SQLiteBackend, PostgresBackend)
+}
+
+
+def get_backend(db=connection):
+    try:
+        return BACKENDS[db.vendor]()
+    except KeyError:
+        raise ImproperlyConfigured(
+            f'Полнотекстовый поиск не поддерживается для {db.vendor}'
+        )
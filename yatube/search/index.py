@@ -0,0 +1,58 @@
+"""Обновление поискового индекса и поиск по нему."""
+from django.db import connection
+
+from .backends import COMMENT, POST, document_id, get_backend
+
+BATCH_SIZE = 1000
+
+
+def post_documents(posts):
+    return [(document_id(POST, post.pk), post.pk, post.text)
+            for post in posts]
+
+
+def comment_documents(comments):
+    return [(document_id(COMMENT, comment.pk), comment.post_id, comment.text)
+            for comment in comments]
+
+
+def add(documents):
+    if documents:
+        with connection.cursor() as cursor:
+            get_backend().index(cursor, documents)
+
+
+def remove(kind, pks):
+    with connection.cursor() as cursor:
+        get_backend().remove(cursor, [document_id(kind, pk) for pk in pks])
+
+
+def search(query, limit):
+    """id постов, найденных по тексту поста или комментариев к нему,
+    от самых подходящих к менее подходящим."""
+    with connection.cursor() as cursor:
+        return get_backend().search(cursor, query, limit)
+
+
+def _batches(queryset):
+    batch = []
+    for obj in queryset.iterator(chunk_size=BATCH_SIZE):
+        batch.append(obj)
+        if len(batch) == BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def rebuild(post_model, comment_model):
+    """Заполняет индекс заново. Модели передаются явно, чтобы функцию
+    можно было вызвать и из миграции."""
+    with connection.cursor() as cursor:
+        get_backend().clear(cursor)
+    posts = post_model.objects.only('pk', 'text').order_by()
+    for batch in _batches(posts):
+        add(post_documents(batch))
+    comments = comment_model.objects.only('pk', 'post_id', 'text').order_by()
+    for batch in _batches(comments):
+        add(comment_documents(batch))
@@ -0,0 +1,33 @@
+from django.db import migrations
+
+from search import index
+from search.backends import BACKENDS
+
+
+def create_index(apps, schema_editor):
+    backend = BACKENDS.get(schema_editor.connection.vendor)
+    if backend is None:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        backend().install(cursor)
+    index.rebuild(apps.get_model('posts', 'Post'),
+                  apps.get_model('posts', 'Comment'))
+
+
+def drop_index(apps, schema_editor):
+    backend = BACKENDS.get(schema_editor.connection.vendor)
+    if backend is None:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        backend().uninstall(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_auto_20261018_0447'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from posts.models import Comment, Post
+
+from . import index
+from .backends import COMMENT, POST
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    index.add(index.post_documents([instance]))
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, **kwargs):
+    index.add(index.comment_documents([instance]))
+
+
+@receiver(post_delete, sender=Post)
+def remove_post(sender, instance, **kwargs):
+    index.remove(POST, [instance.pk])
+
+
+@receiver(post_delete, sender=Comment)
+def remove_comment(sender, instance, **kwargs):
+    index.remove(COMMENT, [instance.pk])
@@ -0,0 +1,116 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import include, path, reverse
+
+import debug_toolbar
+from yatube.urls import urlpatterns as project_urlpatterns
+
+from posts.models import Comment, Post
+
+from .stemmer import stem
+
+User = get_user_model()
+
+# Адреса проекта вместе с debug_toolbar, как при DEBUG в разработке.
+urlpatterns = project_urlpatterns + [
+    path('__debug__/', include(debug_toolbar.urls)),
+]
+
+
+class StemmerTests(TestCase):
+    """Проверка приведения русских слов к основе"""
+
+    def test_word_forms_share_stem(self):
+        """Разные формы слова дают одну основу"""
+
+        forms = (
+            ('котики', 'котиками', 'котиков'),
+            ('программирование', 'программированием'),
+            ('ёлка', 'елки'),
+        )
+        for words in forms:
+            with self.subTest(words=words):
+                self.assertEqual(len({stem(word) for word in words}), 1)
+
+
+class SearchTests(TestCase):
+    """Проверка поиска по постам и комментариям"""
+
+    def setUp(self) -> None:
+        self.guest_client = Client()
+        self.author = User.objects.create_user(username='author')
+        self.cats = Post.objects.create(
+            author=self.author, text='Мои котики любят спать на солнце'
+        )
+        self.dogs = Post.objects.create(
+            author=self.author, text='Прогулка с собакой по парку'
+        )
+
+    def search(self, query):
+        response = self.guest_client.get(
+            reverse('search:search'), {'q': query}
+        )
+        return list(response.context['page_obj'] or [])
+
+    def test_search_by_word_form(self):
+        """Пост находится по другой форме слова"""
+
+        self.assertEqual(self.search('котиков'), [self.cats])
+        self.assertEqual(self.search('собаки парк'), [self.dogs])
+        self.assertEqual(self.search('котик собака'), [])
+
+    def test_search_by_comment(self):
+        """Пост находится по тексту комментария к нему"""
+
+        Comment.objects.create(
+            post=self.dogs, author=self.author, text='Какие котики!'
+        )
+
+        self.assertEqual(set(self.search('котики')), {self.cats, self.dogs})
+
+    def test_index_follows_changes(self):
+        """Изменение и удаление поста сразу отражаются в выдаче"""
+
+        self.cats.text = 'Теперь о птицах'
+        self.cats.save()
+        self.assertEqual(self.search('котики'), [])
+        self.assertEqual(self.search('птица'), [self.cats])
+
+        self.cats.delete()
+        self.assertEqual(self.search('птица'), [])
+
+    def test_query_syntax_is_escaped(self):
+        """Служебные символы FTS в запросе не ломают поиск"""
+
+        self.assertEqual(self.search('котики" * ^('), [self.cats])
+
+    def test_rebuild_command(self):
+        """Команда перестраивает индекс с нуля"""
+
+        call_command('rebuild_search_index', stdout=StringIO())
+
+        self.assertEqual(self.search('солнце'), [self.cats])
+
+    @override_settings(DEBUG=True, ROOT_URLCONF=__name__)
+    def test_index_under_debug_toolbar(self):
+        """Запись индекса в сигналах не ломает SQL-панель debug_toolbar
+        при добавлении комментария, создании и удалении поста"""
+
+        client = Client()
+        client.force_login(self.author)
+        response = client.post(
+            reverse('posts:add_comment', args=[self.dogs.pk]),
+            {'text': 'Котики'},
+        )
+        self.assertEqual(response.status_code, 302)
+        response = client.post(
+            reverse('posts:post_create'), {'text': 'Новые котики'}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(self.search('котики')), 3)
+
+        self.cats.delete()
+        self.assertEqual(len(self.search('котики')), 2)
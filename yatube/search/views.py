@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.shortcuts import render
+
+from posts.models import Post
+from posts.views import NUMBER_OF_POSTS
+
+from . import index
+
+
+def search(request):
+    template = 'search/search.html'
+    query = request.GET.get('q', '').strip()
+    page_obj = None
+    if query:
+        # Ранжированный список id ограничен SEARCH_MAX_RESULTS, посты
+        # загружаются только для текущей страницы.
+        ids = index.search(query, settings.SEARCH_MAX_RESULTS)
+        page_obj = Paginator(ids, NUMBER_OF_POSTS).get_page(
+            request.GET.get('page')
+        )
+        posts = Post.objects.for_feed().in_bulk(page_obj.object_list)
+        page_obj.object_list = [
+            posts[pk] for pk in page_obj.object_list if pk in posts
+        ]
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+    }
+    return render(request, template, context)
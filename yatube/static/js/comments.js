@@ -0,0 +1,23 @@
+// «Показать ещё комментарии»: следующая страница подгружается
+// фрагментом и заменяет кнопку. Без скриптов ссылка открывает
+// страницу поста с этой страницей комментариев.
+document.addEventListener('click', function (event) {
+  var link = event.target.closest('[data-comments-more]');
+  if (!link) {
+    return;
+  }
+  event.preventDefault();
+  fetch(link.dataset.commentsMore, {credentials: 'same-origin'})
+    .then(function (response) {
+      if (!response.ok) {
+        throw new Error(response.statusText);
+      }
+      return response.text();
+    })
+    .then(function (html) {
+      link.parentElement.outerHTML = html;
+    })
+    .catch(function () {
+      window.location = link.href;
+    });
+});
@@ -0,0 +1,14 @@
+// Кнопка меню на узком экране: раскрывает и сворачивает блок из
+// data-target (класс show, как в Bootstrap), без jQuery и bootstrap.js.
+document.addEventListener('click', function (event) {
+  var button = event.target.closest('[data-toggle="collapse"]');
+  if (!button) {
+    return;
+  }
+  var target = document.querySelector(button.dataset.target);
+  if (!target) {
+    return;
+  }
+  var shown = target.classList.toggle('show');
+  button.setAttribute('aria-expanded', shown ? 'true' : 'false');
+});
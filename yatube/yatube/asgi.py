@@ -0,0 +1,18 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named
+``application``; requests are handled by the WSGI application in a
+thread pool, see core.asgi.
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+from core.asgi import ASGIHandler  # noqa: E402
+from core.assets.server import static_application  # noqa: E402
+
+application = ASGIHandler(static_application(get_wsgi_application()))
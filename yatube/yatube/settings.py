@@ -12,6 +12,10 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 
 import os
 
+from core.caching.config import cache_from_url
+from core.db.config import sqlite_database, sqlite_replicas
+from core.sessions.config import session_engine
+
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -22,7 +26,7 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SECRET_KEY = 'lv@70e!9*r2y#oar##=kk8!pyx_6(3ge@5_ha0xy)z8si9p*fg'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get('YATUBE_DEBUG', '1') == '1'
 
 ALLOWED_HOSTS = [
     'www.viator3m.pythonanywhere.com',
@@ -49,11 +53,16 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'search.apps.SearchConfig',
+    'benchmarks.apps.BenchmarksConfig',
+    'jobs.apps.JobsConfig',
 
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.metrics.middleware.MetricsMiddleware',
+    'core.db.routers.ReplicaPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -72,9 +81,12 @@ ROOT_URLCONF = 'yatube.urls'
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+# В разработке шаблоны перечитываются с диска при каждом рендеринге.
+# С YATUBE_DEBUG=0 Django оборачивает загрузчики в cached.Loader, и
+# скомпилированные шаблоны хранятся в памяти процесса
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.metrics.templates.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -94,12 +106,24 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# Настройки SQLite и PRAGMA соединений – в core.db.config.
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+    'default': sqlite_database(
+        os.path.join(BASE_DIR, 'db.sqlite3'),
+        conn_max_age=int(os.environ.get('YATUBE_DB_CONN_MAX_AGE', 600)),
+    ),
 }
+# Реплики для чтения – пути к файлам через запятую. Представления с
+# core.db.routers.read_replica читают с них, пока пользователь не
+# записал что-то сам: после записи его запросы REPLICA_PIN_SECONDS
+# секунд идут в основную базу.
+DATABASES.update(sqlite_replicas(
+    filter(None, os.environ.get('YATUBE_DB_REPLICAS', '').split(',')),
+    conn_max_age=DATABASES['default']['CONN_MAX_AGE'],
+))
+REPLICA_DATABASES = [alias for alias in DATABASES if alias != 'default']
+REPLICA_PIN_SECONDS = 10
+DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -139,24 +163,118 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 STATIC_URL = '/static/'
+STATIC_ROOT = os.environ.get(
+    'YATUBE_STATIC_ROOT', os.path.join(BASE_DIR, 'static_root')
+)
+# В боевом режиме collectstatic добавляет к именам файлов хэш
+# содержимого и сжимает их в .gz и .br (brotli – если установлен пакет
+# brotli); yatube/wsgi.py отдает их с кэшированием на год, см.
+# core.assets
+if not DEBUG:
+    STATICFILES_STORAGE = 'core.assets.storage.CompressedManifestStorage'
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts.index'
 
 # EMAIL MODULE
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Письма отправляются из очереди задач бэкендом JOBS_EMAIL_BACKEND
+EMAIL_BACKEND = 'jobs.mail.EmailBackend'
+JOBS_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 # change 403csrf_error-function
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
+# Картинки постов пишутся на диск по частям и отбрасываются по
+# заголовку, если файл или картинка слишком велики (posts.uploads)
+IMAGE_UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+IMAGE_UPLOAD_MAX_PIXELS = 40 * 1000 * 1000
+# Загруженные картинки перекодируются в очереди задач в этот формат,
+# если его поддерживает Pillow
+IMAGE_FORMAT = 'WEBP'
+
+# Миниатюры картинок создаются в очереди задач, а не во время запроса
+THUMBNAIL_BACKEND = 'posts.thumbnails.DeferredThumbnailBackend'
+
+# Очередь задач (jobs): письма, картинки, миниатюры, счетчики, ленты
+# подписок и инвалидация кэша. Задачи пишутся в таблицу и выполняются
+# командой run_jobs; с JOBS_EAGER (по умолчанию в разработке) – в
+# самом процессе после фиксации транзакции.
+# Неудачная задача повторяется через JOBS_RETRY_DELAY * 2**n секунд
+# (не дольше JOBS_RETRY_MAX_DELAY), всего до JOBS_MAX_ATTEMPTS раз
+JOBS_EAGER = os.environ.get(
+    'YATUBE_JOBS_EAGER', '1' if DEBUG else '0'
+) == '1'
+JOBS_MAX_ATTEMPTS = 5
+JOBS_RETRY_DELAY = 2
+JOBS_RETRY_MAX_DELAY = 60 * 60
+JOBS_LOCK_TIMEOUT = 60 * 5
+JOBS_KEEP_DONE = 60 * 60 * 24
+
+# ASGI (yatube/asgi.py) обрабатывает запросы в пуле из ASGI_THREADS
+# потоков. Независимые запросы к базе внутри представления выполняются
+# одновременно в пуле из QUERY_THREADS потоков (0 – по очереди)
+ASGI_THREADS = int(os.environ.get('YATUBE_ASGI_THREADS', 32))
+QUERY_THREADS = int(os.environ.get('YATUBE_QUERY_THREADS', 4))
+
+# Лента подписок: посты авторов, у которых подписчиков не меньше
+# TIMELINE_FANOUT_LIMIT, не раскладываются по лентам, а читаются напрямую
+TIMELINE_FANOUT_LIMIT = 10000
+TIMELINE_BACKFILL_SIZE = 1000
+
+# Метрики запросов отдаются по /metrics/ только с этих адресов.
+# QUERY_BUDGETS – наибольшее число SQL-запросов на представление;
+# превышение пишется в лог, а в режиме 'raise' роняет запрос (тесты)
+METRICS_ALLOWED_IPS = INTERNAL_IPS
+QUERY_BUDGET_MODE = os.environ.get('YATUBE_QUERY_BUDGET_MODE', 'log')
+QUERY_BUDGETS = {
+    'posts:index': 4,
+    'posts:group_list': 5,
+    'posts:profile': 6,
+    'posts:post_detail': 6,
+    'posts:post_comments': 5,
+    'posts:follow_index': 5,
+    'search:search': 5,
+}
+
+# Бюджеты записей, core.ratelimit: (токенов в ведре, за сколько
+# секунд ведро наполняется заново) – для пользователя и для адреса.
+# Превышение отвечает 429 с Retry-After
+RATE_LIMITS = {
+    'post': {'user': (5, 60), 'ip': (20, 60)},
+    'comment': {'user': (10, 60), 'ip': (40, 60)},
+    'follow': {'user': (30, 60), 'ip': (120, 60)},
+}
+
+# Поиск ранжирует не больше стольких постов на запрос
+SEARCH_MAX_RESULTS = 1000
+
+# Время жизни кэша страниц лент; актуальность обеспечивается
+# инвалидацией по событиям, таймаут лишь освобождает память
+FEED_CACHE_TIMEOUT = 60 * 10
+
+# Время жизни кэша множеств подписок posts.follow_graph; сбрасываются
+# они при подписке и отписке
+FOLLOW_GRAPH_TIMEOUT = 60 * 60
+
+# Кэш задается адресом, см. core.caching.config. С несколькими
+# воркерами нужен общий кэш (sqlite://, file://, redis://, memcached://),
+# иначе у каждого воркера своя копия и инвалидация до других не доходит
+CACHE_URL = os.environ.get('YATUBE_CACHE_URL', 'locmem://')
 CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    'default': cache_from_url(CACHE_URL),
 }
 
+# Хранилище сессий, см. core.sessions.config: db, cached_db или
+# signed_cookies. Сессия сохраняется, только если ее данные изменились.
+# cached_db без общего кэша опасен при нескольких воркерах, поэтому
+# с кэшем в памяти процесса по умолчанию сессии читаются из базы
+SESSION_ENGINE = session_engine(os.environ.get(
+    'YATUBE_SESSION_ENGINE',
+    'db' if CACHE_URL.startswith('locmem:') else 'cached_db',
+))
+
 # #if DEBUG:
 #    import logging
 #    logging.basicConfig()